@@ -1,2 +1,6 @@
 from .models import *
-from .database import *
\ No newline at end of file
+from .cache import *
+from .database import *
+from .writer import *
+from .jobs import *
+from .export import *
\ No newline at end of file
@@ -0,0 +1,315 @@
+import json
+import time
+import traceback
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, Iterable, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from DB.models import ORGANIZER_SESSION, Event
+from extra import variables
+
+
+class CacheBackend(ABC):
+    """Interface for a key/value store holding plain dicts until an absolute epoch expiry.
+
+    A shared implementation (e.g. Redis) can be plugged in with `SessionCache.configure`
+    so that every worker sees the same entries and a logout on one worker is honoured
+    by all of them.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: dict, expire_at: int):
+        ...
+
+    @abstractmethod
+    def delete(self, key: str):
+        ...
+
+    @abstractmethod
+    def clear(self):
+        ...
+
+
+class LocalCacheBackend(CacheBackend):
+    """In-process LRU backend bounded to `max_size` entries."""
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self._data: "OrderedDict[str, tuple[int, dict]]" = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expire_at, value = entry
+            if int(time.time()) >= expire_at:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: dict, expire_at: int):
+        with self._lock:
+            self._data[key] = (expire_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SessionCache:
+    """Caches validated ORGANIZER_SESSION rows by token so authenticated calls can skip the database.
+
+    An entry lives for at most `SESSION_CACHE_TTL` seconds and never past the session's own
+    `expired_at`, so a cache hit is always a session that is still valid.
+    """
+
+    _backend: CacheBackend = LocalCacheBackend(variables.SESSION_CACHE_SIZE)
+    _ttl: int = variables.SESSION_CACHE_TTL
+    hits: int = 0
+    misses: int = 0
+
+    @classmethod
+    def configure(cls, backend: Optional[CacheBackend] = None, ttl: Optional[int] = None):
+        """Swaps the storage backend and/or TTL, e.g. to share the cache between workers."""
+        if backend is not None:
+            cls._backend = backend
+        if ttl is not None:
+            cls._ttl = ttl
+
+    @classmethod
+    def get(cls, session_token: str) -> Optional[ORGANIZER_SESSION]:
+        data = cls._backend.get(session_token)
+        if data is None:
+            cls.misses += 1
+            return None
+        cls.hits += 1
+        return ORGANIZER_SESSION(**data)
+
+    @classmethod
+    def set(cls, org_session: ORGANIZER_SESSION):
+        expire_at = min(int(time.time()) + cls._ttl, org_session.expired_at)
+        if expire_at <= int(time.time()):
+            return
+        cls._backend.set(org_session.pk, org_session.model_dump(), expire_at)
+
+    @classmethod
+    def invalidate(cls, session_token: str):
+        cls._backend.delete(session_token)
+
+    @classmethod
+    def clear(cls):
+        cls._backend.clear()
+
+
+class IdempotencyCache:
+    """Remembers the response sent for an Idempotency-Key so a retried request gets it back without running again.
+
+    Entries store a fingerprint of the original request; reusing a key for a different
+    request is reported as a mismatch instead of replaying an unrelated response.
+    """
+
+    _backend: CacheBackend = LocalCacheBackend(variables.IDEMPOTENCY_CACHE_SIZE)
+    _ttl: int = variables.IDEMPOTENCY_TTL
+    replays: int = 0
+
+    @classmethod
+    def configure(cls, backend: Optional[CacheBackend] = None, ttl: Optional[int] = None):
+        if backend is not None:
+            cls._backend = backend
+        if ttl is not None:
+            cls._ttl = ttl
+
+    @classmethod
+    def get(cls, scope: str, key: str) -> Optional[dict]:
+        """The stored {"fingerprint", "status", "message", "body"} for `key` within `scope`, if any."""
+        entry = cls._backend.get(f"idempotency:{scope}:{key}")
+        if entry is not None:
+            cls.replays += 1
+        return entry
+
+    @classmethod
+    def set(cls, scope: str, key: str, fingerprint: str, status: int, message: str, body):
+        entry = {"fingerprint": fingerprint, "status": status, "message": message, "body": body}
+        cls._backend.set(f"idempotency:{scope}:{key}", entry, int(time.time()) + cls._ttl)
+
+    @classmethod
+    def clear(cls):
+        cls._backend.clear()
+
+
+class InvalidationChannel(ABC):
+    """Interface for broadcasting cache keys to invalidate to every worker process."""
+
+    @abstractmethod
+    async def start(self, engine: AsyncEngine, on_invalidate: Callable[[List[str]], None]):
+        ...
+
+    @abstractmethod
+    async def publish(self, db_pool: AsyncSession, keys: List[str]):
+        """Called inside the writing transaction, before it commits."""
+
+    @abstractmethod
+    async def stop(self):
+        ...
+
+
+class PostgresInvalidationChannel(InvalidationChannel):
+    """LISTEN/NOTIFY on one dedicated connection per worker.
+
+    The listening connection is opened outside the application pool, so it never takes a
+    slot requests need; it is one connection per worker on top of DB_POOL_SIZE. NOTIFY is issued in the writer's transaction, so Postgres delivers it only if the
+    write commits. If the listening connection drops, the local cache is cleared and
+    entries fall back to expiring after their TTL.
+    """
+
+    def __init__(self, channel: str):
+        self.channel = channel
+        self._engine: Optional[AsyncEngine] = None
+        self._conn: Optional[AsyncConnection] = None
+        self._on_invalidate: Optional[Callable[[List[str]], None]] = None
+
+    async def start(self, engine: AsyncEngine, on_invalidate: Callable[[List[str]], None]):
+        self._on_invalidate = on_invalidate
+        self._engine = create_async_engine(engine.url, poolclass=NullPool)
+        self._conn = await self._engine.connect()
+        raw = (await self._conn.get_raw_connection()).driver_connection
+        await raw.add_listener(self.channel, self._notified)
+        raw.add_termination_listener(self._terminated)
+
+    async def publish(self, db_pool: AsyncSession, keys: List[str]):
+        conn = await db_pool.connection()
+        await conn.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": self.channel, "payload": json.dumps(keys)})
+
+    async def stop(self):
+        if self._conn is None:
+            return
+        raw = (await self._conn.get_raw_connection()).driver_connection
+        raw.remove_termination_listener(self._terminated)
+        await raw.remove_listener(self.channel, self._notified)
+        await self._conn.close()
+        await self._engine.dispose()
+        self._conn = None
+        self._engine = None
+
+    def _notified(self, connection, pid, channel, payload):
+        try:
+            self._on_invalidate(json.loads(payload))
+        except Exception:
+            traceback.print_exc()
+
+    def _terminated(self, connection):
+        print(f"Cache invalidation channel '{self.channel}' lost its connection; clearing the local event cache.")
+        EventCache.clear()
+
+
+class EventCache:
+    """Read-through cache of Event rows, keyed by primary key and by title.
+
+    `EVENT_DB` fills it on lookups and invalidates both keys of an event whenever it is
+    inserted, updated or deleted. With `EVENT_CACHE_CHANNEL` set on Postgres, invalidations
+    are also broadcast to the other workers; without it, another worker may serve a
+    stale row for up to `EVENT_CACHE_TTL` seconds.
+    """
+
+    _backend: CacheBackend = LocalCacheBackend(variables.EVENT_CACHE_SIZE)
+    _ttl: int = variables.EVENT_CACHE_TTL
+    _channel: Optional[InvalidationChannel] = None
+    hits: int = 0
+    misses: int = 0
+
+    @classmethod
+    def configure(cls, backend: Optional[CacheBackend] = None, ttl: Optional[int] = None, channel: Optional[InvalidationChannel] = None):
+        if backend is not None:
+            cls._backend = backend
+        if ttl is not None:
+            cls._ttl = ttl
+        if channel is not None:
+            cls._channel = channel
+
+    @classmethod
+    async def start(cls, engine: AsyncEngine):
+        """Starts listening for invalidations from other workers when a channel is configured."""
+        if cls._channel is None and variables.EVENT_CACHE_CHANNEL:
+            if engine.dialect.name != "postgresql":
+                print(f"EVENT_CACHE_CHANNEL needs Postgres, not {engine.dialect.name}; event cache invalidation stays local.")
+                return
+            cls._channel = PostgresInvalidationChannel(variables.EVENT_CACHE_CHANNEL)
+        if cls._channel is not None:
+            await cls._channel.start(engine, cls._drop)
+
+    @classmethod
+    async def stop(cls):
+        if cls._channel is not None:
+            await cls._channel.stop()
+
+    @staticmethod
+    def keys(event_pk: Optional[int] = None, title: Optional[str] = None) -> List[str]:
+        keys = []
+        if event_pk is not None:
+            keys.append(f"event:id:{event_pk}")
+        if title is not None:
+            keys.append(f"event:title:{title}")
+        return keys
+
+    @classmethod
+    def get(cls, event_pk: Optional[int] = None, title: Optional[str] = None) -> Optional[Event]:
+        if event_pk is None:
+            # Title entries only point at an id, so invalidating the id also retires every
+            # title the event was found under, including one it has since been renamed from.
+            ref = cls._backend.get(cls.keys(title=title)[0])
+            event_pk = ref["id"] if ref is not None else None
+        data = cls._backend.get(cls.keys(event_pk)[0]) if event_pk is not None else None
+        if data is None or (title is not None and data["title"] != title):
+            cls.misses += 1
+            return None
+        cls.hits += 1
+        return Event(**data)
+
+    @classmethod
+    def set(cls, event: Event, title: Optional[str] = None):
+        """Stores `event` under its id, and points `title` at it when it was looked up by title."""
+        expire_at = int(time.time()) + cls._ttl
+        cls._backend.set(cls.keys(event.id)[0], event.model_dump(), expire_at)
+        if title is not None:
+            cls._backend.set(cls.keys(title=title)[0], {"id": event.id}, expire_at)
+
+    @classmethod
+    async def publish(cls, db_pool: AsyncSession, keys: Iterable[str]):
+        if cls._channel is not None:
+            await cls._channel.publish(db_pool, list(keys))
+
+    @classmethod
+    def invalidate(cls, keys: Iterable[str]):
+        cls._drop(list(keys))
+
+    @classmethod
+    def _drop(cls, keys: List[str]):
+        for key in keys:
+            cls._backend.delete(key)
+
+    @classmethod
+    def clear(cls):
+        cls._backend.clear()
@@ -1,12 +1,25 @@
-from functools import wraps
+from functools import lru_cache, wraps
 import time
 from fastapi import Request,status
-from sqlmodel import SQLModel, create_engine, Session, delete, select
-from typing import Optional
+from pydantic_core import PydanticUndefined
+from sqlalchemy import Integer, bindparam, case, delete as sa_delete, func, insert as sa_insert, literal, or_, tuple_, update as sa_update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import load_only
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlmodel import delete, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import AsyncIterator, List, Optional, Tuple
 import traceback
-from DB.models import ORGANIZER, ORGANIZER_DETAILS, ORGANIZER_META, ORGANIZER_SESSION, RSVP, Event, TableNameEnum
+from DB.cache import EventCache, SessionCache
+from DB.migrations import run_migrations
+from DB.models import ORGANIZER, ORGANIZER_DETAILS, ORGANIZER_META, ORGANIZER_SESSION, RSVP, RSVP_SUMMARY, Event, TableNameEnum, rsvpenum
+from DB.search import search_statement, search_terms
 from extra import variables
 from extra.helper import send_json_response
+from extra.metrics import instrument_engine, pool_wait
 
 
 class UninitializedDatabasePoolError(Exception):
@@ -15,17 +28,53 @@ class UninitializedDatabasePoolError(Exception):
         super().__init__(self.message)
 
 
+class StaleUpdateError(Exception):
+    def __init__(self, current_row_version: int, current_updated_at: Optional[int], message="The row was modified by someone else since it was read"):
+        self.current_row_version = current_row_version
+        self.current_updated_at = current_updated_at
+        self.message = message
+        super().__init__(self.message)
+
+
+class EventKeysTakenError(Exception):
+    def __init__(self, event_ids: List[int], message="The organizer already has events with these event_ids"):
+        self.event_ids = event_ids
+        self.message = message
+        super().__init__(self.message)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited for a free connection."""
+
+    waits: int = 0
+    wait_time: float = 0.0
+    timeouts: int = 0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            InstrumentedQueuePool.timeouts += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            pool_wait.observe(elapsed)
+            InstrumentedQueuePool.waits += 1
+            InstrumentedQueuePool.wait_time += elapsed
+
+
 class DataBasePool:
-    _db_pool: Session = None
-    _engine = None
+    _session_maker: Optional[async_sessionmaker] = None
+    _engine: Optional[AsyncEngine] = None
     _timeout: Optional[float] = None
 
     @classmethod
     async def initDB(cls):
-        """Initializes the database by creating the tables if not already present."""
+        """Initializes the database by applying any pending schema migrations."""
         if cls._engine is None:
             raise UninitializedDatabasePoolError("Database engine is not initialized.")
-        initDB(cls._engine)
+        await initDB(cls._engine)
 
     @classmethod
     async def getEngine(cls):
@@ -34,39 +83,201 @@ class DataBasePool:
             raise UninitializedDatabasePoolError("Database engine is not initialized.")
         return cls._engine
 
+    @staticmethod
+    def pool_size() -> int:
+        """DB_POOL_SIZE, or this process's share of DB_CONNECTION_BUDGET; the production launcher exports WEB_WORKERS to every worker.
+
+        The share leaves out the connection the event cache invalidation channel listens on.
+        """
+        if variables.DB_POOL_SIZE:
+            return variables.DB_POOL_SIZE
+        share = variables.DB_CONNECTION_BUDGET // max(variables.WEB_WORKERS, 1)
+        if variables.EVENT_CACHE_CHANNEL and variables.DATABASE_URL.startswith(("postgresql", "postgres://")):
+            share -= 1
+        return max(share, 1)
+
+    @staticmethod
+    def engine_options(url: str) -> dict:
+        options = {
+            "poolclass": InstrumentedQueuePool,
+            "pool_size": DataBasePool.pool_size(),
+            "max_overflow": variables.DB_MAX_OVERFLOW,
+            "pool_timeout": variables.DB_POOL_TIMEOUT,
+            "pool_recycle": variables.DB_POOL_RECYCLE,
+            "pool_pre_ping": variables.DB_POOL_PRE_PING,
+        }
+        if variables.DB_STATEMENT_TIMEOUT_MS and url.startswith("postgresql+asyncpg://"):
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(variables.DB_STATEMENT_TIMEOUT_MS)}}
+        return options
+
     @classmethod
     async def setup(cls, timeout: Optional[float] = None):
-        """Sets up the database engine and pool."""
+        """Sets up the async database engine and the session factory bound to its pool."""
         if cls._engine is None:
-            cls._engine = create_engine(
-                variables.DATABASE_URL, pool_size=20, pool_pre_ping=True, pool_recycle=60
-            )
+            url = get_async_database_url(variables.DATABASE_URL)
+            cls._engine = create_async_engine(url, **cls.engine_options(url))
+            instrument_engine(cls._engine.sync_engine)
             cls._timeout = timeout
-            cls._db_pool = Session(cls._engine)
-            initDB(cls._engine) 
+            cls._session_maker = async_sessionmaker(cls._engine, class_=AsyncSession, expire_on_commit=False)
+            try:
+                await initDB(cls._engine)
+            except Exception:
+                # Leave the pool uninitialized so startup aborts and a later setup() starts clean.
+                await cls._engine.dispose()
+                cls._engine = None
+                cls._session_maker = None
+                raise
+            await cls.warm_up(variables.DB_POOL_WARMUP)
+
+    @classmethod
+    async def warm_up(cls, connections: int):
+        """Opens up to `connections` pooled connections at once so early requests skip connection setup."""
+        connections = min(connections, cls.pool_size())
+        if connections <= 0:
+            return
+        opened = []
+        try:
+            for _ in range(connections):
+                opened.append(await cls._engine.connect())
+        except Exception as e:
+            print(f"Database pool warm-up stopped after {len(opened)} connections: {e}")
+        finally:
+            for conn in opened:
+                await conn.close()
+
+    @classmethod
+    def stats(cls) -> dict:
+        """Current pool occupancy plus checkout wait totals since startup."""
+        stats = {"size": None, "checked_out": None, "checked_in": None, "overflow": None}
+        pool = cls._engine.pool if cls._engine is not None else None
+        if isinstance(pool, AsyncAdaptedQueuePool):
+            # QueuePool.overflow() counts up from -pool_size as connections are opened.
+            stats = {"size": pool.size(), "checked_out": pool.checkedout(), "checked_in": pool.checkedin(), "overflow": max(pool.overflow(), 0)}
+        return {
+            **stats,
+            "checkouts": InstrumentedQueuePool.waits,
+            "wait_seconds": InstrumentedQueuePool.wait_time,
+            "timeouts": InstrumentedQueuePool.timeouts,
+        }
 
     @classmethod
-    async def get_pool(cls) -> Session:
-        """Returns the current database pool session."""
-        if cls._db_pool is None:
+    async def get_pool(cls) -> AsyncIterator[AsyncSession]:
+        """Yields a session checked out from the pool for the lifetime of one request."""
+        if cls._session_maker is None:
             raise UninitializedDatabasePoolError()
-        return cls._db_pool
+        async with cls._session_maker() as session:
+            yield session
+
+    @classmethod
+    def session(cls) -> AsyncSession:
+        """Returns a new session for work that outlives a request, such as a streamed response."""
+        if cls._session_maker is None:
+            raise UninitializedDatabasePoolError()
+        return cls._session_maker()
 
     @classmethod
     async def teardown(cls):
-        """Closes the database pool."""
-        if cls._db_pool is None:
+        """Disposes the engine and closes every pooled connection."""
+        if cls._engine is None:
             raise UninitializedDatabasePoolError()
-        cls._db_pool.close()
-        cls._db_pool = None 
+        await cls._engine.dispose()
+        cls._engine = None
+        cls._session_maker = None
         print("Database pool closed.")
 
-def initDB(_engine):
+
+def get_async_database_url(url: str) -> str:
+    """Maps a plain DATABASE_URL onto its async driver (asyncpg / aiosqlite)."""
+    if url.startswith("postgresql://") or url.startswith("postgres://"):
+        return "postgresql+asyncpg://" + url.split("://", 1)[1]
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url.split("://", 1)[1]
+    return url
+
+
+async def initDB(_engine: AsyncEngine):
+    """Applies pending migrations. Errors propagate: serving requests on a half-migrated schema is worse than not starting."""
     try:
-        SQLModel.metadata.create_all(_engine)
+        version = await run_migrations(_engine)
     except Exception as e:
-        traceback.print_exc()
         print(f"Error in creating/init tables: {e}")
+        raise
+    print(f"Database schema at version {version}.")
+
+
+TABLE_MODELS = {
+    TableNameEnum.ORGANIZER: ORGANIZER,
+    TableNameEnum.ORGANIZER_DETAILS: ORGANIZER_DETAILS,
+    TableNameEnum.ORGANIZER_SESSION: ORGANIZER_SESSION,
+    TableNameEnum.ORGANIZER_META: ORGANIZER_META,
+    TableNameEnum.Event: Event,
+    TableNameEnum.RSVP: RSVP,
+    TableNameEnum.RSVP_SUMMARY: RSVP_SUMMARY,
+}
+
+# Natural keys that bulk writes report conflicts on; they match the unique indexes in DB/models.py.
+CONFLICT_KEYS = {
+    TableNameEnum.Event: ("organizer_name", "event_id"),
+    TableNameEnum.RSVP: ("event_id", "username"),
+}
+
+# Columns that identify the row EVENT_DB.update_attr writes to.
+UPDATE_KEYS = {
+    TableNameEnum.ORGANIZER: ("organizer_name",),
+    TableNameEnum.Event: ("organizer_name", "event_id"),
+    TableNameEnum.RSVP: ("event_id", "username"),
+}
+
+# Columns a list endpoint can be trimmed to with `fields=`.
+LIST_FIELDS = {
+    TableNameEnum.Event: ("event_id", "organizer_name", "title", "description", "budget", "event_date"),
+    TableNameEnum.RSVP: tuple(RSVP.model_fields),
+}
+
+
+def project(statement, model, fields: Optional[List[str]] = None):
+    """Restricts a select(model) to `fields` (plus the primary key), so other columns are never read.
+
+    Unloaded attributes raise on access instead of lazily issuing one query per row.
+    """
+    if not fields:
+        return statement
+    return statement.options(load_only(*(getattr(model, field) for field in fields), raiseload=True))
+
+
+def dialect_insert(db_pool: AsyncSession, model):
+    """Returns the dialect's own insert() so ON CONFLICT clauses are available on Postgres and SQLite."""
+    dialect = db_pool.get_bind().dialect.name
+    if dialect == "postgresql":
+        return pg_insert(model)
+    if dialect == "sqlite":
+        return sqlite_insert(model)
+    return sa_insert(model)
+
+
+@lru_cache(maxsize=None)
+def _field_defaults(model) -> tuple:
+    pk = set(model.__table__.primary_key.columns.keys())
+    return tuple((name, field.default_factory, field.default, name in pk) for name, field in model.model_fields.items())
+
+
+def column_values(model, data: dict) -> dict:
+    """Builds an INSERT value dict for `model` from `data`, filling field defaults without building an ORM object.
+
+    Primary keys left unset are omitted so the database assigns them.
+    """
+    values = {}
+    for name, default_factory, default, is_pk in _field_defaults(model):
+        if name in data:
+            value = data[name]
+        elif default_factory is not None:
+            value = default_factory()
+        else:
+            value = None if default is PydanticUndefined else default
+        if value is None and is_pk:
+            continue
+        values[name] = value
+    return values
 
 
 class EVENT_DB:
@@ -75,7 +286,7 @@ class EVENT_DB:
         pass
 
     @classmethod
-    async def insert(cls, dbclassnam: TableNameEnum, data: dict, db_pool: Session):
+    async def insert(cls, dbclassnam: TableNameEnum, data: dict, db_pool: AsyncSession):
         try:
             if dbclassnam == TableNameEnum.ORGANIZER:
                 data = ORGANIZER(**data)
@@ -93,98 +304,459 @@ class EVENT_DB:
                 return None, False
             
             db_pool.add(data)
-            db_pool.commit()
-            db_pool.refresh(data)
+            if dbclassnam == TableNameEnum.RSVP:
+                await cls.apply_rsvp_tally(db_pool, cls.rsvp_tally_delta({}, data.event_id, data.status, 1))
+            stale = []
+            if dbclassnam == TableNameEnum.Event:
+                # A new event can become the row a cached title lookup should return.
+                stale = EventCache.keys(title=data.title)
+                await EventCache.publish(db_pool, stale)
+            await db_pool.commit()
+            EventCache.invalidate(stale)
+            await db_pool.refresh(data)
 
             return data, True
         except Exception as e:
-            db_pool.rollback()
+            await db_pool.rollback()
             traceback.print_exc()
             return None, False
         
     @classmethod
-    async def get_attr(self, dbClassNam: TableNameEnum, data=None, db_pool: Session = None):
+    async def bulk_insert(cls, dbclassnam: TableNameEnum, rows: List[dict], db_pool: AsyncSession, batch_size: int = 1000) -> Tuple[Optional[int], List[int]]:
+        """Inserts `rows` in executemany batches of `batch_size` and commits once.
+
+        For tables listed in CONFLICT_KEYS, rows whose key already exists (or repeats earlier
+        in `rows`) are skipped with ON CONFLICT DO NOTHING instead of failing the batch.
+        Returns the number of rows inserted and the positions in `rows` that conflicted;
+        the count is None if the whole call failed and was rolled back.
+        """
+        model = TABLE_MODELS.get(dbclassnam)
+        if model is None or not rows:
+            return 0, []
+        try:
+            values = [column_values(model, row) for row in rows]
+
+            # executemany on the Core connection: the statement is compiled once and the driver
+            # batches the parameter sets into multi-row VALUES (SQLAlchemy "insertmanyvalues").
+            conn = await db_pool.connection()
+            keys = CONFLICT_KEYS.get(dbclassnam)
+            inserted, conflicts, tally = 0, [], {}
+            if keys is None:
+                statement = sa_insert(model)
+            else:
+                statement = dialect_insert(db_pool, model).on_conflict_do_nothing(index_elements=list(keys)).returning(*(model.__table__.c[key] for key in keys))
+            for start in range(0, len(values), batch_size):
+                batch = values[start:start + batch_size]
+                if keys is None:
+                    await conn.execute(statement, batch)
+                    inserted += len(batch)
+                    continue
+
+                written = {tuple(row) for row in (await conn.execute(statement, batch)).all()}
+                for position, value in enumerate(batch, start):
+                    key = tuple(value[column] for column in keys)
+                    if key in written:
+                        written.discard(key)
+                        inserted += 1
+                        if dbclassnam == TableNameEnum.RSVP:
+                            cls.rsvp_tally_delta(tally, value["event_id"], value["status"], 1)
+                    else:
+                        conflicts.append(position)
+
+            await cls.apply_rsvp_tally(db_pool, tally)
+            await db_pool.commit()
+            return inserted, conflicts
+        except Exception as e:
+            await db_pool.rollback()
+            traceback.print_exc()
+            return None, []
+
+    @classmethod
+    async def upsert_rsvp(cls, data: dict, db_pool: AsyncSession) -> Optional[Tuple[Optional[RSVP], bool]]:
+        """Creates or re-statuses the RSVP for (event_id, username) with one INSERT ... ON CONFLICT DO UPDATE.
+
+        The update only fires when the status actually changes, so repeating a call is a no-op.
+        Returns (row, created): the written row, or None when nothing changed. Returns None
+        if the statement failed and was rolled back.
+        """
+        try:
+            now = int(time.time())
+            statement = dialect_insert(db_pool, RSVP).values(column_values(RSVP, data))
+            statement = statement.on_conflict_do_update(
+                index_elements=["event_id", "username"],
+                set_={"status": statement.excluded.status, "title": statement.excluded.title, "updated_at": now, "row_version": RSVP.row_version + 1},
+                where=RSVP.status != statement.excluded.status,
+            ).returning(RSVP.id, RSVP.event_id, RSVP.username, RSVP.title, RSVP.status, RSVP.created_at, RSVP.updated_at, RSVP.row_version)
+            conn = await db_pool.connection()
+            row = (await conn.execute(statement)).first()
+            if row is None:
+                await db_pool.commit()
+                return None, False
+
+            # New rows are inserted without updated_at; the conflict branch always sets it.
+            rsvp = RSVP.model_validate(row._mapping)
+            created = rsvp.updated_at is None
+            tally = cls.rsvp_tally_delta({}, rsvp.event_id, rsvp.status, 1)
+            if not created:
+                # Only a changed status reaches the conflict branch, so the previous one is its flip.
+                cls.rsvp_tally_delta(tally, rsvp.event_id, cls.flip_status(rsvp.status), -1)
+            await cls.apply_rsvp_tally(db_pool, tally)
+            await db_pool.commit()
+            return rsvp, created
+        except Exception as e:
+            await db_pool.rollback()
+            traceback.print_exc()
+            return None
+
+    @classmethod
+    async def get_attr(self, dbClassNam: TableNameEnum, data=None, db_pool: AsyncSession = None, fields: Optional[List[str]] = None):
+        """Rows matching `data`; with `fields`, only those columns of Event and RSVP rows are selected."""
         try:
             # print(f"Inside get_attr, class: {dbClassNam}, data: {data}") 
             table = None
 
             if dbClassNam == TableNameEnum.ORGANIZER:
                 statement = select(ORGANIZER).filter(ORGANIZER.organizer_name == data.get("organizer_name"))
-                table = db_pool.exec(statement).all()
+                table = (await db_pool.exec(statement)).all()
             
             elif dbClassNam == TableNameEnum.Event:
                 if "title" in data:
-                    statement = select(Event).filter(Event.title == data.get("title"))
-                    table = db_pool.exec(statement).first() 
+                    statement = project(select(Event), Event, fields).filter(Event.title == data.get("title"))
+                    table = (await db_pool.exec(statement)).first() 
                 elif "organizer_name" in data:
-                    statement = select(Event).filter(Event.organizer_name == data.get("organizer_name"))
-                    table = db_pool.exec(statement).all()
+                    statement = project(select(Event), Event, fields).filter(Event.organizer_name == data.get("organizer_name"))
+                    table = (await db_pool.exec(statement)).all()
             
             elif dbClassNam == TableNameEnum.RSVP:
-                statement = select(RSVP).filter(RSVP.event_id == data.get("event_id"))
+                statement = project(select(RSVP), RSVP, fields).filter(RSVP.event_id == data.get("event_id"))
+                if "username" in data:
+                    statement = statement.filter(RSVP.username == data.get("username"))
                 # print(f"SQL Statement: {str(statement)}")  
-                table = db_pool.exec(statement).all()  
+                table = (await db_pool.exec(statement)).all()  
                 # print(f"Query result for RSVP: {table}") 
             
             return table
 
         except Exception as e:
             print(f"Error executing query: {str(e)}")
-            if isinstance(db_pool, Session):
-                db_pool.rollback()  # Ensure rollback in case of error
+            if isinstance(db_pool, AsyncSession):
+                await db_pool.rollback()  # Ensure rollback in case of error
             return None, False
 
 
-        
+    @staticmethod
+    async def get_event(db_pool: AsyncSession, event_pk: Optional[int] = None, title: Optional[str] = None) -> Optional[Event]:
+        """Event by primary key or by title, served from EventCache and read from the database only on a miss."""
+        event = EventCache.get(event_pk, title)
+        if event is not None:
+            return event
+        statement = select(Event).filter(Event.id == event_pk) if event_pk is not None else select(Event).filter(Event.title == title)
+        event = (await db_pool.exec(statement)).first()
+        if event is not None:
+            EventCache.set(event, title if event_pk is None else None)
+        return event
+
+    @staticmethod
+    def _list_statement(dbClassNam: TableNameEnum, data: dict, fields: Optional[List[str]] = None):
+        """Statement behind the list endpoints: an organizer's events or an event's RSVPs, in id order, projected to `fields`."""
+        if dbClassNam == TableNameEnum.Event:
+            return project(select(Event), Event, fields).filter(Event.organizer_name == data.get("organizer_name")).order_by(Event.id), Event
+        if dbClassNam == TableNameEnum.RSVP:
+            return project(select(RSVP), RSVP, fields).filter(RSVP.event_id == data.get("event_id")).order_by(RSVP.id), RSVP
+        raise ValueError(f"No list query for {dbClassNam}")
+
     @classmethod
-    async def update_attr(self, dbClassNam, data, db_pool):
+    async def get_page(cls, dbClassNam: TableNameEnum, data: dict, db_pool: AsyncSession, after_id: Optional[int] = None, limit: int = 100, fields: Optional[List[str]] = None) -> Tuple[list, Optional[int]]:
+        """Keyset pagination on `id`. Returns one page of rows and the cursor for the next page (None on the last one)."""
         try:
-            table = None
-            if dbClassNam == TableNameEnum.ORGANIZER:
-                organizer_name = data.get("organizer_name")
-                if not organizer_name:
-                    return False
-                org_statement = select(ORGANIZER).filter(ORGANIZER.organizer_name == organizer_name)
-                table = db_pool.exec(org_statement).first()
+            statement, table = cls._list_statement(dbClassNam, data, fields)
+            if after_id is not None:
+                statement = statement.filter(table.id > after_id)
+            rows = (await db_pool.exec(statement.limit(limit + 1))).all()
+            if len(rows) > limit:
+                rows = rows[:limit]
+                return rows, rows[-1].id
+            return rows, None
+        except Exception as e:
+            await db_pool.rollback()
+            traceback.print_exc()
+            return None, None
 
-            elif dbClassNam == TableNameEnum.Event:
-                organizer_name = data.get("organizer_name")
-                if not organizer_name:
-                    return False
-                org_statement = select(Event).filter(Event.organizer_name == organizer_name)
-                table = db_pool.exec(org_statement).first()
+    @classmethod
+    async def get_list_version(cls, dbClassNam: TableNameEnum, data: dict, db_pool: AsyncSession, after_id: Optional[int] = None) -> Optional[Tuple[int, int, int, int]]:
+        """(count, max id, sum of row_version, max of coalesce(updated_at, created_at)) over the rows a list endpoint reads.
 
-            elif dbClassNam == TableNameEnum.RSVP:
-                event_id = data.get("event_id")
-                username = data.get("username")
-                if not event_id or not username:
-                    return False
-                statement = select(RSVP).filter(RSVP.event_id == event_id, RSVP.username == username)
-                table = db_pool.exec(statement).first()
-                print(f"Updated RSVP: {table}") 
-
-            if not table:
-                return False 
-            
-            print(f"Updating RSVP: {table}") 
+        One aggregate over the same index range as the page itself, without loading any row.
+        Inserts and deletes move the count or max id and every update bumps a row_version, so
+        the tuple changes whenever the list does. Returns None if the probe failed.
+        """
+        try:
+            statement, table = cls._list_statement(dbClassNam, data)
+            if after_id is not None:
+                statement = statement.filter(table.id > after_id)
+            stamp = func.coalesce(table.updated_at, table.created_at, 0)
+            statement = select(func.count(table.id), func.max(table.id), func.sum(table.row_version), func.max(stamp)).where(statement.whereclause)
+            count, max_id, versions, last_modified = (await db_pool.exec(statement)).one()
+            return count, max_id or 0, versions or 0, last_modified or 0
+        except Exception as e:
+            await db_pool.rollback()
+            traceback.print_exc()
+            return None
 
-            for key, value in data.items():
-                setattr(table, key, value)
-            
+    @staticmethod
+    async def get_events_by_date(db_pool: AsyncSession, start: int, end: Optional[int] = None, organizer_name: Optional[str] = None, after: Optional[Tuple[int, int]] = None, limit: int = 100) -> Tuple[Optional[list], Optional[Tuple[int, int]]]:
+        """Events with start <= event_date < end, ordered by (event_date, id), one keyset page at a time.
+
+        Scoped to an organizer the range scan runs on ix_event_organizer_name_event_date, otherwise
+        on ix_event_event_date. `after` is the (event_date, id) cursor returned for the previous page.
+        """
+        try:
+            statement = select(Event).filter(Event.event_date >= start)
+            if end is not None:
+                statement = statement.filter(Event.event_date < end)
+            if organizer_name is not None:
+                statement = statement.filter(Event.organizer_name == organizer_name)
+            if after is not None:
+                statement = statement.filter(tuple_(Event.event_date, Event.id) > tuple_(*after))
+            rows = (await db_pool.exec(statement.order_by(Event.event_date, Event.id).limit(limit + 1))).all()
+            if len(rows) > limit:
+                rows = rows[:limit]
+                return rows, (rows[-1].event_date, rows[-1].id)
+            return rows, None
+        except Exception as e:
+            await db_pool.rollback()
+            traceback.print_exc()
+            return None, None
+
+    @staticmethod
+    async def search_events(db_pool: AsyncSession, query: str, organizer_name: Optional[str] = None, offset: int = 0, limit: int = 20) -> Tuple[Optional[list], Optional[int]]:
+        """Events whose title or description match every word of `query`, best match first.
+
+        Runs on the full-text index from DB.search and returns (rows, next_offset) with each
+        row an (Event, rank) pair; next_offset is None on the last page. Raises
+        SearchUnavailableError when the database has no full-text index.
+        """
+        terms = search_terms(query)
+        if not terms:
+            return [], None
+        statement = search_statement(db_pool.get_bind().dialect.name, terms, organizer_name)
+        try:
+            rows = (await db_pool.exec(statement.offset(offset).limit(limit + 1))).all()
+            if len(rows) > limit:
+                return rows[:limit], offset + limit
+            return rows, None
+        except Exception as e:
+            await db_pool.rollback()
+            traceback.print_exc()
+            return None, None
+
+    @classmethod
+    async def stream_attr(cls, dbClassNam: TableNameEnum, data: dict, after_id: Optional[int] = None, chunk_size: int = 500, fields: Optional[List[str]] = None):
+        """Yields rows in id order, fetching `chunk_size` at a time on a session of its own."""
+        statement, table = cls._list_statement(dbClassNam, data, fields)
+        if after_id is not None:
+            statement = statement.filter(table.id > after_id)
+        async with DataBasePool.session() as session:
+            result = await session.stream_scalars(statement.execution_options(yield_per=chunk_size))
+            async for row in result:
+                yield row
+
+    @classmethod
+    async def update_attr(cls, dbClassNam, data, db_pool, expected_row_version: Optional[int] = None):
+        """Updates the row identified by its UPDATE_KEYS columns in `data` with one UPDATE ... RETURNING.
+
+        Only the non-key columns present in `data` are written, and `updated_at` is stamped
+        unless given. With `expected_row_version` the update only applies if the row's
+        row_version still has that value, and StaleUpdateError is raised otherwise.
+        Returns the updated row, None if no row has that key, or False if the update failed.
+        """
+        model, keys = TABLE_MODELS.get(dbClassNam), UPDATE_KEYS.get(dbClassNam)
+        if keys is None or any(data.get(key) is None for key in keys):
+            return False
+        try:
+            now = int(time.time())
+            table = model.__table__
+            key_filter = [table.c[key] == data[key] for key in keys]
+            values = {column: value for column, value in data.items() if column not in keys}
+            values.setdefault("updated_at", now)
+            statement = sa_update(table).where(*key_filter).values(values).returning(*table.c)
+            if expected_row_version is not None:
+                # row_version moves on every write; updated_at only has whole-second granularity.
+                statement = statement.where(table.c.row_version == expected_row_version)
+            if dbClassNam == TableNameEnum.RSVP and "status" in data:
+                # Only a real status change is written, which tells us the previous status for the summary.
+                statement = statement.where(table.c.status != data["status"])
+
+            stale = []
+            if dbClassNam == TableNameEnum.Event:
+                # The event's id is only known after the update; title keys resolve through it (see EventCache).
+                stale = EventCache.keys(title=data.get("title"))
+
+            conn = await db_pool.connection()
+            row = (await conn.execute(statement)).first()
+            if row is None:
+                await db_pool.rollback()
+                current = (await db_pool.exec(select(model).where(*key_filter))).first()
+                if current is None:
+                    return None
+                if expected_row_version is not None and current.row_version != expected_row_version:
+                    raise StaleUpdateError(current.row_version, current.updated_at)
+                return current
+
+            updated = model.model_validate(row._mapping)
+            if dbClassNam == TableNameEnum.RSVP and "status" in data:
+                tally = cls.rsvp_tally_delta({}, updated.event_id, cls.flip_status(updated.status), -1)
+                await cls.apply_rsvp_tally(db_pool, cls.rsvp_tally_delta(tally, updated.event_id, updated.status, 1))
+            if dbClassNam == TableNameEnum.Event:
+                stale = EventCache.keys(updated.id) + stale
+                await EventCache.publish(db_pool, stale)
+
+            await db_pool.commit()
+            EventCache.invalidate(stale)
+            return updated
+
+        except StaleUpdateError:
+            raise
+        except Exception as e:
+            await db_pool.rollback()
+            traceback.print_exc()
+            return False
+
+
+
+
+    @staticmethod
+    def rsvp_tally_delta(tally: dict, event_id: int, rsvp_status, sign: int) -> dict:
+        """Adds +1/-1 for `rsvp_status` on `event_id` to `tally` ({event_id: [accepted, declined]}) and returns it."""
+        counts = tally.setdefault(event_id, [0, 0])
+        counts[0 if rsvpenum(rsvp_status) == rsvpenum.ACCEPTED else 1] += sign
+        return tally
+
+    @staticmethod
+    def flip_status(rsvp_status) -> rsvpenum:
+        """The other rsvpenum member; rsvpenum has two, so a changed RSVP's previous status is this."""
+        return rsvpenum.DECLINED if rsvpenum(rsvp_status) == rsvpenum.ACCEPTED else rsvpenum.ACCEPTED
+
+    @staticmethod
+    async def apply_rsvp_tally(db_pool: AsyncSession, tally: dict):
+        """Adds the deltas in `tally` to RSVP_SUMMARY with an atomic upsert per event; the caller commits."""
+        now = int(time.time())
+        for event_id, (accepted, declined) in tally.items():
+            if not accepted and not declined:
+                continue
+            statement = dialect_insert(db_pool, RSVP_SUMMARY).values(event_id=event_id, accepted=accepted, declined=declined, updated_at=now)
+            statement = statement.on_conflict_do_update(
+                index_elements=["event_id"],
+                set_={
+                    "accepted": RSVP_SUMMARY.accepted + statement.excluded.accepted,
+                    "declined": RSVP_SUMMARY.declined + statement.excluded.declined,
+                    "updated_at": statement.excluded.updated_at,
+                },
+            )
+            await db_pool.exec(statement)
+
+    @staticmethod
+    async def get_rsvp_summary(event_id: int, db_pool: AsyncSession) -> Optional[RSVP_SUMMARY]:
+        try:
+            return await db_pool.get(RSVP_SUMMARY, event_id)
+        except Exception as e:
+            await db_pool.rollback()
+            traceback.print_exc()
+            return None
+
+    @staticmethod
+    async def rebuild_rsvp_summary(db_pool: AsyncSession, event_id: Optional[int] = None) -> Optional[int]:
+        """Recomputes RSVP_SUMMARY from the RSVP table, for one event or all; returns the number of summary rows written."""
+        try:
+            clear = delete(RSVP_SUMMARY)
+            counts = select(
+                RSVP.event_id,
+                func.sum(case((RSVP.status == rsvpenum.ACCEPTED, 1), else_=0)),
+                func.sum(case((RSVP.status == rsvpenum.DECLINED, 1), else_=0)),
+                literal(int(time.time()), Integer),
+            ).group_by(RSVP.event_id)
+            if event_id is not None:
+                clear = clear.where(RSVP_SUMMARY.event_id == event_id)
+                counts = counts.where(RSVP.event_id == event_id)
+
+            await db_pool.exec(clear)
+            result = await db_pool.exec(sa_insert(RSVP_SUMMARY).from_select(["event_id", "accepted", "declined", "updated_at"], counts))
+            await db_pool.commit()
+            return result.rowcount
+        except Exception as e:
+            await db_pool.rollback()
+            traceback.print_exc()
+            return None
 
-            db_pool.commit()
-            return table  
+    @staticmethod
+    async def get_owned_event_ids(event_ids, organizer_name: str, db_pool: AsyncSession) -> set:
+        """Returns the subset of `event_ids` that exist and belong to `organizer_name`."""
+        try:
+            statement = select(Event.id).where(Event.id.in_(list(event_ids)), Event.organizer_name == organizer_name.lower())
+            return set((await db_pool.exec(statement)).all())
+        except Exception as e:
+            await db_pool.rollback()
+            traceback.print_exc()
+            return set()
 
+    @staticmethod
+    async def event_key_taken(organizer_name: str, event_id: int, db_pool: AsyncSession) -> bool:
+        """Whether `organizer_name` already has an event numbered `event_id`."""
+        try:
+            statement = select(Event.id).where(Event.organizer_name == organizer_name.lower(), Event.event_id == event_id).limit(1)
+            return (await db_pool.exec(statement)).first() is not None
         except Exception as e:
-            db_pool.rollback()
+            await db_pool.rollback()
             traceback.print_exc()
             return False
 
+    @staticmethod
+    async def get_event_ids_by_title(organizer_name: str, title: str, db_pool: AsyncSession) -> Optional[List[int]]:
+        """Returns the event_ids of `organizer_name`'s events titled `title`, in order."""
+        try:
+            statement = select(Event.event_id).where(Event.organizer_name == organizer_name.lower(), Event.title == title).order_by(Event.event_id)
+            return list((await db_pool.exec(statement)).all())
+        except Exception as e:
+            await db_pool.rollback()
+            traceback.print_exc()
+            return None
 
+    @staticmethod
+    async def get_organizer_conflicts(organizer_name: str, email: str, contact: str, db_pool: AsyncSession) -> Optional[set]:
+        """Checks name, email and contact against existing organizers in one query; returns the set of fields already taken."""
+        try:
+            statement = select(ORGANIZER.organizer_name, ORGANIZER.email, ORGANIZER.contact).where(
+                or_(ORGANIZER.organizer_name == organizer_name, ORGANIZER.email == email, ORGANIZER.contact == contact)
+            ).limit(3)
+            conflicts = set()
+            for row in (await db_pool.exec(statement)).all():
+                if row.organizer_name == organizer_name:
+                    conflicts.add("organizer_name")
+                if row.email == email:
+                    conflicts.add("email")
+                if row.contact == contact:
+                    conflicts.add("contact")
+            return conflicts
+        except Exception as e:
+            await db_pool.rollback()
+            traceback.print_exc()
+            return None
 
+    @staticmethod
+    async def insert_organizer(data: dict, db_pool: AsyncSession) -> Tuple[Optional[ORGANIZER], bool]:
+        """Inserts an organizer with ON CONFLICT DO NOTHING; returns (None, True) when a unique column was already taken."""
+        try:
+            statement = dialect_insert(db_pool, ORGANIZER).values(column_values(ORGANIZER, data)).on_conflict_do_nothing().returning(ORGANIZER)
+            organizer = (await db_pool.exec(statement)).scalars().first()
+            await db_pool.commit()
+            return organizer, True
+        except Exception as e:
+            await db_pool.rollback()
+            traceback.print_exc()
+            return None, False
 
     @staticmethod
-    async def get_organizer(data: int | str, db_pool: Session):
+    async def get_organizer(data: int | str, db_pool: AsyncSession):
         try:
             if type(data) == int:
                 statement = (select(ORGANIZER.organizer_name, ORGANIZER.name,ORGANIZER.email, ORGANIZER.password, ORGANIZER.contact).where(ORGANIZER.id == data))
@@ -193,11 +765,11 @@ class EVENT_DB:
                     statement = (select(ORGANIZER.organizer_name, ORGANIZER.name, ORGANIZER.email, ORGANIZER.password).where(ORGANIZER.email == data))
                 else:
                     statement = select(ORGANIZER).where(ORGANIZER.organizer_name == data)
-            org = db_pool.exec(statement).first()
+            org = (await db_pool.exec(statement)).first()
             return org
         
         except Exception as e:
-            db_pool.rollback()
+            await db_pool.rollback()
             traceback.print_exc()
             return None
 
@@ -205,29 +777,192 @@ class EVENT_DB:
     async def getOrganizerSession(self, db_pool, session_token):
             try:
                 statement = select(ORGANIZER_SESSION).where(ORGANIZER_SESSION.pk == session_token)
-                org_session = db_pool.exec(statement).first()
+                org_session = (await db_pool.exec(statement)).first()
                 if org_session:
                     return org_session
             except:
                 return None
 
     @classmethod
-    async def delete(self, data, db_pool):
+    async def deleteOrganizerSession(self, db_pool, session_token):
+        """Deletes a session row by token and drops it from the session cache."""
         try:
-            db_pool.delete(data)
-            db_pool.commit()
+            SessionCache.invalidate(session_token)
+            statement = delete(ORGANIZER_SESSION).where(ORGANIZER_SESSION.pk == session_token)
+            await db_pool.exec(statement)
+            await db_pool.commit()
             return True
         except:
-            db_pool.rollback()
+            await db_pool.rollback()
             traceback.print_exc()
             return False
 
+    @classmethod
+    async def delete_expired_sessions(cls, db_pool: AsyncSession, limit: int = 1000) -> int:
+        """Deletes up to `limit` expired sessions, oldest first, walking the expired_at index; returns how many went."""
+        try:
+            expired = select(ORGANIZER_SESSION.pk).where(ORGANIZER_SESSION.expired_at < int(time.time())).order_by(ORGANIZER_SESSION.expired_at).limit(limit)
+            result = await db_pool.exec(delete(ORGANIZER_SESSION).where(ORGANIZER_SESSION.pk.in_(expired)))
+            await db_pool.commit()
+            return result.rowcount
+        except:
+            await db_pool.rollback()
+            traceback.print_exc()
+            return 0
+
+    @classmethod
+    async def insert_session(cls, db_pool: AsyncSession, data: dict, keep: int = 0) -> Optional[ORGANIZER_SESSION]:
+        """Inserts a login session and commits once; returns the session, or None if the insert failed.
+
+        With `keep`, the same transaction first deletes all but the newest `keep - 1` other
+        sessions of the organizer in one DELETE ... RETURNING and drops them from the session cache.
+        """
+        try:
+            evicted = []
+            if keep > 0:
+                stale = (
+                    select(ORGANIZER_SESSION.pk)
+                    .where(ORGANIZER_SESSION.organizer_name == data["organizer_name"], ORGANIZER_SESSION.pk != data["pk"])
+                    .order_by(ORGANIZER_SESSION.created_at.desc(), ORGANIZER_SESSION.expired_at.desc())
+                    .offset(keep - 1)
+                )
+                statement = delete(ORGANIZER_SESSION).where(ORGANIZER_SESSION.pk.in_(stale)).returning(ORGANIZER_SESSION.pk)
+                evicted = (await db_pool.exec(statement)).scalars().all()
+            session = ORGANIZER_SESSION(**data)
+            db_pool.add(session)
+            await db_pool.commit()
+            for session_token in evicted:
+                SessionCache.invalidate(session_token)
+            return session
+        except Exception as e:
+            await db_pool.rollback()
+            traceback.print_exc()
+            return None
+
+    @classmethod
+    async def delete(cls, data, db_pool):
+        try:
+            stale = []
+            if isinstance(data, RSVP):
+                await cls.apply_rsvp_tally(db_pool, cls.rsvp_tally_delta({}, data.event_id, data.status, -1))
+            elif isinstance(data, Event):
+                stale = EventCache.keys(data.id, data.title)
+                await EventCache.publish(db_pool, stale)
+            await db_pool.delete(data)
+            await db_pool.commit()
+            EventCache.invalidate(stale)
+            return True
+        except:
+            await db_pool.rollback()
+            traceback.print_exc()
+            return False
+
+    @staticmethod
+    async def _create_events(db_pool: AsyncSession, conn, rows: List[dict]) -> List[Event]:
+        """Inserts events with ON CONFLICT DO NOTHING; raises EventKeysTakenError naming the event_ids already in use."""
+        if not rows:
+            return []
+        table = Event.__table__
+        statement = dialect_insert(db_pool, table).on_conflict_do_nothing(index_elements=["organizer_name", "event_id"])
+        # Ordered RETURNING would make SQLite fall back to one INSERT per row, so sort by id instead.
+        result = await conn.execute(statement.returning(*table.c), [column_values(Event, row) for row in rows])
+        created = sorted((Event.model_validate(row._mapping) for row in result), key=lambda event: event.id)
+        if len(created) < len(rows):
+            inserted = {event.event_id for event in created}
+            raise EventKeysTakenError([row["event_id"] for row in rows if row["event_id"] not in inserted])
+        return created
+
+    @staticmethod
+    async def _update_events(conn, organizer_name: str, rows: List[dict]) -> Tuple[List[Event], List[int]]:
+        """Updates events by (organizer_name, event_id) with one executemany UPDATE; returns (updated, missing event_ids)."""
+        if not rows:
+            return [], []
+        table = Event.__table__
+        wanted = {row["event_id"] for row in rows}
+        existing = await conn.execute(select(table.c.id, table.c.event_id).where(table.c.organizer_name == organizer_name, table.c.event_id.in_(wanted)))
+        ids = {event_id: pk for pk, event_id in existing}
+
+        now = int(time.time())
+        params, updated, missing = [], [], []
+        for row in rows:
+            pk = ids.get(row["event_id"])
+            if pk is None:
+                missing.append(row["event_id"])
+                continue
+            values = {key: value for key, value in row.items() if key not in ("id", "organizer_name", "event_id")}
+            values["updated_at"] = now
+            params.append({"b_id": pk, **values})
+            updated.append(Event(id=pk, organizer_name=organizer_name, event_id=row["event_id"], **values))
+        if params:
+            await conn.execute(sa_update(table).where(table.c.id == bindparam("b_id")), params)
+        return updated, missing
+
+    @staticmethod
+    async def _delete_events(conn, organizer_name: str, event_ids: Optional[List[int]] = None, title: Optional[str] = None) -> List[Event]:
+        """Deletes an organizer's events together with their RSVPs and RSVP_SUMMARY rows, one DELETE per table."""
+        table = Event.__table__
+        match = [table.c.organizer_name == organizer_name]
+        if event_ids is not None:
+            match.append(table.c.event_id.in_(event_ids))
+        if title is not None:
+            match.append(table.c.title == title)
+        targets = select(table.c.id).where(*match).scalar_subquery()
+        await conn.execute(sa_delete(RSVP.__table__).where(RSVP.__table__.c.event_id.in_(targets)))
+        await conn.execute(sa_delete(RSVP_SUMMARY.__table__).where(RSVP_SUMMARY.__table__.c.event_id.in_(targets)))
+        result = await conn.execute(sa_delete(table).where(*match).returning(*table.c))
+        return [Event.model_validate(row._mapping) for row in result]
+
+    @classmethod
+    async def delete_events(cls, db_pool: AsyncSession, organizer_name: str, event_ids: Optional[List[int]] = None, title: Optional[str] = None) -> Optional[List[Event]]:
+        """Deletes matching events and everything that hangs off them; returns the deleted events, or None on failure."""
+        try:
+            conn = await db_pool.connection()
+            deleted = await cls._delete_events(conn, organizer_name, event_ids, title)
+            stale = [key for event in deleted for key in EventCache.keys(event.id)]
+            await EventCache.publish(db_pool, stale)
+            await db_pool.commit()
+            EventCache.invalidate(stale)
+            return deleted
+        except Exception as e:
+            await db_pool.rollback()
+            traceback.print_exc()
+            return None
+
+    @classmethod
+    async def batch_events(cls, db_pool: AsyncSession, organizer_name: str, create: List[dict], update: List[dict], delete: List[int]) -> Optional[dict]:
+        """Creates, updates and deletes an organizer's events in one transaction using executemany and set-based deletes.
+
+        Returns {"created", "updated", "deleted", "missing"} with the affected events and the
+        event_ids that had nothing to update, or None if the transaction was rolled back. A create
+        whose event_id is already taken rolls the whole batch back with EventKeysTakenError.
+        """
+        try:
+            conn = await db_pool.connection()
+            created = await cls._create_events(db_pool, conn, create)
+            updated, missing = await cls._update_events(conn, organizer_name, update)
+            deleted = await cls._delete_events(conn, organizer_name, delete) if delete else []
+
+            stale = [key for event in created for key in EventCache.keys(title=event.title)]
+            stale += [key for event in updated + deleted for key in EventCache.keys(event.id)]
+            stale += [key for event in updated for key in EventCache.keys(title=event.title)]
+            await EventCache.publish(db_pool, stale)
+            await db_pool.commit()
+            EventCache.invalidate(stale)
+            return {"created": created, "updated": updated, "deleted": deleted, "missing": missing}
+        except EventKeysTakenError:
+            await db_pool.rollback()
+            raise
+        except Exception as e:
+            await db_pool.rollback()
+            traceback.print_exc()
+            return None
+
 
 def authentication_required(func):
     @wraps(func)
     async def wrapper(*args, **kwargs):
         try:
-            db_pool: Optional[Session] = kwargs.get("db_pool", None)
+            db_pool: Optional[AsyncSession] = kwargs.get("db_pool", None)
             request: Request = kwargs.get("request")
 
             if not request:
@@ -236,21 +971,22 @@ def authentication_required(func):
             if not session_token:
                 return send_json_response(message="Authentication token not provided.", status=status.HTTP_403_FORBIDDEN, body={})
 
-            if db_pool:
+            org_session = SessionCache.get(session_token)
+            if org_session:
+                kwargs["request"].state.org = org_session
+            elif db_pool:
                 org_session = await EVENT_DB.getOrganizerSession(db_pool, session_token)
                 if not org_session:
                     return send_json_response(message="Session expired/invalid, please login again", status=status.HTTP_403_FORBIDDEN, body={})
 
                 if int(time.time()) > org_session.expired_at:
-                    statement = delete(ORGANIZER_SESSION).where(ORGANIZER_SESSION.pk == session_token)
-                    db_pool.exec(statement)
-                    db_pool.commit()
                     return send_json_response(message="Session expired/invalid, please login again", status=status.HTTP_403_FORBIDDEN, body={})
+                SessionCache.set(org_session)
                 kwargs["request"].state.org = org_session 
         except Exception as e:
             print("Exception caught at authentication wrapper: ", str(e))
             if db_pool:
-                db_pool.rollback()  
+                await db_pool.rollback()  
             traceback.print_exc()
             return send_json_response(message="Authentication token not provided.", status=status.HTTP_403_FORBIDDEN, body={})
         return await func(*args, **kwargs) 
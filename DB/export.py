@@ -0,0 +1,239 @@
+import asyncio
+import csv
+import os
+import re
+import time
+import traceback
+from importlib.util import find_spec
+from typing import Dict, List, Optional
+
+import orjson
+
+from DB.database import DataBasePool, EVENT_DB
+from DB.models import TableNameEnum
+from extra import variables
+from extra.helper import generate_unique_id
+
+EXPORT_COLUMNS = ("id", "event_id", "username", "title", "status", "created_at", "updated_at")
+MEDIA_TYPES = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+_JOB_ID = re.compile(r"[0-9a-f]{32}")
+
+
+def export_formats() -> List[str]:
+    """CSV always; Parquet when pyarrow is installed (requirements-optional.txt)."""
+    return ["csv", "parquet"] if find_spec("pyarrow") is not None else ["csv"]
+
+
+class _CSVFile:
+    def __init__(self, path: str):
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(EXPORT_COLUMNS)
+
+    def write(self, rows: List[tuple]):
+        self._writer.writerows(rows)
+
+    def close(self):
+        self._file.close()
+
+
+class _ParquetFile:
+    """One row group per chunk, so only the chunk being written is held in memory."""
+
+    def __init__(self, path: str):
+        import pyarrow
+        import pyarrow.parquet
+
+        self._pyarrow = pyarrow
+        self._schema = pyarrow.schema([
+            ("id", pyarrow.int64()),
+            ("event_id", pyarrow.int64()),
+            ("username", pyarrow.string()),
+            ("title", pyarrow.string()),
+            ("status", pyarrow.string()),
+            ("created_at", pyarrow.int64()),
+            ("updated_at", pyarrow.int64()),
+        ])
+        self._writer = pyarrow.parquet.ParquetWriter(path, self._schema, compression="zstd")
+
+    def write(self, rows: List[tuple]):
+        columns = {name: [row[i] for row in rows] for i, name in enumerate(EXPORT_COLUMNS)}
+        self._writer.write_table(self._pyarrow.Table.from_pydict(columns, schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+
+class RSVPExporter:
+    """Background export of an event's RSVPs to a CSV or Parquet file under EXPORT_DIR.
+
+    `submit` records the job and returns at once; a task on the event loop then reads the
+    RSVPs in keyset pages of EXPORT_CHUNK_SIZE, each on a short session of its own, and
+    appends every page to the file from a worker thread. At most EXPORT_MAX_RUNNING exports
+    run at a time per process. Job state is kept next to the file as <job_id>.json, so every
+    worker process can report progress on, and serve, an export another one wrote.
+    """
+
+    _tasks: Dict[str, asyncio.Task] = {}
+    _slots: Optional[asyncio.Semaphore] = None
+    _directory: str = variables.EXPORT_DIR
+    completed: int = 0
+    failed: int = 0
+
+    @classmethod
+    async def start(cls):
+        os.makedirs(cls._directory, exist_ok=True)
+        cls._slots = asyncio.Semaphore(variables.EXPORT_MAX_RUNNING)
+        await asyncio.to_thread(cls.purge)
+
+    @classmethod
+    async def stop(cls):
+        """Cancels unfinished exports; their partial files are removed and the jobs marked cancelled."""
+        tasks = list(cls._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        cls._tasks.clear()
+
+    @classmethod
+    def stats(cls):
+        return {
+            "running": sum(1 for task in cls._tasks.values() if not task.done()),
+            "completed": cls.completed,
+            "failed": cls.failed,
+        }
+
+    @classmethod
+    def _path(cls, job_id: str, suffix: str) -> str:
+        return os.path.join(cls._directory, f"{job_id}.{suffix}")
+
+    @classmethod
+    def file_path(cls, job: dict) -> str:
+        return cls._path(job["job_id"], job["format"])
+
+    @classmethod
+    def _save(cls, job: dict):
+        # Written to a temporary name and renamed, so readers never see a half-written state file.
+        pending = cls._path(job["job_id"], "json.tmp")
+        with open(pending, "wb") as file:
+            file.write(orjson.dumps(job))
+        os.replace(pending, cls._path(job["job_id"], "json"))
+
+    @classmethod
+    async def submit(cls, organizer_name: str, event_id: int, export_format: str) -> dict:
+        if cls._slots is None:
+            await cls.start()
+        job = {
+            "job_id": generate_unique_id(),
+            "organizer_name": organizer_name,
+            "event_id": event_id,
+            "format": export_format,
+            "status": "queued",
+            "rows": 0,
+            "total": None,
+            "bytes": 0,
+            "error": None,
+            "pid": os.getpid(),
+            "created_at": int(time.time()),
+            "finished_at": None,
+        }
+        await asyncio.to_thread(cls._save, job)
+        cls._tasks[job["job_id"]] = asyncio.create_task(cls._run(job), name=f"rsvp-export-{job['job_id']}")
+        return job
+
+    @classmethod
+    def get(cls, job_id: str) -> Optional[dict]:
+        """The job's current state, or None for an unknown or malformed id."""
+        if not _JOB_ID.fullmatch(job_id):
+            return None
+        try:
+            with open(cls._path(job_id, "json"), "rb") as file:
+                job = orjson.loads(file.read())
+        except FileNotFoundError:
+            return None
+        if job["status"] in ("queued", "running") and job_id not in cls._tasks and not _process_alive(job["pid"]):
+            job.update(status="failed", error="The export was interrupted by a server restart")
+        return job
+
+    @classmethod
+    async def _run(cls, job: dict):
+        path = cls.file_path(job)
+        partial = path + ".part"
+        output = None
+        try:
+            async with cls._slots:
+                async with DataBasePool.session() as session:
+                    summary = await EVENT_DB.get_rsvp_summary(job["event_id"], session)
+                job.update(status="running", total=summary.accepted + summary.declined if summary else 0)
+                output = await asyncio.to_thread(_ParquetFile if job["format"] == "parquet" else _CSVFile, partial)
+                after_id = None
+                while True:
+                    async with DataBasePool.session() as session:
+                        rows, after_id = await EVENT_DB.get_page(TableNameEnum.RSVP, {"event_id": job["event_id"]}, session, after_id, variables.EXPORT_CHUNK_SIZE)
+                    if rows is None:
+                        raise RuntimeError("Reading RSVPs failed")
+                    values = [tuple(_export_value(getattr(rsvp, column)) for column in EXPORT_COLUMNS) for rsvp in rows]
+                    job["rows"] += len(values)
+                    await asyncio.to_thread(cls._write_chunk, output, values, job)
+                    if after_id is None:
+                        break
+
+                await asyncio.to_thread(output.close)
+                output = None
+                os.replace(partial, path)
+                job.update(status="done", bytes=os.path.getsize(path), finished_at=int(time.time()))
+                await asyncio.to_thread(cls._save, job)
+                cls.completed += 1
+        except asyncio.CancelledError:
+            job.update(status="cancelled", finished_at=int(time.time()))
+            cls._discard(output, partial, job)
+            raise
+        except Exception as e:
+            cls.failed += 1
+            print(f"Error exporting RSVPs for event {job['event_id']}: {e}")
+            traceback.print_exc()
+            job.update(status="failed", error="Export failed", finished_at=int(time.time()))
+            cls._discard(output, partial, job)
+        finally:
+            cls._tasks.pop(job["job_id"], None)
+
+    @classmethod
+    def _write_chunk(cls, output, values: List[tuple], job: dict):
+        output.write(values)
+        cls._save(job)
+
+    @classmethod
+    def _discard(cls, output, partial: str, job: dict):
+        try:
+            if output is not None:
+                output.close()
+            if os.path.exists(partial):
+                os.remove(partial)
+            cls._save(job)
+        except Exception:
+            traceback.print_exc()
+
+    @classmethod
+    def purge(cls, now: Optional[float] = None) -> int:
+        """Deletes export files and job states older than EXPORT_TTL seconds."""
+        cutoff = (now or time.time()) - variables.EXPORT_TTL
+        removed = 0
+        for entry in os.scandir(cls._directory):
+            if entry.is_file() and _JOB_ID.match(entry.name) and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        return removed
+
+
+def _export_value(value):
+    return value.value if hasattr(value, "value") else value
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
@@ -0,0 +1,132 @@
+import asyncio
+import sys
+import time
+import traceback
+from typing import Awaitable, Callable, Optional
+
+from DB.database import DataBasePool, EVENT_DB
+from DB.export import RSVPExporter
+from extra import variables
+
+
+class PeriodicJob:
+    """Runs an async callable every `interval` seconds on the event loop until stopped; an interval of 0 disables it."""
+
+    def __init__(self, name: str, interval: float, func: Callable[[], Awaitable]):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._run(), name=self.name)
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def run_once(self):
+        try:
+            return await self.func()
+        except Exception as e:
+            print(f"Error in job {self.name}: {e}")
+            traceback.print_exc()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.run_once()
+
+
+async def reconcile_rsvp_summary():
+    """Rebuilds every RSVP_SUMMARY row from the RSVP table."""
+    async with DataBasePool.session() as session:
+        rebuilt = await EVENT_DB.rebuild_rsvp_summary(session)
+    print(f"RSVP summary reconciled for {rebuilt} events.")
+    return rebuilt
+
+
+async def reap_expired_sessions():
+    """Deletes expired ORGANIZER_SESSION rows in batches of SESSION_REAPER_BATCH_SIZE, one commit per batch."""
+    removed = 0
+    async with DataBasePool.session() as session:
+        while True:
+            deleted = await EVENT_DB.delete_expired_sessions(session, variables.SESSION_REAPER_BATCH_SIZE)
+            removed += deleted
+            if deleted < variables.SESSION_REAPER_BATCH_SIZE:
+                break
+            await asyncio.sleep(0)
+    if removed:
+        print(f"Session reaper removed {removed} expired sessions.")
+    return removed
+
+
+async def purge_exports():
+    """Deletes RSVP export files and job states older than EXPORT_TTL seconds."""
+    removed = await asyncio.to_thread(RSVPExporter.purge)
+    if removed:
+        print(f"Export purge removed {removed} expired files.")
+    return removed
+
+
+async def iter_upcoming_events(days: int, batch_size: int = 1000):
+    """Yields every event starting within the next `days` days, soonest first.
+
+    Pages through ix_event_event_date with a keyset cursor, so a reminder job reads only
+    the events in the window, a batch at a time, instead of scanning the table.
+    """
+    now = int(time.time())
+    cursor = None
+    async with DataBasePool.session() as session:
+        while True:
+            events, cursor = await EVENT_DB.get_events_by_date(session, now, now + days * 86400, after=cursor, limit=batch_size)
+            for event in events or []:
+                yield event
+            if cursor is None:
+                break
+
+
+async def count_upcoming_events():
+    """Counts events starting within the next UPCOMING_EVENTS_DAYS days, per organizer."""
+    per_organizer = {}
+    async for event in iter_upcoming_events(variables.UPCOMING_EVENTS_DAYS):
+        per_organizer[event.organizer_name] = per_organizer.get(event.organizer_name, 0) + 1
+    print(f"{sum(per_organizer.values())} events from {len(per_organizer)} organizers start in the next {variables.UPCOMING_EVENTS_DAYS} days.")
+    return per_organizer
+
+
+session_reaper = PeriodicJob("session-reaper", variables.SESSION_REAPER_INTERVAL, reap_expired_sessions)
+rsvp_summary_reconciler = PeriodicJob("rsvp-summary-reconcile", variables.RSVP_SUMMARY_RECONCILE_INTERVAL, reconcile_rsvp_summary)
+export_purger = PeriodicJob("export-purge", variables.EXPORT_PURGE_INTERVAL, purge_exports)
+
+# Interval 0: only run on demand, e.g. from cron as `python -m DB.jobs upcoming`.
+upcoming_events = PeriodicJob("upcoming-events", 0, count_upcoming_events)
+
+JOBS = {
+    "reap-sessions": session_reaper,
+    "reconcile": rsvp_summary_reconciler,
+    "purge-exports": export_purger,
+    "upcoming": upcoming_events,
+}
+
+
+async def _run_from_cli(name: str):
+    await DataBasePool.setup()
+    try:
+        await JOBS[name].run_once()
+    finally:
+        await DataBasePool.teardown()
+
+
+if __name__ == "__main__":
+    # python -m DB.jobs reconcile
+    if len(sys.argv) != 2 or sys.argv[1] not in JOBS:
+        sys.exit(f"usage: python -m DB.jobs {{{','.join(JOBS)}}}")
+    asyncio.run(_run_from_cli(sys.argv[1]))
@@ -0,0 +1,81 @@
+import time
+from sqlalchemy import Column, Integer, MetaData, String, Table, func, insert, inspect, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import SQLModel
+
+from DB.migrations import v0001_baseline, v0002_lookup_indexes, v0003_rsvp_summary, v0004_session_expiry_index, v0005_organizer_unique_contacts, v0006_event_date_indexes, v0007_event_search, v0008_row_version, v0009_unique_event_key
+
+# Ordered list of schema migrations. Each module exposes `version`, `description`
+# and a synchronous `upgrade(conn)`; append new ones here and never edit shipped ones.
+# A migration spells out its own DDL rather than reading DB/models.py, whose later
+# changes would otherwise alter what an already shipped migration does.
+MIGRATIONS = [
+    v0001_baseline,
+    v0002_lookup_indexes,
+    v0003_rsvp_summary,
+    v0004_session_expiry_index,
+    v0005_organizer_unique_contacts,
+    v0006_event_date_indexes,
+    v0007_event_search,
+    v0008_row_version,
+    v0009_unique_event_key,
+]
+
+_version_metadata = MetaData()
+schema_version = Table(
+    "schema_version",
+    _version_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", Integer, nullable=False),
+)
+
+
+def latest_version() -> int:
+    return MIGRATIONS[-1].version
+
+
+def _stamp(conn: Connection, migration):
+    conn.execute(insert(schema_version).values(version=migration.version, description=migration.description, applied_at=int(time.time())))
+
+
+def current_version(conn: Connection):
+    if not inspect(conn).has_table(schema_version.name):
+        return None
+    return conn.execute(select(func.max(schema_version.c.version))).scalar()
+
+
+def migrate(conn: Connection) -> int:
+    """Brings the schema up to the latest version and returns the version it ended on.
+
+    A brand-new database is built straight from the models and stamped with every
+    migration. A database created before migrations existed is treated as the baseline
+    and upgraded from there.
+    """
+    _version_metadata.create_all(conn)
+    current = current_version(conn)
+
+    if current is None:
+        if not inspect(conn).has_table("organizer"):
+            SQLModel.metadata.create_all(conn)
+            for migration in MIGRATIONS:
+                _stamp(conn, migration)
+            return latest_version()
+        v0001_baseline.upgrade(conn)
+        _stamp(conn, v0001_baseline)
+        current = v0001_baseline.version
+
+    for migration in MIGRATIONS:
+        if migration.version > current:
+            print(f"Applying migration {migration.version}: {migration.description}")
+            migration.upgrade(conn)
+            _stamp(conn, migration)
+            current = migration.version
+    return current
+
+
+async def run_migrations(engine: AsyncEngine) -> int:
+    """Runs `migrate` in a single transaction on the async engine."""
+    async with engine.begin() as conn:
+        return await conn.run_sync(migrate)
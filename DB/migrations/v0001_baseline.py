@@ -0,0 +1,75 @@
+from sqlalchemy import Column, Enum, Float, ForeignKey, Integer, MetaData, String, Table
+from sqlalchemy.engine import Connection
+
+version = 1
+description = "baseline tables"
+
+# The tables as they stood before migrations existed. Later changes belong in later
+# migrations, so this stays fixed whatever DB/models.py declares today.
+metadata = MetaData()
+
+Table(
+    "organizer", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("organizer_name", String, nullable=False, unique=True),
+    Column("email", String, nullable=False),
+    Column("contact", String, nullable=False),
+    Column("password", String, nullable=False),
+    Column("name", String),
+    Column("created_at", Integer),
+    Column("updated_at", Integer),
+)
+Table(
+    "organizer_details", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("organizer_name", String, ForeignKey("organizer.organizer_name"), nullable=False),
+    Column("email", String, nullable=False),
+    Column("contact", Integer),
+)
+Table(
+    "organizer_session", metadata,
+    Column("pk", String, primary_key=True),
+    Column("organizer_name", String, ForeignKey("organizer.organizer_name"), nullable=False),
+    Column("ip", String),
+    Column("browser", String),
+    Column("os", String),
+    Column("created_at", Integer, nullable=False),
+    Column("expired_at", Integer, nullable=False),
+)
+Table(
+    "organizer_meta", metadata,
+    Column("pk", Integer, primary_key=True),
+    Column("organizer_name", String, nullable=False),
+    Column("reason", Enum("SIGNUP", "LOGIN", name="organizer_metareasonenum"), nullable=False),
+    Column("ip", String),
+    Column("country", String),
+    Column("os", String),
+    Column("created_at", Integer),
+)
+Table(
+    "event", metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("organizer_name", String, nullable=False),
+    Column("event_id", Integer, nullable=False),
+    Column("title", String, nullable=False),
+    Column("description", String),
+    Column("event_date", Integer, nullable=False),
+    Column("budget", Float, nullable=False),
+    Column("updated_at", Integer),
+    Column("created_at", Integer),
+)
+Table(
+    "rsvp", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("event_id", Integer, ForeignKey("event.id"), nullable=False),
+    Column("username", String, nullable=False),
+    Column("title", String, nullable=False),
+    Column("status", Enum("ACCEPTED", "DECLINED", name="rsvpenum"), nullable=False),
+    Column("created_at", Integer),
+    Column("updated_at", Integer),
+)
+
+
+def upgrade(conn: Connection):
+    """Creates any missing baseline table; existing tables are left untouched."""
+    metadata.create_all(conn, checkfirst=True)
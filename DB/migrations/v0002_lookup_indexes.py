@@ -0,0 +1,29 @@
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+version = 2
+description = "indexes on hot lookup columns, unique (event_id, username) on rsvp"
+
+INDEXES = {
+    "organizer": ["ix_organizer_email"],
+    "organizer_session": ["ix_organizer_session_organizer_name"],
+    "event": ["ix_event_title", "ix_event_organizer_name_event_id"],
+    "rsvp": ["ix_rsvp_username", "ix_rsvp_event_id_username"],
+}
+
+# Migrations 5 and 9 later make ix_organizer_email and ix_event_organizer_name_event_id unique.
+DDL = (
+    "CREATE INDEX IF NOT EXISTS ix_organizer_email ON organizer (email)",
+    "CREATE INDEX IF NOT EXISTS ix_organizer_session_organizer_name ON organizer_session (organizer_name)",
+    "CREATE INDEX IF NOT EXISTS ix_event_title ON event (title)",
+    "CREATE INDEX IF NOT EXISTS ix_event_organizer_name_event_id ON event (organizer_name, event_id)",
+    "CREATE INDEX IF NOT EXISTS ix_rsvp_username ON rsvp (username)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_rsvp_event_id_username ON rsvp (event_id, username)",
+)
+
+
+def upgrade(conn: Connection):
+    # Older rows could hold several RSVPs per user and event; keep the first before enforcing uniqueness.
+    conn.execute(text("DELETE FROM rsvp WHERE id NOT IN (SELECT MIN(id) FROM rsvp GROUP BY event_id, username)"))
+    for statement in DDL:
+        conn.execute(text(statement))
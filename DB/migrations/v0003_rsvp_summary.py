@@ -0,0 +1,26 @@
+import time
+from sqlalchemy import Column, Integer, MetaData, Table, text
+from sqlalchemy.engine import Connection
+
+version = 3
+description = "rsvp_summary counters, backfilled from rsvp"
+
+rsvp_summary = Table(
+    "rsvp_summary", MetaData(),
+    Column("event_id", Integer, primary_key=True, autoincrement=False),
+    Column("accepted", Integer, nullable=False),
+    Column("declined", Integer, nullable=False),
+    Column("updated_at", Integer),
+)
+
+
+def upgrade(conn: Connection):
+    rsvp_summary.create(conn, checkfirst=True)
+    conn.execute(text("DELETE FROM rsvp_summary"))
+    conn.execute(text(
+        "INSERT INTO rsvp_summary (event_id, accepted, declined, updated_at) "
+        "SELECT event_id, "
+        "SUM(CASE WHEN status = 'ACCEPTED' THEN 1 ELSE 0 END), "
+        "SUM(CASE WHEN status = 'DECLINED' THEN 1 ELSE 0 END), "
+        "CAST(:now AS INTEGER) FROM rsvp GROUP BY event_id"
+    ), {"now": int(time.time())})
@@ -0,0 +1,9 @@
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+version = 4
+description = "index on organizer_session.expired_at for the session reaper"
+
+
+def upgrade(conn: Connection):
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_organizer_session_expired_at ON organizer_session (expired_at)"))
@@ -0,0 +1,17 @@
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+version = 5
+description = "unique email and contact on organizer"
+
+
+def upgrade(conn: Connection):
+    for column in ("email", "contact"):
+        duplicates = conn.execute(text(f"SELECT {column} FROM organizer GROUP BY {column} HAVING COUNT(*) > 1 LIMIT 5")).scalars().all()
+        if duplicates:
+            raise RuntimeError(f"Cannot make organizer.{column} unique, duplicated values: {duplicates}. Resolve them and restart.")
+
+    # Replaces the plain email index from migration 2.
+    conn.execute(text("DROP INDEX IF EXISTS ix_organizer_email"))
+    conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ix_organizer_email ON organizer (email)"))
+    conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ix_organizer_contact ON organizer (contact)"))
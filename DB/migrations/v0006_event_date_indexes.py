@@ -0,0 +1,17 @@
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+version = 6
+description = "indexes on event (organizer_name, event_date) and event_date for date range queries"
+
+INDEXES = ("ix_event_organizer_name_event_date", "ix_event_event_date")
+
+DDL = (
+    "CREATE INDEX IF NOT EXISTS ix_event_organizer_name_event_date ON event (organizer_name, event_date)",
+    "CREATE INDEX IF NOT EXISTS ix_event_event_date ON event (event_date)",
+)
+
+
+def upgrade(conn: Connection):
+    for statement in DDL:
+        conn.execute(text(statement))
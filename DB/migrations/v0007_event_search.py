@@ -0,0 +1,30 @@
+from sqlalchemy.engine import Connection
+
+version = 7
+description = "full-text index on event title and description (tsvector + GIN on Postgres, FTS5 on SQLite)"
+
+# The DDL as shipped; DB.search builds the same index on a fresh database.
+POSTGRES_DDL = (
+    "ALTER TABLE event ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B')) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_event_search_vector ON event USING GIN (search_vector)",
+)
+
+SQLITE_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS event_fts USING fts5("
+    "title, description, content='event', content_rowid='id', tokenize='porter unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS event_fts_insert AFTER INSERT ON event BEGIN "
+    "INSERT INTO event_fts (rowid, title, description) VALUES (new.id, new.title, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS event_fts_delete AFTER DELETE ON event BEGIN "
+    "INSERT INTO event_fts (event_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS event_fts_update AFTER UPDATE OF title, description ON event BEGIN "
+    "INSERT INTO event_fts (event_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description); "
+    "INSERT INTO event_fts (rowid, title, description) VALUES (new.id, new.title, new.description); END",
+    "INSERT INTO event_fts (event_fts) VALUES ('rebuild')",
+)
+
+
+def upgrade(conn: Connection):
+    for statement in {"postgresql": POSTGRES_DDL, "sqlite": SQLITE_DDL}.get(conn.dialect.name, ()):
+        conn.exec_driver_sql(statement)
@@ -0,0 +1,11 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+
+version = 8
+description = "row_version counters on event and rsvp for conditional GET validators"
+
+
+def upgrade(conn: Connection):
+    for table in ("event", "rsvp"):
+        if "row_version" not in {column["name"] for column in inspect(conn).get_columns(table)}:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN row_version INTEGER NOT NULL DEFAULT 0"))
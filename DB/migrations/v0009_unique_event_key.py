@@ -0,0 +1,27 @@
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+version = 9
+description = "unique (organizer_name, event_id) on event"
+
+
+def upgrade(conn: Connection):
+    # Events created twice under one event_id keep the oldest row on that id; the later ones are
+    # moved to fresh event_ids past the organizer's highest, so no event or RSVP is lost.
+    duplicates = conn.execute(text("SELECT organizer_name, event_id FROM event GROUP BY organizer_name, event_id HAVING COUNT(*) > 1")).all()
+    next_ids = {}
+    for organizer_name, event_id in duplicates:
+        if organizer_name not in next_ids:
+            next_ids[organizer_name] = conn.execute(text("SELECT MAX(event_id) FROM event WHERE organizer_name = :organizer_name"), {"organizer_name": organizer_name}).scalar() + 1
+        ids = conn.execute(
+            text("SELECT id FROM event WHERE organizer_name = :organizer_name AND event_id = :event_id ORDER BY id"),
+            {"organizer_name": organizer_name, "event_id": event_id},
+        ).scalars().all()
+        for pk in ids[1:]:
+            print(f"Renumbering duplicate event {organizer_name}/{event_id} (id {pk}) to event_id {next_ids[organizer_name]}")
+            conn.execute(text("UPDATE event SET event_id = :event_id, row_version = row_version + 1 WHERE id = :id"), {"event_id": next_ids[organizer_name], "id": pk})
+            next_ids[organizer_name] += 1
+
+    # Replaces the plain index from migration 2.
+    conn.execute(text("DROP INDEX IF EXISTS ix_event_organizer_name_event_id"))
+    conn.execute(text("CREATE UNIQUE INDEX ix_event_organizer_name_event_id ON event (organizer_name, event_id)"))
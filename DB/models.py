@@ -1,9 +1,15 @@
 from enum import Enum
 import time
-from sqlalchemy import Column, Integer, func
+from sqlalchemy import Column, Index, Integer, func, literal_column
 from sqlmodel import SQLModel, Field
 from typing import Optional
 
+
+def row_version_column() -> Column:
+    """Counter bumped by every UPDATE of the row, so a change is visible even within the same updated_at second."""
+    return Column("row_version", Integer, nullable=False, default=0, server_default="0", onupdate=literal_column("row_version") + 1)
+
+
 class TableNameEnum(str, Enum):
     Event = "event"
     RSVP = "rsvp"
@@ -11,6 +17,7 @@ class TableNameEnum(str, Enum):
     ORGANIZER_DETAILS = "organizer_details"
     ORGANIZER_SESSION = "organizer_session"
     ORGANIZER_META = "organizer_meta"
+    RSVP_SUMMARY = "rsvp_summary"
 
 
 class rsvpenum(str, Enum):
@@ -26,8 +33,8 @@ class ORGANIZER_METAReasonEnum(str, Enum):
 class ORGANIZER(SQLModel, table=True):
     id: int = Field(primary_key=True)
     organizer_name: str = Field(unique=True)
-    email: str
-    contact: str
+    email: str = Field(unique=True, index=True)
+    contact: str = Field(unique=True, index=True)
     password: str
     name: Optional[str] = Field(default=None)
     created_at: Optional[int] = Field(default_factory=lambda: int(time.time()))
@@ -43,12 +50,12 @@ class ORGANIZER_DETAILS(SQLModel, table=True):
 
 class ORGANIZER_SESSION(SQLModel, table=True):
     pk: str = Field(primary_key=True)
-    organizer_name: str = Field(foreign_key="organizer.organizer_name")
+    organizer_name: str = Field(foreign_key="organizer.organizer_name", index=True)
     ip: Optional[str]
     browser: Optional[str]
     os: Optional[str]
     created_at: int = Field(default_factory=lambda: int(time.time()))
-    expired_at: int
+    expired_at: int = Field(index=True)
 
 class ORGANIZER_META(SQLModel, table=True):
     pk: int = Field(primary_key=True)
@@ -60,24 +67,40 @@ class ORGANIZER_META(SQLModel, table=True):
     created_at: Optional[int] = Field(default_factory=lambda: int(time.time()))
 
 class Event(SQLModel, table=True):  
+    __table_args__ = (
+        Index("ix_event_organizer_name_event_id", "organizer_name", "event_id", unique=True),
+        Index("ix_event_organizer_name_event_date", "organizer_name", "event_date"),
+    )
+
     id: Optional[int] = Field(default=None, sa_column=Column(Integer, primary_key=True, autoincrement=True))
     organizer_name: str = Field(nullable=False)
     event_id : int
-    title: str 
+    title: str = Field(index=True)
     description: Optional[str] = None
-    event_date: int = Field(default_factory=lambda: int(time.time()))
+    event_date: int = Field(default_factory=lambda: int(time.time()), index=True)
     budget: float
     updated_at: Optional[int] = Field(default=None, sa_column=Column(Integer, onupdate=func.extract("epoch", func.now())))
     created_at: Optional[int] = Field(default_factory=lambda: int(time.time()))
+    row_version: int = Field(default=0, sa_column=row_version_column())
 
 class RSVP(SQLModel, table=True):
+    __table_args__ = (Index("ix_rsvp_event_id_username", "event_id", "username", unique=True),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     event_id: int  = Field(foreign_key="event.id")
-    username: str
+    username: str = Field(index=True)
     title : str
     # email: Optional[str]
     # contact: Optional[int]
     status: rsvpenum = Field(default=rsvpenum.DECLINED)  
     created_at: Optional[int] = Field(default_factory=lambda: int(time.time()))
     updated_at: Optional[int] = Field(default=None,sa_column=Column(Integer, onupdate=func.extract("epoch", func.now())),)
+    row_version: int = Field(default=0, sa_column=row_version_column())
+
 
+class RSVP_SUMMARY(SQLModel, table=True):
+    """Running accepted/declined counts per event, kept in step with RSVP writes."""
+    event_id: int = Field(primary_key=True)
+    accepted: int = Field(default=0)
+    declined: int = Field(default=0)
+    updated_at: Optional[int] = Field(default_factory=lambda: int(time.time()))
@@ -0,0 +1,99 @@
+"""Full-text index over event titles and descriptions.
+
+Postgres keeps a generated `search_vector` tsvector column on event with a GIN index on it;
+SQLite keeps an FTS5 table, event_fts, that reads its content from event and is updated by
+triggers. Either way the database maintains the index on every INSERT, UPDATE and DELETE of
+event, so no write path has to remember to touch it.
+"""
+import re
+from typing import List, Optional
+
+from sqlalchemy import column, event, func, literal_column, table
+from sqlalchemy.engine import Connection
+from sqlmodel import select
+
+from DB.models import Event
+
+SEARCH_CONFIG = "english"
+
+POSTGRES_DDL = (
+    "ALTER TABLE event ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B')) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_event_search_vector ON event USING GIN (search_vector)",
+)
+
+SQLITE_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS event_fts USING fts5("
+    "title, description, content='event', content_rowid='id', tokenize='porter unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS event_fts_insert AFTER INSERT ON event BEGIN "
+    "INSERT INTO event_fts (rowid, title, description) VALUES (new.id, new.title, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS event_fts_delete AFTER DELETE ON event BEGIN "
+    "INSERT INTO event_fts (event_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS event_fts_update AFTER UPDATE OF title, description ON event BEGIN "
+    "INSERT INTO event_fts (event_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description); "
+    "INSERT INTO event_fts (rowid, title, description) VALUES (new.id, new.title, new.description); END",
+    # Indexes whatever rows event already holds.
+    "INSERT INTO event_fts (event_fts) VALUES ('rebuild')",
+)
+
+# Title matches weigh ten times description matches in the SQLite ranking, like the A/B weights above.
+SQLITE_TITLE_WEIGHT, SQLITE_DESCRIPTION_WEIGHT = 10.0, 1.0
+
+event_fts = table("event_fts", column("rowid"))
+
+
+class SearchUnavailableError(Exception):
+    def __init__(self, dialect: str, message="Full-text search is not available on this database"):
+        self.dialect = dialect
+        self.message = message
+        super().__init__(f"{self.message} ({dialect})")
+
+
+def create_search_index(conn: Connection):
+    """Creates the index for the connection's dialect and fills it; safe to run again."""
+    statements = {"postgresql": POSTGRES_DDL, "sqlite": SQLITE_DDL}.get(conn.dialect.name, ())
+    for statement in statements:
+        conn.exec_driver_sql(statement)
+
+
+def drop_search_index(conn: Connection):
+    # The Postgres column, its index and the SQLite triggers go with the event table itself.
+    if conn.dialect.name == "sqlite":
+        conn.exec_driver_sql("DROP TABLE IF EXISTS event_fts")
+
+
+# A fresh database is built with create_all and never runs the migrations, so the index rides along.
+event.listen(Event.__table__, "after_create", lambda target, connection, **kw: create_search_index(connection))
+event.listen(Event.__table__, "before_drop", lambda target, connection, **kw: drop_search_index(connection))
+
+
+def search_terms(query: str) -> List[str]:
+    """Splits free text into plain word tokens, so user input never reaches the query syntax."""
+    return re.findall(r"\w+", query.lower())
+
+
+def search_statement(dialect: str, terms: List[str], organizer_name: Optional[str] = None):
+    """Events matching every term (the last one as a prefix), best match first, as (Event, rank) rows.
+
+    Raises SearchUnavailableError on databases other than Postgres and SQLite.
+    """
+    if dialect == "postgresql":
+        query = func.to_tsquery(SEARCH_CONFIG, " & ".join(terms[:-1] + [terms[-1] + ":*"]))
+        vector = literal_column("event.search_vector")
+        rank = func.ts_rank(vector, query)
+        statement = select(Event, rank.label("rank")).where(vector.op("@@")(query))
+    elif dialect == "sqlite":
+        match = " ".join([f'"{term}"' for term in terms[:-1]] + [f'"{terms[-1]}"*'])
+        # bm25() is lower for better matches.
+        rank = -func.bm25(literal_column("event_fts"), SQLITE_TITLE_WEIGHT, SQLITE_DESCRIPTION_WEIGHT)
+        statement = (
+            select(Event, rank.label("rank"))
+            .join(event_fts, event_fts.c.rowid == Event.id)
+            .where(literal_column("event_fts").op("MATCH")(match))
+        )
+    else:
+        raise SearchUnavailableError(dialect)
+    if organizer_name is not None:
+        statement = statement.where(Event.organizer_name == organizer_name)
+    return statement.order_by(rank.desc(), Event.id)
@@ -0,0 +1,108 @@
+import asyncio
+import traceback
+from typing import Optional
+
+from sqlalchemy import insert
+
+from DB.database import DataBasePool
+from DB.models import ORGANIZER_META
+from extra import variables
+from extra.helper import serialize_row
+
+
+class MetaWriter:
+    """Write-behind queue for ORGANIZER_META audit rows.
+
+    Signup and login hand their audit row to `enqueue` and move on; a background task
+    collects rows until `META_BATCH_SIZE` is reached or `META_FLUSH_INTERVAL` seconds pass,
+    then writes the batch with one multi-row INSERT. The queue is bounded by
+    `META_QUEUE_SIZE`, so callers wait instead of piling up rows when the database lags.
+    """
+
+    _queue: Optional[asyncio.Queue] = None
+    _task: Optional[asyncio.Task] = None
+    _batch_size: int = variables.META_BATCH_SIZE
+    _flush_interval: float = variables.META_FLUSH_INTERVAL
+    written: int = 0
+    batches: int = 0
+    failed: int = 0
+
+    @classmethod
+    async def start(cls):
+        if cls._task is not None:
+            return
+        cls._queue = asyncio.Queue(maxsize=variables.META_QUEUE_SIZE)
+        cls._task = asyncio.create_task(cls._run(), name="organizer-meta-writer")
+
+    @classmethod
+    async def stop(cls):
+        """Flushes everything still queued, then stops the background task."""
+        if cls._task is None:
+            return
+        await cls._queue.put(None)
+        await cls._task
+        cls._task = None
+        cls._queue = None
+        print(f"Organizer meta writer drained ({cls.written} rows written).")
+
+    @classmethod
+    async def enqueue(cls, data: dict):
+        row = serialize_row(ORGANIZER_META(**data), exclude=("pk",))
+        if cls._queue is None:
+            await cls._flush([row])
+            return
+        await cls._queue.put(row)
+
+    @classmethod
+    def stats(cls):
+        return {
+            "queued": cls._queue.qsize() if cls._queue is not None else 0,
+            "written": cls.written,
+            "batches": cls.batches,
+            "failed": cls.failed,
+        }
+
+    @classmethod
+    async def _run(cls):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            row = await cls._queue.get()
+            if row is None:
+                break
+            batch = [row]
+            deadline = loop.time() + cls._flush_interval
+            while len(batch) < cls._batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    row = await asyncio.wait_for(cls._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if row is None:
+                    stopping = True
+                    break
+                batch.append(row)
+            await cls._flush(batch)
+
+        remaining = []
+        while not cls._queue.empty():
+            row = cls._queue.get_nowait()
+            if row is not None:
+                remaining.append(row)
+        for start in range(0, len(remaining), cls._batch_size):
+            await cls._flush(remaining[start:start + cls._batch_size])
+
+    @classmethod
+    async def _flush(cls, rows: list):
+        try:
+            async with DataBasePool.session() as session:
+                await session.execute(insert(ORGANIZER_META).values(rows))
+                await session.commit()
+            cls.written += len(rows)
+            cls.batches += 1
+        except Exception as e:
+            cls.failed += len(rows)
+            print(f"Error writing {len(rows)} organizer meta rows: {e}")
+            traceback.print_exc()
@@ -3,61 +3,71 @@ import time
 import traceback
 import uuid
 from fastapi import Request,status
-from fastapi.encoders import jsonable_encoder
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from DB.database import EVENT_DB
 from DB.models import ORGANIZER_METAReasonEnum, TableNameEnum
-from api.account.helper import security
+from DB.writer import MetaWriter
+from api.account.helper import PasswordHasherBusyError, security
 from api.error.error import error_handler
 from extra import variables
 from extra.datamodel import Login_user, Register_user
-from extra.helper import get_fastApi_req_data, send_json_response
+from extra.helper import get_fastApi_req_data, send_json_response, serialize_row
 
 
 db = EVENT_DB()
 
+SIGNUP_CONFLICT_MESSAGES = {
+    "organizer_name": "Username not available.",
+    "email": "Email already registered, Please try again.",
+    "contact": "Phone number already registered, Please try again.",
+}
+
 class user:
     def __init__(self):
         pass
 
     @staticmethod
-    async def organizer_signup(request:Request , data:Register_user, db_pool:Session):
+    def _signup_conflict_response(conflicts: set):
+        for field, message in SIGNUP_CONFLICT_MESSAGES.items():
+            if field in conflicts:
+                return send_json_response(message=message,status=status.HTTP_403_FORBIDDEN,body={"conflicts": sorted(conflicts)},)
+
+    @staticmethod
+    async def organizer_signup(request:Request , data:Register_user, db_pool:AsyncSession):
 
         organizer_name = data.organizer_name.strip()
         email = data.email.lower()
-        contact = int(''.join(filter(str.isdigit, str(data.contact)))[:10])
+        contact = str(int(''.join(filter(str.isdigit, str(data.contact)))[:10]))
         name = data.name.strip()
 
-        password = security().hash_password(data.password)
-
         if len(organizer_name) == 0:
             return error_handler("Invalid organizer name", 403)
         
         if not organizer_name.isalnum():
             return error_handler("Only alphanumeric characters are allowed", 403)
         try:
-            if await db.get_organizer(organizer_name, db_pool) is not None:
-                return send_json_response(message="Username not available.",status=status.HTTP_403_FORBIDDEN,body={},)
-            
-            if await db.get_organizer(organizer_name, db_pool):
-                return send_json_response(message="Email already registered, Please try again.",status=status.HTTP_403_FORBIDDEN,body={},)
-            
-            if await db.get_organizer(organizer_name, db_pool):
-                return send_json_response(message="Phone number already registered, Please try again.",status=status.HTTP_403_FORBIDDEN,body={},)
-            
+            conflicts = await db.get_organizer_conflicts(organizer_name, email, contact, db_pool)
+            if conflicts is None:
+                return send_json_response(message="Error during organizer signup process, please try again later!",status=status.HTTP_500_INTERNAL_SERVER_ERROR,body={},)
+            if conflicts:
+                return user._signup_conflict_response(conflicts)
+
             apiData = await get_fastApi_req_data(request)
+            password = await security().hash_password_async(data.password)
 
             organizer_data = {"organizer_name":organizer_name, "email":email, "password": password, "name": name, "contact":contact } 
 
-            inserted_user, ok = await db.insert(TableNameEnum.ORGANIZER, organizer_data, db_pool)
+            inserted_user, ok = await db.insert_organizer(organizer_data, db_pool)
 
+            if ok and not inserted_user:
+                # Lost a race with a concurrent signup; the unique constraints kept the first one.
+                conflicts = await db.get_organizer_conflicts(organizer_name, email, contact, db_pool)
+                if conflicts:
+                    return user._signup_conflict_response(conflicts)
             if not ok or not inserted_user:
                 return send_json_response(message="Could not create organizer account, please try again",status=status.HTTP_500_INTERNAL_SERVER_ERROR,body={},)
             
-            serialized_inserted_user = jsonable_encoder(inserted_user)
-            sensitive_fields = ["password","updated_at"]
-            for field in sensitive_fields:
-                serialized_inserted_user.pop(field, None)
+            serialized_inserted_user = serialize_row(inserted_user, exclude=("password", "updated_at", "id"))
         
             organizer_META_DATA = {
                 "organizer_name": organizer_name,
@@ -65,10 +75,11 @@ class user:
                 "browser": apiData.browser,
                 "os": apiData.os,
             }
-            inserted_user_metadata, _ = await db.insert(TableNameEnum.ORGANIZER_META, organizer_META_DATA, db_pool)
-            serialized_inserted_user.pop("id", None)
+            await MetaWriter.enqueue(organizer_META_DATA)
             return send_json_response(message="Organizer account created successfully!",status=status.HTTP_201_CREATED,body=serialized_inserted_user,)
-        
+
+        except PasswordHasherBusyError as e:
+            return send_json_response(message=e.message,status=status.HTTP_503_SERVICE_UNAVAILABLE,body={},)
         except Exception as e:
             print("Exception caught at organizer signup: ", str(e))
             traceback.print_exc()
@@ -86,11 +97,14 @@ class user:
             if not org:
                 return send_json_response(message="Organizer account not found",status=status.HTTP_401_UNAUTHORIZED,body={},)
             
-            serialized_inserted_org = jsonable_encoder(org)
-
-            if not security().verify_password(org.password, data.password):
+            hasher = security()
+            if not await hasher.verify_password_async(org.password, data.password):
                 return send_json_response(message="Invalid credentials",status=status.HTTP_401_UNAUTHORIZED,body={},)
 
+            if hasher.needs_rehash(org.password):
+                new_password = await hasher.hash_password_async(data.password)
+                await db.update_attr(TableNameEnum.ORGANIZER, {"organizer_name": org.organizer_name, "password": new_password}, db_pool)
+
             token = str(uuid.uuid4())
             if data.keepLogin:
                 max_age = 3600 * 24 * 30
@@ -100,15 +114,19 @@ class user:
 
             session_data = {"pk": token,"organizer_name":org.organizer_name, "ip": apiData.ip, "browser": apiData.browser,
                             "os": apiData.os, "created_at": int(time.time()), "expired_at": expiry}
-            session, ok = await db.insert(dbclassnam=TableNameEnum.ORGANIZER_SESSION, data=session_data, db_pool=db_pool)
+            session = await db.insert_session(db_pool, session_data, variables.MAX_SESSIONS_PER_ORGANIZER)
+            if session is None:
+                return send_json_response(message="Login Failed",status=status.HTTP_500_INTERNAL_SERVER_ERROR,body={},)
 
             organizer_META_DATA = {"organizer_name": org.organizer_name, "reason" : ORGANIZER_METAReasonEnum.LOGIN, "os": apiData.os}
-            await db.insert(dbclassnam=TableNameEnum.ORGANIZER_META,  data= organizer_META_DATA, db_pool=db_pool)
+            await MetaWriter.enqueue(organizer_META_DATA)
 
             response = send_json_response(message="Organizer logged in successfully",status=status.HTTP_200_OK,body=[],)
 
             response.set_cookie(key=variables.COOKIE_KEY, value=token, max_age=max_age, httponly=True, secure=True, samesite="None")
             return response
+        except PasswordHasherBusyError as e:
+            return send_json_response(message=e.message,status=status.HTTP_503_SERVICE_UNAVAILABLE,body={},)
         except Exception as e:
             print("Exception caught at organizer Signin: ", str(e))
             traceback.print_exc()
@@ -117,7 +135,7 @@ class user:
     @staticmethod    
     async def organizer_logout(request, db_pool):
         try:
-            await db.delete(request.state.org, db_pool)
+            await db.deleteOrganizerSession(db_pool, request.state.org.pk)
             response = send_json_response(message="logged out successfully",status=status.HTTP_200_OK,body={})
             response.delete_cookie(key=variables.COOKIE_KEY)
             return response
@@ -126,7 +144,7 @@ class user:
             return send_json_response(message="Logout Failed",status=status.HTTP_401_UNAUTHORIZED,body={})
         
     @staticmethod
-    async def check_auth(request: Request, db_pool: Session):
+    async def check_auth(request: Request, db_pool: AsyncSession):
         try:
             cur_org = await db.get_organizer(request.state.org.organizer_name, db_pool=db_pool)
             if cur_org:
@@ -1,18 +1,93 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 import traceback
+from typing import Optional
 from argon2 import PasswordHasher
 import re, time
 import pyotp, pyqrcode
+from extra import variables
+
+
+class PasswordHasherBusyError(Exception):
+    def __init__(self, message="Too many password hashing requests in flight, please try again shortly"):
+        self.message = message
+        super().__init__(self.message)
 
 
 class security:
+    # One hasher and one dedicated pool for the whole process; argon2 releases the GIL,
+    # so hashing on these threads keeps the event loop free for other requests. The pool is
+    # created by start() and torn down by shutdown(), so the app lifespan can run again.
+    _hasher = PasswordHasher(
+        time_cost=variables.ARGON2_TIME_COST,
+        memory_cost=variables.ARGON2_MEMORY_COST,
+        parallelism=variables.ARGON2_PARALLELISM,
+    )
+    _executor: Optional[ThreadPoolExecutor] = None
+    _in_flight = 0
+    _completed = 0
+    _rejected = 0
+
     def hash_password(self, password):
-        return PasswordHasher().hash(password)
+        return self._hasher.hash(password)
 
     def verify_password(self, hash_password, password):
         try:
-            return PasswordHasher().verify(hash_password, password)
+            return self._hasher.verify(hash_password, password)
+        except:
+            return False
+
+    def needs_rehash(self, hash_password):
+        try:
+            return self._hasher.check_needs_rehash(hash_password)
         except:
             return False
+
+    async def hash_password_async(self, password):
+        return await self._run(self.hash_password, password)
+
+    async def verify_password_async(self, hash_password, password):
+        return await self._run(self.verify_password, hash_password, password)
+
+    @classmethod
+    async def _run(cls, fn, *args):
+        """Runs `fn` on the argon2 pool, refusing work once PASSWORD_HASH_MAX_PENDING calls are queued or running."""
+        if cls._in_flight >= variables.PASSWORD_HASH_MAX_PENDING:
+            cls._rejected += 1
+            raise PasswordHasherBusyError()
+        if cls._executor is None:
+            cls.start()
+        cls._in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(cls._executor, fn, *args)
+        finally:
+            cls._in_flight -= 1
+            cls._completed += 1
+
+    @classmethod
+    def stats(cls):
+        workers = variables.PASSWORD_HASH_WORKERS
+        return {
+            "workers": workers,
+            "in_flight": cls._in_flight,
+            "running": min(cls._in_flight, workers),
+            "queued": max(cls._in_flight - workers, 0),
+            "completed": cls._completed,
+            "rejected": cls._rejected,
+        }
+
+    @classmethod
+    def start(cls):
+        if cls._executor is None:
+            cls._executor = ThreadPoolExecutor(max_workers=variables.PASSWORD_HASH_WORKERS, thread_name_prefix="argon2")
+
+    @classmethod
+    def shutdown(cls):
+        """Waits for running hashes, then drops the pool; the next start() or hash builds a new one."""
+        if cls._executor is None:
+            return
+        executor, cls._executor = cls._executor, None
+        executor.shutdown(wait=True)
         
     def is_password_strong(self, password):
         errors = set()
@@ -1,12 +1,15 @@
-from datetime import datetime
+from datetime import datetime, timedelta
+import time
 import traceback
+from typing import List, Optional
 from fastapi import  Request, status
-from fastapi.encoders import jsonable_encoder
-from sqlalchemy.orm import Session
-from DB.database import EVENT_DB
+from sqlmodel.ext.asyncio.session import AsyncSession
+from DB.database import EVENT_DB, LIST_FIELDS, EventKeysTakenError, StaleUpdateError
 from DB.models import Event, TableNameEnum
-from extra.datamodel import EventRequest
-from extra.helper import send_json_response
+from DB.search import SearchUnavailableError
+from extra import variables
+from extra.datamodel import EventBatchRequest, EventRequest
+from extra.helper import FastJSONResponse, is_not_modified, list_validators, parse_fields, send_json_response, send_ndjson_response, send_not_modified, serialize_row
 
 
 db = EVENT_DB
@@ -17,7 +20,7 @@ class EventService:
 
 
     @staticmethod
-    async def save_event(request: Request, data:EventRequest,db_pool: Session):
+    async def save_event(request: Request, data:EventRequest,db_pool: AsyncSession):
         try:
             logged_in_user = request.state.org.organizer_name
             if logged_in_user != data.organizer_name:
@@ -36,10 +39,12 @@ class EventService:
             }
 
             inserted_event, success = await db.insert(TableNameEnum.Event, event_data, db_pool)
+            if not inserted_event and await db.event_key_taken(data.organizer_name, data.event_id, db_pool):
+                return send_json_response(message="An event with this event_id already exists", status=status.HTTP_409_CONFLICT, body={})
             if not inserted_event:
                 return send_json_response(message="Failed to insert event", status=status.HTTP_500_INTERNAL_SERVER_ERROR, body={})
 
-            serialized_inserted_event = jsonable_encoder(inserted_event)
+            serialized_inserted_event = serialize_row(inserted_event)
             return send_json_response(message="event created", status=status.HTTP_200_OK, body=serialized_inserted_event)
 
         except Exception as e:
@@ -47,33 +52,126 @@ class EventService:
             return send_json_response(message="Event not created", status=status.HTTP_404_NOT_FOUND, body={})
 
     @staticmethod
-    async def get_event(request: Request, organizer_name: str, db_pool: Session):
+    def _event_data(event: Event, fields: Optional[List[str]] = None) -> dict:
+        if fields:
+            return {name: getattr(event, name) for name in fields}
+        return {
+            "event_id": event.event_id,
+            "organizer_name": event.organizer_name,
+            "title": event.title,
+            "description": event.description,
+            "budget": event.budget,
+            "event_date": event.event_date
+        }
+
+    @staticmethod
+    async def get_event(request: Request, organizer_name: str, db_pool: AsyncSession, after_id: Optional[int] = None, limit: int = 100, stream: bool = False, fields: Optional[str] = None):
+        """One page of an organizer's events, or all of them as NDJSON; answers 304 while the client's ETag is current.
+
+        `fields` (e.g. "title,event_date") trims every event to those keys, and only those columns are selected.
+        """
         try:
-            events = await db.get_attr(TableNameEnum.Event, {"organizer_name": organizer_name}, db_pool)
+            try:
+                projection = parse_fields(fields, LIST_FIELDS[TableNameEnum.Event])
+            except ValueError as e:
+                return send_json_response(message=str(e), status=status.HTTP_400_BAD_REQUEST, body=[])
+
+            validators = {}
+            version = await db.get_list_version(TableNameEnum.Event, {"organizer_name": organizer_name}, db_pool, after_id)
+            if version is not None and version[0]:
+                validators = list_validators(version, "events", organizer_name, after_id, limit, stream, projection)
+                if is_not_modified(request.headers, validators):
+                    return send_not_modified(validators)
+
+            if stream:
+                # The stream reads on a session of its own; hand this request's connection back first
+                # rather than holding two for as long as the client takes to read.
+                await db_pool.close()
+                events = db.stream_attr(TableNameEnum.Event, {"organizer_name": organizer_name}, after_id, fields=projection)
+                return send_ndjson_response((EventService._event_data(event, projection) async for event in events), headers=validators)
+
+            events, next_after_id = await db.get_page(TableNameEnum.Event, {"organizer_name": organizer_name}, db_pool, after_id, limit, projection)
             if not events:
                 return send_json_response(message="No events found", status=status.HTTP_404_NOT_FOUND, body=[])
-            
-            # Convert all events to the required format
-            events_data = []
-            for event in events:
-                event_data = {
-                    "event_id": event.event_id,
-                    "organizer_name": event.organizer_name,
-                    "title": event.title,
-                    "description": event.description,
-                    "budget": event.budget,
-                    "event_date": event.event_date
-                }
-                events_data.append(event_data)
-            
-            return events_data
+
+            events_data = [EventService._event_data(event, projection) for event in events]
+            response = FastJSONResponse(content=events_data, headers=validators)
+            if next_after_id is not None:
+                response.headers["X-Next-After-Id"] = str(next_after_id)
+            return response
 
         except Exception as e:
             traceback.print_exc()
             return send_json_response(message="Error fetching events", status=status.HTTP_500_INTERNAL_SERVER_ERROR, body=[])
         
     @staticmethod
-    async def update_event(request: Request, data: EventRequest, db_pool: Session):
+    def _parse_cursor(after: Optional[str]):
+        """'<event_date>:<id>' as sent in X-Next-Cursor; raises ValueError on anything else."""
+        if after is None:
+            return None
+        event_date, event_pk = after.split(":")
+        return int(event_date), int(event_pk)
+
+    @staticmethod
+    async def get_events_by_date(request: Request, organizer_name: str, db_pool: AsyncSession, start: int, end: Optional[int], after: Optional[str] = None, limit: int = 100):
+        try:
+            try:
+                cursor = EventService._parse_cursor(after)
+            except ValueError:
+                return send_json_response(message="after must be the X-Next-Cursor value of the previous page", status=status.HTTP_400_BAD_REQUEST, body=[])
+
+            events, next_cursor = await db.get_events_by_date(db_pool, start, end, organizer_name, cursor, limit)
+            if events is None:
+                return send_json_response(message="Error fetching events", status=status.HTTP_500_INTERNAL_SERVER_ERROR, body=[])
+
+            response = FastJSONResponse(content=[EventService._event_data(event) for event in events])
+            if next_cursor is not None:
+                response.headers["X-Next-Cursor"] = f"{next_cursor[0]}:{next_cursor[1]}"
+            return response
+
+        except Exception as e:
+            traceback.print_exc()
+            return send_json_response(message="Error fetching events", status=status.HTTP_500_INTERNAL_SERVER_ERROR, body=[])
+
+    @staticmethod
+    async def get_upcoming_events(request: Request, organizer_name: str, db_pool: AsyncSession, days: Optional[int] = None, after: Optional[str] = None, limit: int = 100):
+        """The organizer's events from now on (or within the next `days` days), soonest first."""
+        now = int(time.time())
+        end = now + days * 86400 if days is not None else None
+        return await EventService.get_events_by_date(request, organizer_name, db_pool, now, end, after, limit)
+
+    @staticmethod
+    async def get_events_in_range(request: Request, organizer_name: str, db_pool: AsyncSession, start: str, end: str, after: Optional[str] = None, limit: int = 100):
+        """The organizer's events dated from `start` through `end` (both d/m/Y, end day included)."""
+        try:
+            start_ts = int(datetime.strptime(start, "%d/%m/%Y").timestamp())
+            end_ts = int((datetime.strptime(end, "%d/%m/%Y") + timedelta(days=1)).timestamp())
+        except ValueError:
+            return send_json_response(message="start and end must be d/m/Y", status=status.HTTP_400_BAD_REQUEST, body=[])
+        return await EventService.get_events_by_date(request, organizer_name, db_pool, start_ts, end_ts, after, limit)
+
+    @staticmethod
+    async def search_events(request: Request, query: str, db_pool: AsyncSession, organizer_name: Optional[str] = None, offset: int = 0, limit: int = 20):
+        """Ranked full-text search over event titles and descriptions, `limit` results from `offset`."""
+        try:
+            results, next_offset = await db.search_events(db_pool, query, organizer_name, offset, limit)
+            if results is None:
+                return send_json_response(message="Error searching events", status=status.HTTP_500_INTERNAL_SERVER_ERROR, body=[])
+
+            response = FastJSONResponse(content=[{**EventService._event_data(event), "rank": rank} for event, rank in results])
+            if next_offset is not None:
+                response.headers["X-Next-Offset"] = str(next_offset)
+            return response
+
+        except SearchUnavailableError as e:
+            return send_json_response(message=e.message, status=status.HTTP_501_NOT_IMPLEMENTED, body=[])
+
+        except Exception as e:
+            traceback.print_exc()
+            return send_json_response(message="Error searching events", status=status.HTTP_500_INTERNAL_SERVER_ERROR, body=[])
+
+    @staticmethod
+    async def update_event(request: Request, data: EventRequest, db_pool: AsyncSession):
         try:
             cur_user = request.state.org
             if not cur_user:
@@ -82,15 +180,11 @@ class EventService:
             if cur_user.organizer_name != data.organizer_name:
                 return send_json_response(message="Username does not match", status=status.HTTP_403_FORBIDDEN, body={})
 
-            existing_event = await db.get_attr(TableNameEnum.Event, {"organizer_name": data.organizer_name}, db_pool)
-            if not existing_event:
-                return send_json_response(message="Event not found", status=status.HTTP_404_NOT_FOUND, body={})
-
             event_date_dt = datetime.strptime(data.event_date, "%d/%m/%Y")
             event_date_timestamp = int(event_date_dt.timestamp())
 
             update_data = {
-                "organizer_name": data.organizer_name,
+                "organizer_name": data.organizer_name.lower(),
                 "event_id": data.event_id,
                 "title": data.title,
                 "description": data.description,
@@ -98,24 +192,19 @@ class EventService:
                 "event_date": event_date_timestamp
             }
 
-            print("Update Data:", update_data)  # Log update data
-
-            ok = await db.update_attr(TableNameEnum.Event, update_data, db_pool)
-            if not ok:
-                return send_json_response(message="Error updating event", status=status.HTTP_500_INTERNAL_SERVER_ERROR, body={})
-
-            print("Update successful:", ok)
-
-            updated_event = await db.get_attr(TableNameEnum.Event, {"organizer_name": data.organizer_name}, db_pool)
-
+            updated_event = await db.update_attr(TableNameEnum.Event, update_data, db_pool, data.expected_row_version)
+            if updated_event is None:
+                return send_json_response(message="Event not found", status=status.HTTP_404_NOT_FOUND, body={})
             if not updated_event:
-                print("Updated event not found.")  # Log if the updated event isn't found
-                return send_json_response(message="Updated event not found", status=status.HTTP_500_INTERNAL_SERVER_ERROR, body={})
+                return send_json_response(message="Error updating event", status=status.HTTP_500_INTERNAL_SERVER_ERROR, body={})
 
-            serialized_updated_event = jsonable_encoder(updated_event)
+            serialized_updated_event = [serialize_row(updated_event)]
 
             return send_json_response(message="Updated", status=status.HTTP_200_OK, body=serialized_updated_event)
 
+        except StaleUpdateError as e:
+            return send_json_response(message=e.message, status=status.HTTP_409_CONFLICT, body={"row_version": e.current_row_version, "updated_at": e.current_updated_at})
+
         except Exception as e:
             traceback.print_exc()
             return send_json_response(message="Error updating event", status=status.HTTP_500_INTERNAL_SERVER_ERROR, body={})
@@ -123,22 +212,31 @@ class EventService:
 
 
     @staticmethod
-    async def delete_event(request: Request, organizer_name: str, title: str, db_pool: Session):
+    async def delete_event(request: Request, organizer_name: str, db_pool: AsyncSession, title: Optional[str] = None, event_id: Optional[int] = None):
+        """Deletes one event, by event_id or by a title that names exactly one of the organizer's events."""
         try:
             cur_user = request.state.org
-            if not cur_user != organizer_name:
+            if cur_user.organizer_name != organizer_name:
                 return send_json_response(message="username doesnot match", status=status.HTTP_400_BAD_REQUEST, body={})
-            
-            events = await db.get_attr(TableNameEnum.Event, {"organizer_name": organizer_name, "title": title}, db_pool)
-
-            if not events:
-                return send_json_response(message="Event not found", status=status.HTTP_404_NOT_FOUND, body={})
 
-            # event = events[0] 
-
-            deletion_result = await db.delete(events, db_pool)
-            if not deletion_result:
+            if event_id is None:
+                if title is None:
+                    return send_json_response(message="event_id or title is required", status=status.HTTP_400_BAD_REQUEST, body={})
+                event_ids = await db.get_event_ids_by_title(organizer_name, title, db_pool)
+                if event_ids is None:
+                    return send_json_response(message="Error deleting event", status=status.HTTP_500_INTERNAL_SERVER_ERROR, body={})
+                if not event_ids:
+                    return send_json_response(message="Event not found", status=status.HTTP_404_NOT_FOUND, body={})
+                if len(event_ids) > 1:
+                    return send_json_response(message="Several events have this title, delete by event_id", status=status.HTTP_409_CONFLICT, body={"event_ids": event_ids})
+                event_id = event_ids[0]
+
+            # Removes the event's RSVPs and summary row too, with one DELETE per table.
+            deleted = await db.delete_events(db_pool, organizer_name.lower(), event_ids=[event_id], title=title)
+            if deleted is None:
                 return send_json_response(message="Error deleting event", status=status.HTTP_500_INTERNAL_SERVER_ERROR, body={})
+            if not deleted:
+                return send_json_response(message="Event not found", status=status.HTTP_404_NOT_FOUND, body={})
 
             return send_json_response(message="Event deleted", status=status.HTTP_200_OK, body={})
 
@@ -146,3 +244,64 @@ class EventService:
             traceback.print_exc()
             return send_json_response(message="Error deleting event", status=status.HTTP_500_INTERNAL_SERVER_ERROR, body={})
 
+
+    @staticmethod
+    def _event_values(data: EventRequest) -> dict:
+        return {
+            "event_id": data.event_id,
+            "organizer_name": data.organizer_name.lower(),
+            "title": data.title,
+            "description": data.description,
+            "budget": data.budget,
+            "event_date": int(datetime.strptime(data.event_date, "%d/%m/%Y").timestamp()),
+        }
+
+    @staticmethod
+    async def batch_events(request: Request, data: EventBatchRequest, db_pool: AsyncSession):
+        """Create, update and delete many of the organizer's events in a single transaction."""
+        try:
+            organizer_name = request.state.org.organizer_name
+            total = len(data.create) + len(data.update) + len(data.delete)
+            if total > variables.EVENT_BATCH_LIMIT:
+                return send_json_response(message=f"At most {variables.EVENT_BATCH_LIMIT} events per batch", status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, body={})
+
+            errors = []
+            seen = set()
+            for section in ("create", "update", "delete"):
+                for position, item in enumerate(getattr(data, section)):
+                    event_id = item if section == "delete" else item.event_id
+                    if event_id in seen:
+                        errors.append({"section": section, "position": position, "error": "event_id repeated in batch"})
+                    seen.add(event_id)
+
+            values = {"create": [], "update": []}
+            for section in ("create", "update"):
+                for position, item in enumerate(getattr(data, section)):
+                    if item.organizer_name != organizer_name:
+                        errors.append({"section": section, "position": position, "error": "organizer name invalid"})
+                        continue
+                    try:
+                        values[section].append(EventService._event_values(item))
+                    except ValueError:
+                        errors.append({"section": section, "position": position, "error": "event_date must be d/m/Y"})
+            if errors:
+                return send_json_response(message="Batch rejected", status=status.HTTP_400_BAD_REQUEST, body={"errors": errors})
+
+            result = await db.batch_events(db_pool, organizer_name.lower(), values["create"], values["update"], data.delete)
+            if result is None:
+                return send_json_response(message="Error applying event batch", status=status.HTTP_500_INTERNAL_SERVER_ERROR, body={})
+
+            body = {
+                "created": [serialize_row(event) for event in result["created"]],
+                "updated": [event.event_id for event in result["updated"]],
+                "deleted": [event.event_id for event in result["deleted"]],
+                "missing": result["missing"],
+            }
+            return send_json_response(message="Batch applied", status=status.HTTP_200_OK, body=body)
+
+        except EventKeysTakenError as e:
+            return send_json_response(message=e.message, status=status.HTTP_409_CONFLICT, body={"event_ids": e.event_ids})
+
+        except Exception as e:
+            traceback.print_exc()
+            return send_json_response(message="Error applying event batch", status=status.HTTP_500_INTERNAL_SERVER_ERROR, body={})
@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends, Request
+from typing import Optional
+from fastapi import APIRouter, Depends, Query, Request
 from DB.database import DataBasePool, authentication_required
 from DB.models import Event
-from sqlalchemy.orm import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from api.event import EventService
-from extra.datamodel import EventRequest
+from extra.datamodel import EventBatchRequest, EventRequest
 
 
 router = APIRouter(prefix="/events", tags=["Events"])
@@ -14,20 +15,40 @@ event = EventService()
 
 @router.post("/create_event")
 @authentication_required
-async def create_event(request: Request,data:EventRequest,db_pool: Session = Depends(DataBasePool.get_pool),):
+async def create_event(request: Request,data:EventRequest,db_pool: AsyncSession = Depends(DataBasePool.get_pool),):
     return await event.save_event(request,data,db_pool)
 
 @router.get("/get_event")
 @authentication_required
-async def get_event(request: Request, username:str,db_pool: Session = Depends(DataBasePool.get_pool),):
-    return await event.get_event(request,username, db_pool)
+async def get_event(request: Request, username:str, after_id: Optional[int] = None, limit: int = Query(100, ge=1, le=1000), stream: bool = False, fields: Optional[str] = None, db_pool: AsyncSession = Depends(DataBasePool.get_pool),):
+    return await event.get_event(request,username, db_pool, after_id, limit, stream, fields)
+
+@router.get("/upcoming")
+@authentication_required
+async def get_upcoming_events(request: Request, username: str, days: Optional[int] = Query(None, ge=1), after: Optional[str] = None, limit: int = Query(100, ge=1, le=1000), db_pool: AsyncSession = Depends(DataBasePool.get_pool),):
+    return await event.get_upcoming_events(request, username, db_pool, days, after, limit)
+
+@router.get("/range")
+@authentication_required
+async def get_events_in_range(request: Request, username: str, start: str, end: str, after: Optional[str] = None, limit: int = Query(100, ge=1, le=1000), db_pool: AsyncSession = Depends(DataBasePool.get_pool),):
+    return await event.get_events_in_range(request, username, db_pool, start, end, after, limit)
+
+@router.get("/search")
+@authentication_required
+async def search_events(request: Request, q: str = Query(..., min_length=1, max_length=200), username: Optional[str] = None, offset: int = Query(0, ge=0), limit: int = Query(20, ge=1, le=100), db_pool: AsyncSession = Depends(DataBasePool.get_pool),):
+    return await event.search_events(request, q, db_pool, username, offset, limit)
 
 @router.post("/update_event")
 @authentication_required
-async def update_event(request: Request,data:EventRequest,db_pool: Session = Depends(DataBasePool.get_pool),):
+async def update_event(request: Request,data:EventRequest,db_pool: AsyncSession = Depends(DataBasePool.get_pool),):
     return await event.update_event(request,data,db_pool)
 
 @router.delete("/delete_event")
 @authentication_required
-async def delete_event(request: Request,organizer_name:str,title:str,db_pool: Session = Depends(DataBasePool.get_pool),):
-    return await event.delete_event(request,organizer_name, title,db_pool)
+async def delete_event(request: Request,organizer_name:str,title:Optional[str] = None,event_id:Optional[int] = None,db_pool: AsyncSession = Depends(DataBasePool.get_pool),):
+    return await event.delete_event(request,organizer_name,db_pool,title,event_id)
+
+@router.post("/batch")
+@authentication_required
+async def batch_events(request: Request, data: EventBatchRequest, db_pool: AsyncSession = Depends(DataBasePool.get_pool),):
+    return await event.batch_events(request, data, db_pool)
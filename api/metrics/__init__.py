@@ -0,0 +1 @@
+from .metricsApi import *
\ No newline at end of file
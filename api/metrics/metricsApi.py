@@ -0,0 +1,27 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from DB.cache import EventCache, IdempotencyCache, SessionCache
+from DB.database import DataBasePool
+from DB.export import RSVPExporter
+from DB.writer import MetaWriter
+from api.account.helper import security
+from extra.compression import compression_stats
+from extra.helper import user_agent_cache_stats
+from extra.metrics import register_gauges, render_metrics
+
+metricsRouter = APIRouter(tags=["Metrics"])
+
+register_gauges("db_pool", "Connection pool occupancy and checkout waits for this worker.", DataBasePool.stats)
+register_gauges("session_cache", "Organizer session cache hits and misses.", lambda: {"hits": SessionCache.hits, "misses": SessionCache.misses})
+register_gauges("event_cache", "Event lookup cache hits and misses.", lambda: {"hits": EventCache.hits, "misses": EventCache.misses})
+register_gauges("idempotency_cache", "Upsert responses replayed for a repeated Idempotency-Key.", lambda: {"replays": IdempotencyCache.replays})
+register_gauges("password_hash_pool", "Argon2 worker pool load.", security.stats)
+register_gauges("organizer_meta_writer", "Write-behind queue for ORGANIZER_META rows.", MetaWriter.stats)
+register_gauges("rsvp_exports", "Background RSVP exports in this worker.", RSVPExporter.stats)
+register_gauges("user_agent_cache", "Memoized user-agent parsing.", user_agent_cache_stats)
+register_gauges("response_compression", "Compressed responses and their body bytes before and after compression.", compression_stats)
+
+
+@metricsRouter.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
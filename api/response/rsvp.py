@@ -1,11 +1,19 @@
 import time
 import traceback
-from sqlmodel import Session, select
-from DB.database import EVENT_DB
+from typing import List, Optional, Tuple
+import orjson
+from pydantic import ValidationError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from DB.cache import IdempotencyCache
+from DB.database import EVENT_DB, LIST_FIELDS, StaleUpdateError
+from DB.export import MEDIA_TYPES, RSVPExporter, export_formats
 from DB.models import RSVP, Event, TableNameEnum
+from extra import variables
 from extra.datamodel import RSVPSubmit
-from extra.helper import send_json_response
+from extra.helper import FastJSONResponse, is_not_modified, iter_request_csv, iter_request_json_array, iter_request_lines, list_validators, parse_fields, send_json_response, send_ndjson_response, send_not_modified, serialize_row
 from fastapi import Request, status
+from fastapi.responses import FileResponse
 
 
 db = EVENT_DB()
@@ -15,31 +23,29 @@ class RSVPService:
         pass
 
     @staticmethod
-    async def submit_rsvp(request, data: RSVPSubmit, db_pool: Session):
+    async def submit_rsvp(request, data: RSVPSubmit, db_pool: AsyncSession):
         try:
-            event = await db.get_attr(TableNameEnum.Event, {"title": data.title}, db_pool)
+            event = await db.get_event(db_pool, title=data.title)
             if not event:
                 return send_json_response(message="Event not found", status=status.HTTP_404_NOT_FOUND, body={})
 
-            existing_rsvp = await db.get_attr(TableNameEnum.RSVP, {"username": data.username, "event_id": data.event_id}, db_pool)
-            
-            if existing_rsvp:
+            new_rsvp = {
+                "event_id": data.event_id,
+                "title": data.title,
+                "username": data.username,
+                "status": data.status,
+                "created_at": int(time.time()),
+            }
+
+            # ON CONFLICT DO NOTHING on (event_id, username) replaces the separate "already submitted" lookup.
+            inserted, conflicts = await db.bulk_insert(TableNameEnum.RSVP, [new_rsvp], db_pool)
+            if conflicts:
                 return send_json_response(
                     message="You have already submitted an RSVP. Please use the update endpoint to modify your response.",
                     status=status.HTTP_400_BAD_REQUEST,
                     body={},
                 )
-
-            new_rsvp = RSVP(
-                event_id=data.event_id,
-                title=data.title,
-                username=data.username,
-                status=data.status,
-                created_at=int(time.time()),
-            )
-
-            success = await db.insert(TableNameEnum.RSVP, new_rsvp.dict(), db_pool)
-            if not success:
+            if not inserted:
                 return send_json_response(message="Failed to submit RSVP", status=status.HTTP_500_INTERNAL_SERVER_ERROR, body={})
 
             return send_json_response(message="RSVP submitted successfully", status=status.HTTP_200_OK, body={})
@@ -50,14 +56,75 @@ class RSVPService:
 
 
     @staticmethod
-    async def get_rsvp_responses(request: Request, event_id: int, db_pool: Session):
-        """Fetch all RSVP responses for an event."""
+    async def upsert_rsvp(request: Request, data: RSVPSubmit, db_pool: AsyncSession):
+        """Create an RSVP or change its status in one statement. With an Idempotency-Key header, a retry replays the first response."""
         try:
-            results = await db.get_attr(TableNameEnum.RSVP, {"event_id": event_id}, db_pool)
+            key = request.headers.get("idempotency-key")
+            fingerprint = orjson.dumps(data.model_dump(mode="json"), option=orjson.OPT_SORT_KEYS).decode()
+            if key:
+                previous = IdempotencyCache.get("rsvp-upsert", key)
+                if previous is not None:
+                    if previous["fingerprint"] != fingerprint:
+                        return send_json_response(message="Idempotency-Key was already used for a different request", status=status.HTTP_422_UNPROCESSABLE_ENTITY, body={})
+                    response = send_json_response(message=previous["message"], status=previous["status"], body=previous["body"])
+                    response.headers["Idempotent-Replayed"] = "true"
+                    return response
+
+            event = await db.get_event(db_pool, event_pk=data.event_id)
+            if not event:
+                return send_json_response(message="Event not found", status=status.HTTP_404_NOT_FOUND, body={})
+
+            result = await db.upsert_rsvp({"event_id": data.event_id, "title": data.title, "username": data.username, "status": data.status}, db_pool)
+            if result is None:
+                return send_json_response(message="Failed to save RSVP", status=status.HTTP_500_INTERNAL_SERVER_ERROR, body={})
+
+            rsvp, created = result
+            if rsvp is None:
+                message = "RSVP unchanged"
+                body = {"event_id": data.event_id, "username": data.username, "status": data.status.value, "created": False, "changed": False}
+            else:
+                message = "RSVP submitted successfully" if created else "RSVP updated successfully"
+                body = {**serialize_row(rsvp), "created": created, "changed": True}
+
+            if key:
+                IdempotencyCache.set("rsvp-upsert", key, fingerprint, status.HTTP_200_OK, message, body)
+            return send_json_response(message=message, status=status.HTTP_200_OK, body=body)
+
+        except Exception as e:
+            traceback.print_exc()
+            return send_json_response(message="Error saving RSVP", status=status.HTTP_500_INTERNAL_SERVER_ERROR, body={})
+
+    @staticmethod
+    async def get_rsvp_responses(request: Request, event_id: int, db_pool: AsyncSession, after_id: Optional[int] = None, limit: int = 100, stream: bool = False, fields: Optional[str] = None):
+        """Fetch one page of RSVP responses for an event, or stream all of them as NDJSON; answers 304 while the client's ETag is current.
+
+        `fields` (e.g. "username,status") trims every response to those keys, and only those columns are selected.
+        """
+        try:
+            try:
+                projection = parse_fields(fields, LIST_FIELDS[TableNameEnum.RSVP])
+            except ValueError as e:
+                return send_json_response(message=str(e), status=status.HTTP_400_BAD_REQUEST, body={})
+
+            validators = {}
+            version = await db.get_list_version(TableNameEnum.RSVP, {"event_id": event_id}, db_pool, after_id)
+            if version is not None and version[0]:
+                validators = list_validators(version, "rsvps", event_id, after_id, limit, stream, projection)
+                if is_not_modified(request.headers, validators):
+                    return send_not_modified(validators)
+
+            if stream:
+                # The stream reads on a session of its own; hand this request's connection back first
+                # rather than holding two for as long as the client takes to read.
+                await db_pool.close()
+                results = db.stream_attr(TableNameEnum.RSVP, {"event_id": event_id}, after_id, fields=projection)
+                return send_ndjson_response((serialize_row(rsvp, fields=projection) async for rsvp in results), headers=validators)
+
+            results, next_after_id = await db.get_page(TableNameEnum.RSVP, {"event_id": event_id}, db_pool, after_id, limit, projection)
             if not results:
                 return send_json_response(message="No RSVPs found for this event", status=status.HTTP_404_NOT_FOUND, body={})
 
-            return {"event_id": event_id, "responses": [rsvp.dict() for rsvp in results if rsvp is not None]}
+            return FastJSONResponse(content={"event_id": event_id, "responses": [serialize_row(rsvp, fields=projection) for rsvp in results], "next_after_id": next_after_id}, headers=validators)
         
         except Exception as e:
             traceback.print_exc()
@@ -66,12 +133,73 @@ class RSVPService:
 
 
     @staticmethod
-    async def update_rsvp(data: RSVPSubmit, db_pool: Session):
+    def _export_status(job: dict) -> dict:
+        body = {key: job[key] for key in ("job_id", "event_id", "format", "status", "rows", "total", "bytes", "error", "created_at", "finished_at")}
+        body["progress"] = round(job["rows"] / job["total"], 4) if job["total"] else (1.0 if job["status"] == "done" else 0.0)
+        body["status_url"] = f"/rsvp/export/{job['job_id']}"
+        body["download_url"] = f"/rsvp/export/{job['job_id']}/download"
+        return body
+
+    @staticmethod
+    async def start_export(request: Request, event_id: int, export_format: str, db_pool: AsyncSession):
+        """Queues a background export of the event's RSVPs and answers 202 with the job to poll."""
         try:
-            rsvp = await db.get_attr(TableNameEnum.RSVP, {"event_id": data.event_id, "username": data.username}, db_pool)
-            if not rsvp:
-                return send_json_response(message="RSVP not found", status=status.HTTP_404_NOT_FOUND, body={})
+            if export_format not in export_formats():
+                return send_json_response(message=f"format must be one of {', '.join(export_formats())}", status=status.HTTP_400_BAD_REQUEST, body={})
+
+            organizer_name = request.state.org.organizer_name
+            if not await db.get_owned_event_ids([event_id], organizer_name, db_pool):
+                return send_json_response(message="Event not found", status=status.HTTP_404_NOT_FOUND, body={})
+
+            job = await RSVPExporter.submit(organizer_name, event_id, export_format)
+            return send_json_response(message="Export started", status=status.HTTP_202_ACCEPTED, body=RSVPService._export_status(job))
+
+        except Exception as e:
+            traceback.print_exc()
+            return send_json_response(message="Error starting export", status=status.HTTP_500_INTERNAL_SERVER_ERROR, body={})
 
+    @staticmethod
+    def _owned_export(request: Request, job_id: str) -> Optional[dict]:
+        job = RSVPExporter.get(job_id)
+        if job is None or job["organizer_name"] != request.state.org.organizer_name:
+            return None
+        return job
+
+    @staticmethod
+    async def get_export(request: Request, job_id: str):
+        job = RSVPService._owned_export(request, job_id)
+        if job is None:
+            return send_json_response(message="Export not found", status=status.HTTP_404_NOT_FOUND, body={})
+        return send_json_response(message=f"Export {job['status']}", status=status.HTTP_200_OK, body=RSVPService._export_status(job))
+
+    @staticmethod
+    async def download_export(request: Request, job_id: str):
+        """Serves a finished export from disk; FileResponse answers Range requests with 206 partial content."""
+        job = RSVPService._owned_export(request, job_id)
+        if job is None:
+            return send_json_response(message="Export not found", status=status.HTTP_404_NOT_FOUND, body={})
+        if job["status"] != "done":
+            return send_json_response(message=f"Export {job['status']}", status=status.HTTP_409_CONFLICT, body=RSVPService._export_status(job))
+        filename = f"rsvp-event-{job['event_id']}.{job['format']}"
+        return FileResponse(RSVPExporter.file_path(job), media_type=MEDIA_TYPES[job["format"]], filename=filename)
+
+    @staticmethod
+    async def get_rsvp_summary(request: Request, event_id: int, db_pool: AsyncSession):
+        """Accepted/declined totals for an event, read from the maintained RSVP_SUMMARY row."""
+        try:
+            summary = await db.get_rsvp_summary(event_id, db_pool)
+            accepted = summary.accepted if summary else 0
+            declined = summary.declined if summary else 0
+            body = {"event_id": event_id, "accepted": accepted, "declined": declined, "total": accepted + declined, "updated_at": summary.updated_at if summary else None}
+            return send_json_response(message="RSVP summary", status=status.HTTP_200_OK, body=body)
+
+        except Exception as e:
+            traceback.print_exc()
+            return send_json_response(message="Error fetching RSVP summary", status=status.HTTP_500_INTERNAL_SERVER_ERROR, body={})
+
+    @staticmethod
+    async def update_rsvp(data: RSVPSubmit, db_pool: AsyncSession):
+        try:
             update_data = {
                 "event_id": data.event_id,
                 "username": data.username,
@@ -79,19 +207,24 @@ class RSVPService:
                 "updated_at": int(time.time())
             }
 
-            ok = await db.update_attr(TableNameEnum.RSVP, update_data, db_pool)
+            ok = await db.update_attr(TableNameEnum.RSVP, update_data, db_pool, data.expected_row_version)
+            if ok is None:
+                return send_json_response(message="RSVP not found", status=status.HTTP_404_NOT_FOUND, body={})
             if not ok:
                 return send_json_response(message="Failed to update RSVP", status=status.HTTP_500_INTERNAL_SERVER_ERROR, body={})
 
             return send_json_response(message="RSVP updated successfully", status=status.HTTP_200_OK, body={})
-        
+
+        except StaleUpdateError as e:
+            return send_json_response(message=e.message, status=status.HTTP_409_CONFLICT, body={"row_version": e.current_row_version, "updated_at": e.current_updated_at})
+
         except Exception as e:
             traceback.print_exc()
             return send_json_response(message="Error updating RSVP", status=status.HTTP_500_INTERNAL_SERVER_ERROR, body={})
 
 
     @staticmethod
-    async def delete_rsvp(request:Request,event_id: int, username: str, db_pool: Session):
+    async def delete_rsvp(request:Request,event_id: int, username: str, db_pool: AsyncSession):
         """Delete an RSVP response for an event."""
         try:
             # Fetch the RSVP record
@@ -128,3 +261,73 @@ class RSVPService:
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 body={}
             )
+
+
+    @staticmethod
+    async def _iter_bulk_items(request: Request):
+        """Yields raw RSVP dicts from a JSON array, NDJSON or CSV (header: event_id,title,username,status) body."""
+        content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+        if content_type == "text/csv":
+            header = None
+            async for values in iter_request_csv(request):
+                if header is None:
+                    header = [column.strip() for column in values]
+                    continue
+                yield dict(zip(header, values))
+        elif content_type == "application/x-ndjson":
+            async for line in iter_request_lines(request):
+                yield orjson.loads(line)
+        else:
+            async for item in iter_request_json_array(request):
+                yield item
+
+    @staticmethod
+    async def _bulk_insert_batch(organizer_name: str, batch: List[Tuple[int, RSVPSubmit]], db_pool: AsyncSession, conflicts: list, errors: list) -> int:
+        owned = await db.get_owned_event_ids({item.event_id for _, item in batch}, organizer_name, db_pool)
+        pending = []
+        for row, item in batch:
+            if item.event_id not in owned:
+                errors.append({"row": row, "event_id": item.event_id, "username": item.username, "reason": "Event not found"})
+            else:
+                pending.append((row, item))
+
+        inserted, conflicted = await db.bulk_insert(TableNameEnum.RSVP, [item.model_dump() for _, item in pending], db_pool)
+        if inserted is None:
+            errors.extend({"row": row, "event_id": item.event_id, "username": item.username, "reason": "Failed to insert"} for row, item in pending)
+            return 0
+        for position in conflicted:
+            row, item = pending[position]
+            conflicts.append({"row": row, "event_id": item.event_id, "username": item.username, "reason": "RSVP already submitted"})
+        return inserted
+
+    @staticmethod
+    async def bulk_submit_rsvp(request: Request, db_pool: AsyncSession):
+        """Import many RSVPs at once; rows that conflict or fail validation are reported without aborting the rest."""
+        organizer_name = request.state.org.organizer_name
+        inserted, conflicts, errors = 0, [], []
+        batch: List[Tuple[int, RSVPSubmit]] = []
+        row = 0
+        try:
+            async for item in RSVPService._iter_bulk_items(request):
+                try:
+                    batch.append((row, RSVPSubmit.model_validate(item)))
+                except ValidationError as e:
+                    errors.append({"row": row, "reason": "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())})
+                row += 1
+                if len(batch) >= variables.BULK_BATCH_SIZE:
+                    inserted += await RSVPService._bulk_insert_batch(organizer_name, batch, db_pool, conflicts, errors)
+                    batch = []
+            if batch:
+                inserted += await RSVPService._bulk_insert_batch(organizer_name, batch, db_pool, conflicts, errors)
+
+        except ValueError as e:
+            return send_json_response(message=f"Invalid bulk RSVP payload at row {row}: {e}", status=status.HTTP_400_BAD_REQUEST, body={"inserted": inserted})
+        except Exception as e:
+            traceback.print_exc()
+            return send_json_response(message="Error importing RSVPs", status=status.HTTP_500_INTERNAL_SERVER_ERROR, body={"inserted": inserted})
+
+        return send_json_response(
+            message="Bulk RSVP import processed",
+            status=status.HTTP_200_OK,
+            body={"received": row, "inserted": inserted, "conflicts": conflicts, "errors": errors},
+        )
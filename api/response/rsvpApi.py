@@ -1,5 +1,6 @@
-from fastapi import APIRouter, Depends, Request, HTTPException
-from sqlmodel import Session
+from typing import Optional
+from fastapi import APIRouter, Depends, Query, Request, HTTPException
+from sqlmodel.ext.asyncio.session import AsyncSession
 from DB.database import DataBasePool, authentication_required
 from api.response.rsvp import RSVPService
 from extra.datamodel import RSVPSubmit
@@ -9,19 +10,48 @@ rsvpRouter = APIRouter(prefix="/rsvp", tags=["RSVP Route"])
 rsvp_service = RSVPService()
 
 @rsvpRouter.post("/submit")
-async def submit_rsvp(request: Request, data: RSVPSubmit, db_pool: Session = Depends(DataBasePool.get_pool)):
+async def submit_rsvp(request: Request, data: RSVPSubmit, db_pool: AsyncSession = Depends(DataBasePool.get_pool)):
     return await rsvp_service.submit_rsvp(request, data, db_pool)
 
+@rsvpRouter.post("/upsert")
+async def upsert_rsvp(request: Request, data: RSVPSubmit, db_pool: AsyncSession = Depends(DataBasePool.get_pool)):
+    return await rsvp_service.upsert_rsvp(request, data, db_pool)
+
+@rsvpRouter.post("/bulk_submit")
+@authentication_required
+async def bulk_submit_rsvp(request: Request, db_pool: AsyncSession = Depends(DataBasePool.get_pool)):
+    return await rsvp_service.bulk_submit_rsvp(request, db_pool)
+
 @rsvpRouter.get("/get_responses")
 @authentication_required
-async def get_rsvp_responses(request:Request,event_id: int, db_pool: Session = Depends(DataBasePool.get_pool)):
-    return await rsvp_service.get_rsvp_responses(request,event_id, db_pool)
+async def get_rsvp_responses(request:Request,event_id: int, after_id: Optional[int] = None, limit: int = Query(100, ge=1, le=1000), stream: bool = False, fields: Optional[str] = None, db_pool: AsyncSession = Depends(DataBasePool.get_pool)):
+    return await rsvp_service.get_rsvp_responses(request,event_id, db_pool, after_id, limit, stream, fields)
+
+@rsvpRouter.post("/export")
+@authentication_required
+async def start_rsvp_export(request: Request, event_id: int, format: str = "csv", db_pool: AsyncSession = Depends(DataBasePool.get_pool)):
+    return await rsvp_service.start_export(request, event_id, format, db_pool)
+
+@rsvpRouter.get("/export/{job_id}")
+@authentication_required
+async def get_rsvp_export(request: Request, job_id: str, db_pool: AsyncSession = Depends(DataBasePool.get_pool)):
+    return await rsvp_service.get_export(request, job_id)
+
+@rsvpRouter.get("/export/{job_id}/download")
+@authentication_required
+async def download_rsvp_export(request: Request, job_id: str, db_pool: AsyncSession = Depends(DataBasePool.get_pool)):
+    return await rsvp_service.download_export(request, job_id)
+
+@rsvpRouter.get("/summary")
+@authentication_required
+async def get_rsvp_summary(request: Request, event_id: int, db_pool: AsyncSession = Depends(DataBasePool.get_pool)):
+    return await rsvp_service.get_rsvp_summary(request, event_id, db_pool)
 
 @rsvpRouter.put("/update")
-async def update_rsvp(data: RSVPSubmit, db_pool: Session = Depends(DataBasePool.get_pool)):
+async def update_rsvp(data: RSVPSubmit, db_pool: AsyncSession = Depends(DataBasePool.get_pool)):
     return await rsvp_service.update_rsvp(data, db_pool)
 
 @rsvpRouter.delete("/delete")
 @authentication_required
-async def delete_rsvp(request:Request,event_id: int, username: str, db_pool: Session = Depends(DataBasePool.get_pool)):
+async def delete_rsvp(request:Request,event_id: int, username: str, db_pool: AsyncSession = Depends(DataBasePool.get_pool)):
     return await rsvp_service.delete_rsvp(request,event_id, username, db_pool)
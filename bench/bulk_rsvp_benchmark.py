@@ -0,0 +1,64 @@
+"""N single /rsvp/submit calls against one /rsvp/bulk_submit call with the same N RSVPs, in-process over ASGI.
+
+    python -m bench.bulk_rsvp_benchmark --rsvps 10000
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import httpx
+
+from DB.database import DataBasePool
+from extra import variables
+from main import app
+
+
+async def login(client: httpx.AsyncClient):
+    account = {"organizer_name": "benchorg", "email": "bench@example.com", "password": "bench-password", "contact": "9000000000", "name": "Bench"}
+    await client.post("/organizer/signup", json=account)
+    response = await client.post("/organizer/login", json={"data": "benchorg", "password": "bench-password", "keepLogin": True})
+    client.cookies.set(variables.COOKIE_KEY, response.cookies.get(variables.COOKIE_KEY))
+    ids = []
+    for event_id, title in ((1, "single submits"), (2, "bulk submit")):
+        response = await client.post("/events/create_event", json={"organizer_name": "benchorg", "event_id": event_id, "title": title, "description": "", "budget": 0, "event_date": "01/01/2030"})
+        ids.append(response.json()["body"]["id"])
+    return ids
+
+
+async def run(url: str, rsvps: int):
+    variables.DATABASE_URL = url
+    await DataBasePool.setup()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="https://bench") as client:
+        single_id, bulk_id = await login(client)
+
+        start = time.perf_counter()
+        for n in range(rsvps):
+            await client.post("/rsvp/submit", json={"event_id": single_id, "title": "single submits", "username": f"guest{n}", "status": "accepted"})
+        single = time.perf_counter() - start
+
+        items = [{"event_id": bulk_id, "title": "bulk submit", "username": f"guest{n}", "status": "accepted"} for n in range(rsvps)]
+        start = time.perf_counter()
+        response = await client.post("/rsvp/bulk_submit", json=items)
+        bulk = time.perf_counter() - start
+        inserted = response.json()["body"]["inserted"]
+    await DataBasePool.teardown()
+
+    print(f"{rsvps} single /rsvp/submit calls: {single:8.2f} s  ({rsvps / single:9.0f} rows/s)")
+    print(f"one /rsvp/bulk_submit call:      {bulk:8.2f} s  ({inserted / bulk:9.0f} rows/s, {inserted} inserted)")
+    print(f"speedup: {single / bulk:.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="sqlite:///bench_bulk.db", help="database to create and fill; it is wiped first when it is a SQLite file")
+    parser.add_argument("--rsvps", type=int, default=10_000)
+    args = parser.parse_args()
+    if args.url.startswith("sqlite:///") and os.path.exists(args.url[len("sqlite:///"):]):
+        os.remove(args.url[len("sqlite:///"):])
+    asyncio.run(run(args.url, args.rsvps))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Serialisation cost of the event list and RSVP list payloads: jsonable_encoder + JSONResponse vs serialize_row + FastJSONResponse.
+
+    python -m bench.json_benchmark --rows 10000
+"""
+import argparse
+import time
+import timeit
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from DB.models import RSVP, Event, rsvpenum
+from extra.helper import FastJSONResponse, serialize_row
+
+
+def make_rows(count: int):
+    now = int(time.time())
+    events = [
+        Event(id=i, organizer_name="org1", event_id=i, title=f"event {i}", description="An evening of talks and dinner", event_date=now, budget=2500.0, created_at=now)
+        for i in range(count)
+    ]
+    rsvps = [
+        RSVP(id=i, event_id=1, username=f"guest{i}", title="event 1", status=rsvpenum.ACCEPTED if i % 3 else rsvpenum.DECLINED, created_at=now)
+        for i in range(count)
+    ]
+    return events, rsvps
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    events, rsvps = make_rows(args.rows)
+    cases = {
+        "event list": (
+            lambda: JSONResponse(content={"message": "Updated", "status": 200, "body": jsonable_encoder(events)}).body,
+            lambda: FastJSONResponse(content={"message": "Updated", "status": 200, "body": [serialize_row(e) for e in events]}).body,
+        ),
+        "rsvp list": (
+            lambda: JSONResponse(content=jsonable_encoder({"event_id": 1, "responses": [r.model_dump() for r in rsvps]})).body,
+            lambda: FastJSONResponse(content={"event_id": 1, "responses": [serialize_row(r) for r in rsvps]}).body,
+        ),
+    }
+
+    print(f"{args.rows} rows, best of {args.repeat}")
+    for name, (old, new) in cases.items():
+        old_ms = min(timeit.repeat(old, number=1, repeat=args.repeat)) * 1000
+        new_ms = min(timeit.repeat(new, number=1, repeat=args.repeat)) * 1000
+        print(f"{name:12s} current {old_ms:9.2f} ms   fast path {new_ms:9.2f} ms   {old_ms / new_ms:5.1f}x  ({len(new())} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+"""Load test of the account, event and RSVP routers against a seeded local database.
+
+    python -m bench.load_benchmark --organizers 100 --events 20 --rsvps 200
+    python -m bench.load_benchmark --mix rsvp-burst --ops 5000 --concurrency 64
+    python -m bench.load_benchmark --workers 4 --save bench/baseline.json
+    python -m bench.load_benchmark --compare bench/baseline.json
+
+Mixes:
+    login-storm   POST /organizer/login for random organizers (argon2 verify + session insert)
+    rsvp-burst    /rsvp/submit of new guests on one hot event, with some /rsvp/update flips
+    dashboard     logged-in organizers polling auth, their event list, RSVP summary and responses
+    mixed         10% login-storm, 50% rsvp-burst, 40% dashboard
+
+By default the app runs in-process over httpx.ASGITransport (lifespan included); with
+--workers N it is served by `uvicorn bench.server:app --workers N` and driven over HTTP.
+Latency is measured client side; DB query counts come from the Server-Timing header set by
+MetricsMiddleware. --save writes the results as JSON, --compare checks a run against such a
+file and exits non-zero when p99 latency or queries per request regress.
+
+The target database is dropped and re-seeded on every run; never point it at real data.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+from sqlalchemy import insert
+from sqlmodel import SQLModel
+
+from DB.database import DataBasePool, EVENT_DB
+from DB.migrations.runner import schema_version
+from DB.models import ORGANIZER, RSVP, Event
+from api.account.helper import security
+from extra import variables
+
+PASSWORD = "bench-password"
+CHUNK = 10_000
+MIXES = ("login-storm", "rsvp-burst", "dashboard", "mixed")
+# Session cache hits vary between runs, so only flag query count increases above this.
+QUERY_SLACK = 0.25
+QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+class Scale:
+    def __init__(self, organizers: int, events: int, rsvps: int):
+        self.organizers, self.events, self.rsvps = organizers, events, rsvps
+
+    def organizer(self, n: int) -> str:
+        return f"org{n}"
+
+    def event_ids(self, n: int) -> range:
+        """Primary keys of organizer `n`'s events; seeding assigns them in organizer order."""
+        return range((n - 1) * self.events + 1, n * self.events + 1)
+
+
+async def reset_schema():
+    engine = await DataBasePool.getEngine()
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.drop_all)
+        await conn.run_sync(schema_version.drop, checkfirst=True)
+
+
+async def seed(scale: Scale):
+    """Fills an empty database through Core executemany; every organizer shares one password hash."""
+    password = security().hash_password(PASSWORD)
+    now = int(time.time())
+    async with DataBasePool.session() as session:
+        conn = await session.connection()
+        await conn.execute(insert(ORGANIZER), [
+            {"id": n, "organizer_name": scale.organizer(n), "email": f"org{n}@example.com", "contact": str(9000000000 + n), "password": password, "name": f"Org {n}", "created_at": now}
+            for n in range(1, scale.organizers + 1)
+        ])
+        events = []
+        for n in range(1, scale.organizers + 1):
+            for event_id, pk in enumerate(scale.event_ids(n), start=1):
+                events.append({"id": pk, "organizer_name": scale.organizer(n), "event_id": event_id, "title": f"event {pk}", "description": "seeded", "event_date": now + 86400 * event_id, "budget": 1000.0, "created_at": now})
+        await conn.execute(insert(Event), events)
+
+        batch = []
+        for pk in range(1, scale.organizers * scale.events + 1):
+            for guest in range(scale.rsvps):
+                batch.append({"event_id": pk, "username": f"guest{guest}", "title": f"event {pk}", "status": "ACCEPTED" if guest % 3 else "DECLINED", "created_at": now})
+                if len(batch) == CHUNK:
+                    await conn.execute(insert(RSVP), batch)
+                    batch = []
+        if batch:
+            await conn.execute(insert(RSVP), batch)
+        await session.commit()
+        await EVENT_DB.rebuild_rsvp_summary(session)
+
+
+class Recorder:
+    """Collects per-route latency, status and query counts for one mix."""
+
+    def __init__(self):
+        self.samples: Dict[str, List[tuple]] = defaultdict(list)
+
+    async def call(self, client: httpx.AsyncClient, method: str, path: str, **kwargs) -> httpx.Response:
+        start = time.perf_counter()
+        response = await client.request(method, path, **kwargs)
+        elapsed = time.perf_counter() - start
+        timing = QUERIES.search(response.headers.get("server-timing", ""))
+        self.samples[f"{method} {path}"].append((elapsed, response.status_code, int(timing.group(1)) if timing else None))
+        return response
+
+    def report(self, wall: float) -> dict:
+        routes = {}
+        total = 0
+        for route, samples in sorted(self.samples.items()):
+            latencies = sorted(s[0] for s in samples)
+            queries = [s[2] for s in samples if s[2] is not None]
+            total += len(samples)
+            routes[route] = {
+                "requests": len(samples),
+                "errors": sum(1 for s in samples if s[1] >= 400),
+                "p50_ms": percentile(latencies, 0.50) * 1000,
+                "p99_ms": percentile(latencies, 0.99) * 1000,
+                "queries_per_request": sum(queries) / len(queries) if queries else None,
+            }
+        return {"requests": total, "seconds": wall, "throughput": total / wall if wall else 0.0, "routes": routes}
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    return values[max(math.ceil(p * len(values)) - 1, 0)]
+
+
+class VirtualUser:
+    """One client with its own cookie jar, logged in as an organizer when the mix needs it."""
+
+    def __init__(self, client: httpx.AsyncClient, organizer: int, rng: random.Random):
+        self.client, self.organizer, self.rng = client, organizer, rng
+
+    async def login(self, recorder: Optional[Recorder], organizer: int):
+        body = {"data": f"org{organizer}", "password": PASSWORD, "keepLogin": True}
+        if recorder is None:
+            response = await self.client.post("/organizer/login", json=body)
+        else:
+            response = await recorder.call(self.client, "POST", "/organizer/login", json=body)
+        token = response.cookies.get(variables.COOKIE_KEY)
+        if token:
+            self.client.cookies.set(variables.COOKIE_KEY, token)
+
+
+class Workload:
+    def __init__(self, scale: Scale, seed: int):
+        self.scale = scale
+        self.hot_event = 1
+        self.new_guests = 0
+        self.submitted: List[str] = []
+        self.rng = random.Random(seed)
+
+    async def login_storm(self, user: VirtualUser, recorder: Recorder):
+        await user.login(recorder, user.rng.randint(1, self.scale.organizers))
+
+    async def rsvp_burst(self, user: VirtualUser, recorder: Recorder):
+        title = f"event {self.hot_event}"
+        if self.submitted and user.rng.random() < 0.2:
+            username = user.rng.choice(self.submitted)
+            status = user.rng.choice(("accepted", "declined"))
+            await recorder.call(user.client, "PUT", "/rsvp/update", json={"event_id": self.hot_event, "title": title, "username": username, "status": status})
+            return
+        username = f"burst{self.new_guests}"
+        self.new_guests += 1
+        response = await recorder.call(user.client, "POST", "/rsvp/submit", json={"event_id": self.hot_event, "title": title, "username": username, "status": "accepted"})
+        if response.status_code == 200:
+            self.submitted.append(username)
+
+    async def dashboard(self, user: VirtualUser, recorder: Recorder):
+        event_id = user.rng.choice(self.scale.event_ids(user.organizer))
+        await recorder.call(user.client, "GET", "/organizer/auth")
+        await recorder.call(user.client, "GET", "/events/get_event", params={"username": f"org{user.organizer}"})
+        await recorder.call(user.client, "GET", "/rsvp/summary", params={"event_id": event_id})
+        await recorder.call(user.client, "GET", "/rsvp/get_responses", params={"event_id": event_id, "limit": 100})
+
+    async def mixed(self, user: VirtualUser, recorder: Recorder):
+        roll = user.rng.random()
+        if roll < 0.1:
+            await self.login_storm(user, recorder)
+        elif roll < 0.6:
+            await self.rsvp_burst(user, recorder)
+        else:
+            await self.dashboard(user, recorder)
+
+    def operation(self, mix: str):
+        return {"login-storm": self.login_storm, "rsvp-burst": self.rsvp_burst, "dashboard": self.dashboard, "mixed": self.mixed}[mix]
+
+
+async def run_mix(mix: str, make_client, workload: Workload, ops: int, concurrency: int) -> dict:
+    scale = workload.scale
+    users = []
+    for n in range(concurrency):
+        # Spread users over organizers so MAX_SESSIONS_PER_ORGANIZER does not evict their sessions.
+        user = VirtualUser(make_client(), n % scale.organizers + 1, random.Random(workload.rng.random()))
+        if mix in ("dashboard", "mixed"):
+            await user.login(None, user.organizer)
+        users.append(user)
+
+    recorder = Recorder()
+    remaining = ops
+    operation = workload.operation(mix)
+
+    async def drive(user: VirtualUser):
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            await operation(user, recorder)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(drive(user) for user in users))
+    wall = time.perf_counter() - start
+    for user in users:
+        await user.client.aclose()
+    return recorder.report(wall)
+
+
+def print_report(mix: str, result: dict):
+    print(f"\n{mix}: {result['requests']} requests in {result['seconds']:.2f}s ({result['throughput']:.0f} req/s)")
+    print(f"  {'route':28s} {'count':>7s} {'errors':>7s} {'p50 ms':>9s} {'p99 ms':>9s} {'queries':>8s}")
+    for route, stats in result["routes"].items():
+        queries = f"{stats['queries_per_request']:.1f}" if stats["queries_per_request"] is not None else "-"
+        print(f"  {route:28s} {stats['requests']:7d} {stats['errors']:7d} {stats['p50_ms']:9.2f} {stats['p99_ms']:9.2f} {queries:>8s}")
+
+
+def compare(baseline: dict, results: dict, tolerance: float) -> List[str]:
+    """Regressions of `results` against `baseline`: p99 beyond `tolerance`, or more queries per request."""
+    regressions = []
+    for mix, result in results.items():
+        for route, stats in result["routes"].items():
+            old = baseline.get("results", {}).get(mix, {}).get("routes", {}).get(route)
+            if old is None:
+                continue
+            if stats["p99_ms"] > old["p99_ms"] * (1 + tolerance):
+                regressions.append(f"{mix} {route}: p99 {old['p99_ms']:.2f} -> {stats['p99_ms']:.2f} ms")
+            if None not in (stats["queries_per_request"], old["queries_per_request"]) and stats["queries_per_request"] > old["queries_per_request"] + QUERY_SLACK:
+                regressions.append(f"{mix} {route}: queries/request {old['queries_per_request']:.2f} -> {stats['queries_per_request']:.2f}")
+    return regressions
+
+
+def wipe_sqlite(url: str):
+    if url.startswith("sqlite:///") and os.path.exists(url[len("sqlite:///"):]):
+        os.remove(url[len("sqlite:///"):])
+
+
+async def prepare(url: str, scale: Scale):
+    wipe_sqlite(url)
+    variables.DATABASE_URL = url
+    await DataBasePool.setup()
+    await reset_schema()
+    await DataBasePool.teardown()
+    # Setting up again runs the migrations on the now empty database.
+    await DataBasePool.setup()
+    start = time.perf_counter()
+    await seed(scale)
+    print(f"Seeded {scale.organizers} organizers, {scale.organizers * scale.events} events, {scale.organizers * scale.events * scale.rsvps} RSVPs in {time.perf_counter() - start:.1f}s")
+    await DataBasePool.teardown()
+
+
+async def run_in_process(args, scale: Scale, mixes: List[str]) -> dict:
+    from main import app
+
+    await prepare(args.url, scale)
+    results = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        # One workload for all mixes, so guests created by one burst are not re-submitted by the next.
+        workload = Workload(scale, args.seed)
+        for mix in mixes:
+            results[mix] = await run_mix(mix, lambda: httpx.AsyncClient(transport=transport, base_url="https://bench"), workload, args.ops, args.concurrency)
+            print_report(mix, results[mix])
+    return results
+
+
+async def wait_until_ready(base_url: str, server: subprocess.Popen, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise RuntimeError("uvicorn exited before it was ready")
+            try:
+                await client.get("/metrics")
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError(f"server at {base_url} not ready after {timeout}s")
+
+
+async def run_multi_worker(args, scale: Scale, mixes: List[str]) -> dict:
+    await prepare(args.url, scale)
+    base_url = f"http://127.0.0.1:{args.port}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "bench.server:app", "--host", "127.0.0.1", "--port", str(args.port), "--workers", str(args.workers), "--no-access-log"],
+        env={**os.environ, "BENCH_DATABASE_URL": args.url},
+    )
+    results = {}
+    try:
+        await wait_until_ready(base_url, server)
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        # One workload for all mixes, so guests created by one burst are not re-submitted by the next.
+        workload = Workload(scale, args.seed)
+        for mix in mixes:
+            results[mix] = await run_mix(mix, lambda: httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60), workload, args.ops, args.concurrency)
+            print_report(mix, results[mix])
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="sqlite:///bench_load.db", help="database to create and fill; it is wiped first")
+    parser.add_argument("--organizers", type=int, default=100)
+    parser.add_argument("--events", type=int, default=20, help="events per organizer")
+    parser.add_argument("--rsvps", type=int, default=200, help="RSVPs per event")
+    parser.add_argument("--mix", choices=MIXES + ("all",), default="all")
+    parser.add_argument("--ops", type=int, default=2000, help="operations per mix; a dashboard operation is four requests")
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent virtual users")
+    parser.add_argument("--workers", type=int, default=0, help="serve with uvicorn and this many worker processes instead of in-process")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to check the results against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative p99 increase when comparing")
+    args = parser.parse_args()
+
+    scale = Scale(args.organizers, args.events, args.rsvps)
+    mixes = list(MIXES) if args.mix == "all" else [args.mix]
+    runner = run_multi_worker if args.workers else run_in_process
+    results = asyncio.run(runner(args, scale, mixes))
+
+    if args.save:
+        meta = {key: getattr(args, key) for key in ("url", "organizers", "events", "rsvps", "ops", "concurrency", "workers", "seed")}
+        meta["created_at"] = int(time.time())
+        with open(args.save, "w") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2)
+        print(f"\nResults saved to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), results, args.tolerance)
+        if regressions:
+            print("\nRegressions against", args.compare)
+            for line in regressions:
+                print("  " + line)
+            sys.exit(1)
+        print(f"\nNo regressions against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
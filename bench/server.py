@@ -0,0 +1,12 @@
+"""ASGI entry point for `bench.load_benchmark --workers N`: `main:app` against BENCH_DATABASE_URL.
+
+`extra.variables` loads `.env` with override=True, so every uvicorn worker process imports
+this module instead of `main` to point the app at the benchmark database.
+"""
+import os
+
+from extra import variables
+
+variables.DATABASE_URL = os.environ["BENCH_DATABASE_URL"]
+
+from main import app  # noqa: E402
@@ -0,0 +1,164 @@
+import zlib
+from importlib.util import find_spec
+from typing import Dict, List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from extra import variables
+
+# Bodies that are already compressed gain nothing from another pass.
+_INCOMPRESSIBLE = ("image/", "video/", "audio/", "application/zip", "application/gzip", "application/vnd.apache.parquet", "application/octet-stream")
+
+
+class _Gzip:
+    def __init__(self):
+        self._compressor = zlib.compressobj(variables.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _Brotli:
+    def __init__(self):
+        import brotli
+
+        self._compressor = brotli.Compressor(quality=variables.COMPRESSION_BROTLI_QUALITY)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _Zstd:
+    def __init__(self):
+        import zstandard
+
+        self._flush_block = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        self._compressor = zstandard.ZstdCompressor(level=variables.COMPRESSION_ZSTD_LEVEL).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(self._flush_block)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+# In order of preference when the client weighs several equally; brotli and zstd only when installed (requirements-optional.txt).
+ENCODERS = {
+    name: encoder
+    for name, encoder, module in (("zstd", _Zstd, "zstandard"), ("br", _Brotli, "brotli"), ("gzip", _Gzip, None))
+    if module is None or find_spec(module) is not None
+}
+
+_stats: Dict[str, int] = {"responses": 0, "bytes_in": 0, "bytes_out": 0}
+
+
+def compression_stats() -> Dict[str, int]:
+    return dict(_stats)
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """The supported encoding with the highest q-value in an Accept-Encoding header, or None for identity."""
+    if not accept_encoding:
+        return None
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        weights[name.strip().lower()] = quality
+    candidates: List[str] = [name for name in ENCODERS if weights.get(name, weights.get("*", 0.0)) > 0]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda name: weights.get(name, weights.get("*", 0.0)))
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing responses of at least COMPRESSION_MIN_SIZE bytes with zstd, brotli or gzip.
+
+    The encoding is negotiated from Accept-Encoding. Streamed bodies (NDJSON, file downloads)
+    are compressed chunk by chunk and flushed after each one, so rows still reach the client
+    as they are produced. Range requests, partial and bodiless responses, and bodies that are
+    already encoded or compressed are passed through untouched.
+    """
+
+    def __init__(self, app, minimum_size: int = None):
+        self.app = app
+        self.minimum_size = variables.COMPRESSION_MIN_SIZE if minimum_size is None else minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        request_headers = Headers(scope=scope)
+        encoding = negotiate_encoding(request_headers.get("accept-encoding"))
+        if encoding is None or "range" in request_headers:
+            return await self.app(scope, receive, send)
+
+        start_message = None
+        encoder = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, encoder, passthrough
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message.get("headers", []))
+                content_type = headers.get("content-type", "")
+                if message["status"] in (204, 206, 304) or "content-encoding" in headers or content_type.startswith(_INCOMPRESSIBLE):
+                    passthrough = True
+                    await send(message)
+                else:
+                    start_message = message
+                return
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body, more_body = message.get("body", b""), message.get("more_body", False)
+            if start_message is not None:
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+                encoder = ENCODERS[encoding]()
+                start_message["headers"] = list(start_message.get("headers", []))
+                headers = MutableHeaders(raw=start_message["headers"])
+                del headers["content-length"]
+                headers["content-encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    # The compressed bytes differ from the identity ones a strong validator promises.
+                    headers["etag"] = "W/" + etag
+
+            compressed = encoder.compress(body) + (encoder.flush() if more_body else encoder.finish())
+            _stats["bytes_in"] += len(body)
+            _stats["bytes_out"] += len(compressed)
+            if start_message is not None:
+                if not more_body:
+                    MutableHeaders(raw=start_message["headers"])["content-length"] = str(len(compressed))
+                _stats["responses"] += 1
+                await send(start_message)
+                start_message = None
+            await send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
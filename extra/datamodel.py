@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 from DB.models import rsvpenum
 
@@ -10,6 +10,13 @@ class EventRequest(BaseModel):
     description: str
     budget: float
     event_date: str = "d/m/Y"
+    # row_version the client last saw; the update is refused with 409 if the event changed since.
+    expected_row_version: Optional[int] = None
+
+class EventBatchRequest(BaseModel):
+    create: List[EventRequest] = []
+    update: List[EventRequest] = []
+    delete: List[int] = []
 
 class Register_user (BaseModel):
     organizer_name: str = "test"
@@ -28,6 +35,7 @@ class RSVPSubmit(BaseModel):
     title :str
     username: str = "john_doe"
     status: rsvpenum
+    expected_row_version: Optional[int] = None
 
 # class RSVPUpdate(BaseModel):
 #     event_id: int
@@ -1,24 +1,106 @@
+import codecs
+import csv
+import json
+import re
+from collections import deque
+from email.utils import formatdate
+from functools import cached_property, lru_cache
+import hashlib
 import logging
+import orjson
 import secrets
 from fastapi import Request
 from pydantic import BaseModel
-from typing import Any, Dict, Optional
+from sqlmodel import SQLModel
+from starlette.datastructures import Headers
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 import http.cookies
 from ua_parser import user_agent_parser
 from extra import variables
-from fastapi.responses import JSONResponse
-from typing import Any, Dict
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from typing import Any, AsyncIterable, AsyncIterator, Dict
 
 
 
-class ApiReqData(BaseModel):
-    ip: Optional[str]
-    country: Optional[str]
-    origin: Optional[str]
-    referer: Optional[str]
-    browser: Optional[str]
-    os: Optional[str]
-    sessionID: Optional[str]
+def _orjson_default(obj: Any):
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson; used as the app-wide default response class."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def serialize_row(row: SQLModel, exclude: Iterable[str] = (), fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """Reads a SQLModel row's field values (or only `fields`) into a dict that FastJSONResponse can render directly, skipping jsonable_encoder."""
+    return {name: getattr(row, name) for name in (fields or type(row).model_fields) if name not in exclude}
+
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str]) -> Optional[List[str]]:
+    """
+    Parses a `fields=username,status` projection parameter.
+
+    :param fields: The comma-separated field names, or None.
+    :param allowed: The fields the endpoint can return.
+    :return: The requested names in order without duplicates, or None when no projection was asked for.
+    :raises ValueError: If a name is not in `allowed`.
+    """
+    if not fields:
+        return None
+    names = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields {', '.join(unknown)}; choose from {', '.join(allowed)}")
+    return names or None
+
+
+class ApiReqData:
+    """Request metadata read from the headers; user-agent and cookie parsing run only when those fields are read."""
+
+    def __init__(self, headers: Headers):
+        self._headers = headers
+
+    @property
+    def ip(self) -> Optional[str]:
+        return self._headers.get("cf-connecting-ip", "") or self._headers.get("x-real-ip")
+
+    @property
+    def country(self) -> Optional[str]:
+        return self._headers.get("cf-ipcountry", "")
+
+    @property
+    def origin(self) -> Optional[str]:
+        return self._headers.get("origin")
+
+    @property
+    def referer(self) -> Optional[str]:
+        return self._headers.get("referer")
+
+    @cached_property
+    def _user_agent(self) -> Tuple[Optional[str], Optional[str]]:
+        return get_user_agent_details(self._headers.get("user-agent"))
+
+    @property
+    def browser(self) -> Optional[str]:
+        return self._user_agent[0]
+
+    @property
+    def os(self) -> Optional[str]:
+        return self._user_agent[1]
+
+    @cached_property
+    def sessionID(self) -> Optional[str]:
+        cookie = self._headers.get("cookie")
+        if not cookie:
+            return None
+        cookie_dict = http.cookies.SimpleCookie(cookie)
+        return cookie_dict.get(variables.COOKIE_KEY).value if variables.COOKIE_KEY in cookie_dict else None
 
 
 def generate_secure_random_number():
@@ -27,7 +109,8 @@ def generate_secure_random_number():
     return randNum
 
 
-def get_user_agent_details(user_agent):
+@lru_cache(maxsize=variables.UA_CACHE_SIZE)
+def _parse_user_agent(user_agent: str) -> Tuple[str, str]:
     parsed_data = user_agent_parser.Parse(user_agent)
     browser_name = parsed_data["user_agent"]["family"]
     browser_major_version = parsed_data["user_agent"]["major"]
@@ -38,37 +121,20 @@ def get_user_agent_details(user_agent):
     return browser_info, os_info
 
 
-async def get_fastApi_req_data(request: Request) -> ApiReqData:
-    headers = request.headers
-    # ip = request.client.host
-    # print(f"HEADERS :: {headers}")
-    # print(f"IP :: {headers}")
-    cfip = headers.get("cf-connecting-ip", "")
-    ip = headers.get("x-real-ip")
-    country = headers.get("cf-ipcountry", "")
-    origin = headers.get("origin")
-    referer = headers.get("referer")
-    ua = get_user_agent_details(headers.get("user-agent"))
-    cookie = headers.get("cookie")
-    sessionID = None
-
-    if cookie:
-        cookie_dict = http.cookies.SimpleCookie(cookie)
-        sessionID = (
-            cookie_dict.get(variables.COOKIE_KEY).value
-            if variables.COOKIE_KEY in cookie_dict
-            else None
-        )
+def get_user_agent_details(user_agent: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """Returns (browser, os) for a raw User-Agent header, memoized per distinct string; (None, None) when it is missing."""
+    if not user_agent:
+        return None, None
+    return _parse_user_agent(user_agent)
 
-    return ApiReqData(
-        ip=cfip or ip,
-        country=country,
-        origin=origin,
-        referer=referer,
-        browser=ua[0],
-        os=ua[1],
-        sessionID=sessionID,
-    )
+
+def user_agent_cache_stats() -> Dict[str, int]:
+    info = _parse_user_agent.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "size": info.currsize, "max_size": info.maxsize}
+
+
+async def get_fastApi_req_data(request: Request) -> ApiReqData:
+    return ApiReqData(request.headers)
 
 
 def send_json_response(
@@ -76,7 +142,7 @@ def send_json_response(
     status: int = 200,
     body: Any = None,
     additional_data: Dict[str, Any] = None,
-) -> JSONResponse:
+) -> FastJSONResponse:
     """
     A reusable utility function for creating JSON responses in FastAPI.
 
@@ -84,7 +150,7 @@ def send_json_response(
     :param status: HTTP status code (default: 200).
     :param body: The response body (default: None).
     :param additional_data: A dictionary of additional data to include in the response (default: None).
-    :return: A JSONResponse object with the provided data.
+    :return: A FastJSONResponse object with the provided data.
 
     ```python
     from fastapi import FastAPI
@@ -108,7 +174,207 @@ def send_json_response(
 
     if additional_data:
         response_content.update(additional_data)
-    return JSONResponse(content=response_content, status_code=status)
+    return FastJSONResponse(content=response_content, status_code=status)
+
+
+def list_validators(version: Tuple[int, ...], *scope: Any) -> Dict[str, str]:
+    """
+    Cache validators for a list response, built from its EVENT_DB.get_list_version probe.
+
+    :param version: The (count, max id, row_version sum, last modified) tuple of the rows behind the response.
+    :param scope: The request parameters that shape the response (owner, cursor, page size, ...).
+    :return: ETag, Last-Modified and Cache-Control headers; no-cache makes clients revalidate on every poll.
+    """
+    digest = hashlib.blake2b(repr((version, scope)).encode(), digest_size=12).hexdigest()
+    # Weak, because the same JSON may go out with different content encodings.
+    return {"ETag": f'W/"{digest}"', "Last-Modified": formatdate(version[3], usegmt=True), "Cache-Control": "no-cache"}
+
+
+def is_not_modified(headers: Headers, validators: Dict[str, str]) -> bool:
+    """
+    Evaluates If-None-Match against the ETag in `validators`.
+
+    If-Modified-Since is ignored: Last-Modified is the newest surviving row's timestamp,
+    which does not advance when a row is deleted, while the ETag does.
+
+    :param headers: The request headers.
+    :param validators: Headers returned by list_validators.
+    :return: True when the client's copy is current and a 304 can be sent instead of the body.
+    """
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is None:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or validators["ETag"].removeprefix("W/") in tags
+
+
+def send_not_modified(validators: Dict[str, str]) -> Response:
+    """A bodiless 304 Not Modified carrying the current validators."""
+    return Response(status_code=304, headers=validators)
+
+
+def send_ndjson_response(rows: AsyncIterable[Dict[str, Any]], headers: Dict[str, str] = None) -> StreamingResponse:
+    """
+    Streams `rows` as newline-delimited JSON, one object per line, without buffering the full result.
+
+    :param rows: An async iterable of JSON-serialisable dicts.
+    :param headers: Extra response headers (default: None).
+    :return: A StreamingResponse with media type application/x-ndjson.
+    """
+
+    async def encode():
+        async for row in rows:
+            yield orjson.dumps(row, default=_orjson_default) + b"\n"
+
+    return StreamingResponse(encode(), media_type="application/x-ndjson", headers=headers)
+
+
+async def iter_request_lines(request: Request) -> AsyncIterator[str]:
+    """
+    Yields the request body line by line as it arrives, decoding UTF-8 incrementally.
+
+    :param request: The incoming request; its body is consumed.
+    :return: An async iterator of lines without their line endings; blank lines are skipped.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in request.stream():
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            line = line.rstrip("\r")
+            if line:
+                yield line
+    pending += decoder.decode(b"", final=True)
+    if pending.strip():
+        yield pending.rstrip("\r")
+
+
+
+class _LineFeed:
+    """The iterator a csv.reader pulls lines from; lines are appended as the body arrives."""
+
+    def __init__(self):
+        self.lines = deque()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self.lines:
+            raise StopIteration
+        return self.lines.popleft()
+
+
+async def iter_request_csv(request: Request) -> AsyncIterator[List[str]]:
+    """
+    Yields the rows of a CSV body as it arrives; quoted fields may span lines.
+
+    One csv.reader parses the whole body. Lines are handed to it only once the record they
+    belong to is complete (an even number of quote characters so far), so it never runs out
+    of input in the middle of a quoted field.
+
+    :param request: The incoming request; its body is consumed.
+    :return: An async iterator of rows as lists of strings; blank lines are skipped.
+    :raises ValueError: If the body ends inside a quoted field or is not valid CSV.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    feed = _LineFeed()
+    reader = csv.reader(feed)
+    record, quotes, pending = [], 0, ""
+
+    def parse(line: str):
+        nonlocal quotes
+        record.append(line)
+        quotes += line.count('"')
+        if quotes % 2:
+            return
+        feed.lines.extend(record)
+        record.clear()
+        quotes = 0
+        while feed.lines:
+            yield next(reader)
+
+    try:
+        async for chunk in request.stream():
+            pending += decoder.decode(chunk)
+            *lines, pending = pending.split("\n")
+            for line in lines:
+                for row in parse(line + "\n"):
+                    if row:
+                        yield row
+        pending += decoder.decode(b"", final=True)
+        if pending:
+            for row in parse(pending):
+                if row:
+                    yield row
+    except csv.Error as e:
+        raise ValueError(f"Malformed CSV: {e}")
+    if record:
+        raise ValueError("Malformed CSV: unterminated quoted field")
+
+
+_JSON_DECODER = json.JSONDecoder()
+_JSON_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+async def iter_request_json_array(request: Request) -> AsyncIterator[Any]:
+    """
+    Yields the elements of a JSON array body one at a time as it arrives.
+
+    Only the unparsed tail of the body is buffered. Each element is decoded in place with
+    JSONDecoder.raw_decode and handed out once the "," or "]" after it has arrived, so a
+    value cut off at a chunk boundary is read again with the next chunk instead of half-parsed.
+
+    :param request: The incoming request; its body is consumed.
+    :return: An async iterator of the decoded elements.
+    :raises ValueError: If the body is not a JSON array or an element is not valid JSON.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    state = "start"  # then "first" element or "]", "element", and "end" once the array is closed
+
+    def drain(final: bool):
+        nonlocal buffer, state
+        position = 0
+        while True:
+            position = _JSON_WHITESPACE.match(buffer, position).end()
+            if position == len(buffer):
+                break
+            if state == "end":
+                raise ValueError("Unexpected data after the JSON array")
+            if state == "start":
+                if buffer[position] != "[":
+                    raise ValueError("Expected a JSON array of RSVPs")
+                state, position = "first", position + 1
+                continue
+            if state == "first" and buffer[position] == "]":
+                state, position = "end", position + 1
+                continue
+            try:
+                value, end = _JSON_DECODER.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if final:
+                    raise
+                break
+            end = _JSON_WHITESPACE.match(buffer, end).end()
+            if end == len(buffer):
+                break
+            if buffer[end] not in ",]":
+                raise ValueError(f"Expected ',' or ']' after element at offset {end}")
+            yield value
+            state, position = ("element" if buffer[end] == "," else "end"), end + 1
+        buffer = buffer[position:]
+
+    async for chunk in request.stream():
+        buffer += decoder.decode(chunk)
+        for value in drain(final=False):
+            yield value
+    buffer += decoder.decode(b"", final=True)
+    for value in drain(final=True):
+        yield value
+    if state != "end":
+        raise ValueError("Expected a JSON array of RSVPs")
 
 
 def generate_unique_id(length: int = 16) -> str:
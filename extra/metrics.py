@@ -0,0 +1,168 @@
+import contextvars
+import time
+from bisect import bisect_left
+from collections import Counter as _Tally
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from extra import variables
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], **extra: str) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{_escape(value)}"' for name, value in extra.items()]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name, self.help, self.labels = name, help, labels
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_labels(self.labels, key)} {value}" for key, value in self._values.items()]
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name, self.help, self.labels, self.buckets = name, help, labels, buckets
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str):
+        state = self._values.get(labels)
+        if state is None:
+            state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        state[0][bisect_left(self.buckets, value)] += 1
+        state[1] += value
+        state[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.labels, key, le=le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, key)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.labels, key)} {count}")
+        return lines
+
+
+request_latency = Histogram("http_request_duration_seconds", "Time to serve a request, per route.", ("method", "route"))
+requests_total = Counter("http_requests_total", "Requests served, per route and status code.", ("method", "route", "status"))
+queries_per_request = Histogram("db_queries_per_request", "SQL statements executed while serving one request.", ("method", "route"), QUERY_COUNT_BUCKETS)
+query_latency = Histogram("db_query_duration_seconds", "Execution time of single SQL statements, per statement kind.", ("kind",))
+pool_wait = Histogram("db_pool_wait_seconds", "Time spent waiting to check a connection out of the pool.")
+repeated_queries = Counter("db_repeated_queries_total", "Requests that ran the same SQL statement repeatedly (possible N+1), per route.", ("method", "route"))
+
+_metrics = [request_latency, requests_total, queries_per_request, query_latency, pool_wait, repeated_queries]
+
+# Point-in-time values from other subsystems, registered by name and rendered as gauges.
+_gauges: Dict[str, Tuple[str, Callable[[], Dict[str, float]]]] = {}
+
+
+def register_gauges(name: str, help: str, collect: Callable[[], Dict[str, float]]):
+    """Exposes `collect()` as the gauge `name` with one sample per returned key, labelled key="..."."""
+    _gauges[name] = (help, collect)
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in _metrics:
+        lines += metric.render()
+    for name, (help, collect) in _gauges.items():
+        lines += [f"# HELP {name} {help}", f"# TYPE {name} gauge"]
+        for key, value in collect().items():
+            if value is not None:
+                lines.append(f"{name}{_labels(('key',), (key,))} {value}")
+    return "\n".join(lines) + "\n"
+
+
+class RequestStats:
+    """Per-request DB accounting, reachable from the SQLAlchemy hooks through a context variable."""
+
+    __slots__ = ("queries", "db_time", "statements")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.statements: _Tally = _Tally()
+
+
+current_request_stats: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar("current_request_stats", default=None)
+
+
+def instrument_engine(engine: Engine):
+    """Times every statement on `engine` (pass `AsyncEngine.sync_engine`) and charges it to the current request."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        query_latency.observe(elapsed, statement.lstrip().split(None, 1)[0].upper())
+        stats = current_request_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_time += elapsed
+            stats.statements[statement] += 1
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency and query counts, and adding a Server-Timing header."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats()
+        token = current_request_stats.set(stats)
+        start = time.perf_counter()
+        status_code = 500
+
+        def route_label() -> str:
+            route = scope.get("route")
+            return getattr(route, "path", None) or "unmatched"
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                elapsed = time.perf_counter() - start
+                timing = f'app;dur={elapsed * 1000:.1f}, db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries"'
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"server-timing", timing.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request_stats.reset(token)
+            method, route = scope["method"], route_label()
+            request_latency.observe(time.perf_counter() - start, method, route)
+            requests_total.inc(method, route, str(status_code))
+            queries_per_request.observe(stats.queries, method, route)
+            repeated = [statement for statement, count in stats.statements.items() if count >= variables.METRICS_N_PLUS_ONE_THRESHOLD]
+            if repeated:
+                repeated_queries.inc(method, route)
+                print(f"Possible N+1 on {method} {route}: {len(repeated)} statement(s) repeated, e.g. {repeated[0][:120]!r} x{stats.statements[repeated[0]]}")
@@ -0,0 +1,82 @@
+import asyncio
+import os
+import threading
+from importlib.util import find_spec
+from typing import List
+
+import uvicorn
+
+from DB.database import DataBasePool
+from DB.jobs import PeriodicJob, rsvp_summary_reconciler
+from extra import variables
+
+
+def worker_count() -> int:
+    return variables.WEB_WORKERS or os.cpu_count() or 1
+
+
+async def _migrate():
+    await DataBasePool.setup()
+    await DataBasePool.teardown()
+
+
+async def _run_jobs(jobs: List[PeriodicJob], stop: asyncio.Event):
+    # Only the jobs run here, so there is no point opening connections ahead of them.
+    variables.DB_POOL_WARMUP = 0
+    await DataBasePool.setup()
+    for job in jobs:
+        await job.start()
+    try:
+        await stop.wait()
+    finally:
+        for job in jobs:
+            await job.stop()
+        await DataBasePool.teardown()
+
+
+def run_production(app: str = "main:app"):
+    """Serves `app` with one uvicorn worker per core (or WEB_WORKERS), without the reloader.
+
+    uvloop and httptools are used when installed. On SIGTERM/SIGINT uvicorn stops accepting
+    connections, waits up to WEB_GRACEFUL_TIMEOUT seconds for in-flight requests, then runs
+    the lifespan shutdown in every worker, which drains MetaWriter and disposes the pool.
+
+    With several workers, jobs that must run once per deployment rather than once per worker,
+    such as the RSVP summary reconciler, run in this supervising process on a thread of their own.
+    """
+    # Migrate once up front so the workers do not race each other creating the schema.
+    asyncio.run(_migrate())
+
+    workers = worker_count()
+    # Workers re-import extra.variables; exporting the resolved count lets each size its pool share.
+    os.environ["WEB_WORKERS"] = str(workers)
+    variables.WEB_WORKERS = workers
+
+    jobs, stop = None, asyncio.Event()
+    if workers > 1:
+        # Likewise an interval of 0 keeps every worker from starting its own reconciler.
+        os.environ["RSVP_SUMMARY_RECONCILE_INTERVAL"] = "0"
+        loop = asyncio.new_event_loop()
+        jobs = threading.Thread(target=loop.run_until_complete, args=(_run_jobs([rsvp_summary_reconciler], stop),), name="jobs", daemon=True)
+        jobs.start()
+
+    event_loop = "uvloop" if find_spec("uvloop") else "asyncio"
+    http = "httptools" if find_spec("httptools") else "h11"
+    pool_size = DataBasePool.pool_size()
+    print(f"Server is running on {variables.WEB_HOST}:{variables.WEB_PORT} with {workers} workers ({event_loop}, {http}), {pool_size} database connections each")
+    try:
+        uvicorn.run(
+            app,
+            host=variables.WEB_HOST,
+            port=variables.WEB_PORT,
+            workers=workers,
+            loop=event_loop,
+            http=http,
+            timeout_keep_alive=variables.WEB_KEEPALIVE_TIMEOUT,
+            backlog=variables.WEB_BACKLOG,
+            timeout_graceful_shutdown=variables.WEB_GRACEFUL_TIMEOUT,
+        )
+    finally:
+        if jobs is not None:
+            loop.call_soon_threadsafe(stop.set)
+            jobs.join(variables.WEB_GRACEFUL_TIMEOUT)
@@ -4,4 +4,70 @@ from dotenv import load_dotenv
 load_dotenv(override=True)
 
 DATABASE_URL = getenv("DATABASE_URL")
-COOKIE_KEY =getenv("COOKIE_KEY")
\ No newline at end of file
+COOKIE_KEY =getenv("COOKIE_KEY")
+SESSION_CACHE_SIZE = int(getenv("SESSION_CACHE_SIZE", 10000))
+SESSION_CACHE_TTL = int(getenv("SESSION_CACHE_TTL", 60))
+EVENT_CACHE_SIZE = int(getenv("EVENT_CACHE_SIZE", 10000))
+EVENT_CACHE_TTL = int(getenv("EVENT_CACHE_TTL", 300))
+IDEMPOTENCY_CACHE_SIZE = int(getenv("IDEMPOTENCY_CACHE_SIZE", 10000))
+IDEMPOTENCY_TTL = int(getenv("IDEMPOTENCY_TTL", 86400))
+# Postgres LISTEN/NOTIFY channel used to invalidate cached events on every worker; empty disables it.
+EVENT_CACHE_CHANNEL = getenv("EVENT_CACHE_CHANNEL", "")
+
+ARGON2_TIME_COST = int(getenv("ARGON2_TIME_COST", 3))
+ARGON2_MEMORY_COST = int(getenv("ARGON2_MEMORY_COST", 65536))
+ARGON2_PARALLELISM = int(getenv("ARGON2_PARALLELISM", 4))
+PASSWORD_HASH_WORKERS = int(getenv("PASSWORD_HASH_WORKERS", 4))
+PASSWORD_HASH_MAX_PENDING = int(getenv("PASSWORD_HASH_MAX_PENDING", 64))
+
+META_BATCH_SIZE = int(getenv("META_BATCH_SIZE", 100))
+META_FLUSH_INTERVAL = float(getenv("META_FLUSH_INTERVAL", 1.0))
+META_QUEUE_SIZE = int(getenv("META_QUEUE_SIZE", 10000))
+
+BULK_BATCH_SIZE = int(getenv("BULK_BATCH_SIZE", 1000))
+EVENT_BATCH_LIMIT = int(getenv("EVENT_BATCH_LIMIT", 1000))
+
+RSVP_SUMMARY_RECONCILE_INTERVAL = float(getenv("RSVP_SUMMARY_RECONCILE_INTERVAL", 3600))
+
+UPCOMING_EVENTS_DAYS = int(getenv("UPCOMING_EVENTS_DAYS", 1))
+
+# RSVP exports are written here and deleted EXPORT_TTL seconds after they were last touched.
+EXPORT_DIR = getenv("EXPORT_DIR", "exports")
+EXPORT_TTL = int(getenv("EXPORT_TTL", 86400))
+EXPORT_CHUNK_SIZE = int(getenv("EXPORT_CHUNK_SIZE", 5000))
+EXPORT_MAX_RUNNING = int(getenv("EXPORT_MAX_RUNNING", 2))
+EXPORT_PURGE_INTERVAL = float(getenv("EXPORT_PURGE_INTERVAL", 3600))
+
+SESSION_REAPER_INTERVAL = float(getenv("SESSION_REAPER_INTERVAL", 300))
+SESSION_REAPER_BATCH_SIZE = int(getenv("SESSION_REAPER_BATCH_SIZE", 1000))
+MAX_SESSIONS_PER_ORGANIZER = int(getenv("MAX_SESSIONS_PER_ORGANIZER", 10))
+
+UA_CACHE_SIZE = int(getenv("UA_CACHE_SIZE", 1024))
+
+# Production server (`python main.py --production`). WEB_WORKERS=0 means one worker per CPU core.
+WEB_HOST = getenv("WEB_HOST", "0.0.0.0")
+WEB_PORT = int(getenv("WEB_PORT", 8000))
+WEB_WORKERS = int(getenv("WEB_WORKERS", 0))
+WEB_KEEPALIVE_TIMEOUT = int(getenv("WEB_KEEPALIVE_TIMEOUT", 5))
+WEB_BACKLOG = int(getenv("WEB_BACKLOG", 2048))
+WEB_GRACEFUL_TIMEOUT = int(getenv("WEB_GRACEFUL_TIMEOUT", 30))
+# Database connections for the whole server, split evenly between worker processes.
+DB_CONNECTION_BUDGET = int(getenv("DB_CONNECTION_BUDGET", 30))
+# Per-process pool; DB_POOL_SIZE=0 takes this worker's share of DB_CONNECTION_BUDGET.
+DB_POOL_SIZE = int(getenv("DB_POOL_SIZE", 0))
+DB_MAX_OVERFLOW = int(getenv("DB_MAX_OVERFLOW", 0))
+DB_POOL_TIMEOUT = float(getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = getenv("DB_POOL_PRE_PING", "false").lower() in ("1", "true", "yes")
+# Connections opened at startup, before the first request is accepted.
+DB_POOL_WARMUP = int(getenv("DB_POOL_WARMUP", 2))
+# Server-side statement timeout in milliseconds (Postgres only); 0 disables it.
+DB_STATEMENT_TIMEOUT_MS = int(getenv("DB_STATEMENT_TIMEOUT_MS", 0))
+
+# Responses smaller than COMPRESSION_MIN_SIZE bytes are sent uncompressed; brotli and zstd are used when installed.
+COMPRESSION_MIN_SIZE = int(getenv("COMPRESSION_MIN_SIZE", 1024))
+COMPRESSION_GZIP_LEVEL = int(getenv("COMPRESSION_GZIP_LEVEL", 6))
+COMPRESSION_BROTLI_QUALITY = int(getenv("COMPRESSION_BROTLI_QUALITY", 4))
+COMPRESSION_ZSTD_LEVEL = int(getenv("COMPRESSION_ZSTD_LEVEL", 3))
+
+METRICS_N_PLUS_ONE_THRESHOLD = int(getenv("METRICS_N_PLUS_ONE_THRESHOLD", 2))
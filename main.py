@@ -1,27 +1,53 @@
+import argparse
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+from DB.cache import EventCache
 from DB.database import DataBasePool 
+from DB.export import RSVPExporter
+from DB.jobs import export_purger, rsvp_summary_reconciler, session_reaper
+from DB.writer import MetaWriter
+from api.account.helper import security
 from api.event.eventApi import router as event_router
 from api.account.accountApi import accountRouter as account_router
 from api.response.rsvpApi import rsvpRouter as rsvp_router
+from api.metrics.metricsApi import metricsRouter as metrics_router
+from extra.compression import CompressionMiddleware
+from extra.helper import FastJSONResponse
+from extra.metrics import MetricsMiddleware
+from extra.server import run_production
 
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    security.start()
     await DataBasePool.setup()
+    await EventCache.start(await DataBasePool.getEngine())
+    await MetaWriter.start()
+    await RSVPExporter.start()
+    await session_reaper.start()
+    await rsvp_summary_reconciler.start()
+    await export_purger.start()
     yield
+    await export_purger.stop()
+    await rsvp_summary_reconciler.stop()
+    await session_reaper.stop()
+    await RSVPExporter.stop()
+    await MetaWriter.stop()
+    await EventCache.stop()
     await DataBasePool.teardown()
+    security.shutdown()
 
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
 
 
 app.include_router(account_router)
 app.include_router(event_router)
 app.include_router(rsvp_router)
+app.include_router(metrics_router)
 
 
 app.add_middleware(
@@ -31,8 +57,16 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 
 if __name__ == "__main__":
-    print("Server is running on localhost:8000")
-    uvicorn.run("main:app", host="localhost", port=8000, reload=True)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--production", action="store_true", help="multi-worker server without the reloader, configured by the WEB_* settings")
+    args = parser.parse_args()
+    if args.production:
+        run_production()
+    else:
+        print("Server is running on localhost:8000")
+        uvicorn.run("main:app", host="localhost", port=8000, reload=True)
@@ -0,0 +1,59 @@
+import os
+
+# Set before the app is imported: extra.variables reads the environment once.
+os.environ.setdefault("COOKIE_KEY", "eventOrg_")
+os.environ.setdefault("ARGON2_TIME_COST", "1")
+os.environ.setdefault("ARGON2_MEMORY_COST", "1024")
+os.environ.setdefault("ARGON2_PARALLELISM", "1")
+
+import httpx
+import pytest
+
+from DB.cache import EventCache, IdempotencyCache, SessionCache
+from DB.export import RSVPExporter
+from extra import variables
+from main import app as main_app
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def app(tmp_path, monkeypatch):
+    """The application on a fresh SQLite database, with its lifespan running."""
+    monkeypatch.setattr(variables, "DATABASE_URL", f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setattr(RSVPExporter, "_directory", str(tmp_path / "exports"))
+    for cache in (SessionCache, EventCache, IdempotencyCache):
+        cache.clear()
+    async with main_app.router.lifespan_context(main_app):
+        yield main_app
+
+
+@pytest.fixture
+async def client(app):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="https://test") as client:
+        yield client
+
+
+async def login(client: httpx.AsyncClient, organizer_name: str = "alice") -> str:
+    account = {"organizer_name": organizer_name, "email": f"{organizer_name}@example.com", "password": "Secret-password1", "contact": str(9000000000 + sum(map(ord, organizer_name))), "name": organizer_name}
+    await client.post("/organizer/signup", json=account)
+    response = await client.post("/organizer/login", json={"data": organizer_name, "password": "Secret-password1", "keepLogin": True})
+    assert response.status_code == 200, response.text
+    client.cookies.set(variables.COOKIE_KEY, response.cookies.get(variables.COOKIE_KEY))
+    return organizer_name
+
+
+@pytest.fixture
+async def organizer(client) -> str:
+    """Signs up and logs in "alice" on `client`."""
+    return await login(client)
+
+
+async def create_event(client: httpx.AsyncClient, event_id: int, title: str, organizer_name: str = "alice", description: str = "", event_date: str = "01/01/2030") -> int:
+    payload = {"organizer_name": organizer_name, "event_id": event_id, "title": title, "description": description, "budget": 10, "event_date": event_date}
+    response = await client.post("/events/create_event", json=payload)
+    assert response.status_code == 200, response.text
+    return response.json()["body"]["id"]
@@ -0,0 +1,56 @@
+import importlib
+import itertools
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from extra import variables
+from main import app as main_app
+from tests.conftest import login
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_signup_login_and_logout(client):
+    await login(client)
+    assert (await client.get("/organizer/auth")).status_code == 200
+
+    assert (await client.post("/organizer/logout")).status_code == 200
+    assert (await client.get("/organizer/auth")).status_code == 403
+
+
+async def test_duplicate_signup_is_rejected(client, organizer):
+    account = {"organizer_name": organizer, "email": "other@example.com", "password": "Secret-password1", "contact": "9111111111", "name": "x"}
+    response = await client.post("/organizer/signup", json=account)
+    assert response.status_code >= 400
+
+
+async def test_lifespan_can_run_twice_in_one_process(tmp_path, monkeypatch):
+    # The argon2 pool is shut down at the end of a lifespan and must come back with the next one.
+    monkeypatch.setattr(variables, "DATABASE_URL", f"sqlite:///{tmp_path / 'test.db'}")
+    for attempt in range(2):
+        async with main_app.router.lifespan_context(main_app):
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main_app), base_url="https://test") as client:
+                await login(client)
+
+
+async def test_login_evicts_the_oldest_sessions(client, monkeypatch):
+    monkeypatch.setattr(variables, "MAX_SESSIONS_PER_ORGANIZER", 2)
+    # One second between logins, so their created_at order is unambiguous.
+    clock = itertools.count(int(time.time()))
+    monkeypatch.setattr(importlib.import_module("api.account.account"), "time", SimpleNamespace(time=lambda: next(clock)))
+
+    await login(client)
+    client.cookies.clear()
+    tokens = []
+    for attempt in range(3):
+        response = await client.post("/organizer/login", json={"data": "alice", "password": "Secret-password1", "keepLogin": True})
+        tokens.append(response.cookies.get(variables.COOKIE_KEY))
+        client.cookies.clear()
+        # Caches the session, so eviction has to drop it from SessionCache too.
+        assert (await client.get("/organizer/auth", headers={"Cookie": f"{variables.COOKIE_KEY}={tokens[-1]}"})).status_code == 200
+
+    statuses = [(await client.get("/organizer/auth", headers={"Cookie": f"{variables.COOKIE_KEY}={token}"})).status_code for token in tokens]
+    assert statuses == [403, 200, 200]
@@ -0,0 +1,57 @@
+import aiosqlite
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from DB.cache import CacheBackend, InvalidationChannel, PostgresInvalidationChannel
+from DB.database import DataBasePool
+from extra import variables
+
+pytestmark = pytest.mark.anyio
+
+
+async def _no_op(*args):
+    pass
+
+
+async def test_invalidation_channel_listens_outside_the_pool(tmp_path, monkeypatch):
+    # asyncpg's listener API on the SQLite driver connection, so the channel's own plumbing runs.
+    for name in ("add_listener", "remove_listener"):
+        monkeypatch.setattr(aiosqlite.Connection, name, _no_op, raising=False)
+    for name in ("add_termination_listener", "remove_termination_listener"):
+        monkeypatch.setattr(aiosqlite.Connection, name, lambda self, callback: None, raising=False)
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'cache.db'}", pool_size=1, max_overflow=0, pool_timeout=1)
+    channel = PostgresInvalidationChannel("event_cache")
+    await channel.start(engine, lambda keys: None)
+    try:
+        assert engine.pool.checkedout() == 0
+        async with engine.connect() as conn:
+            await conn.exec_driver_sql("SELECT 1")
+    finally:
+        await channel.stop()
+        await engine.dispose()
+
+
+async def test_pool_share_leaves_room_for_the_invalidation_channel(monkeypatch):
+    monkeypatch.setattr(variables, "DB_POOL_SIZE", 0)
+    monkeypatch.setattr(variables, "DB_CONNECTION_BUDGET", 12)
+    monkeypatch.setattr(variables, "WEB_WORKERS", 3)
+    monkeypatch.setattr(variables, "DATABASE_URL", "postgresql://app@db/events")
+    monkeypatch.setattr(variables, "EVENT_CACHE_CHANNEL", "")
+    assert DataBasePool.pool_size() == 4
+    monkeypatch.setattr(variables, "EVENT_CACHE_CHANNEL", "event_cache")
+    assert DataBasePool.pool_size() == 3
+
+
+def test_interfaces_cannot_be_used_unimplemented():
+    with pytest.raises(TypeError):
+        CacheBackend()
+
+    class HalfBackend(CacheBackend):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        HalfBackend()
+    with pytest.raises(TypeError):
+        InvalidationChannel()
@@ -0,0 +1,214 @@
+from datetime import date, timedelta
+
+import orjson
+import pytest
+
+from DB import database
+from DB.jobs import iter_upcoming_events
+from DB.search import search_statement
+from extra import variables
+from tests.conftest import create_event
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_event_list_keyset_pagination(client, organizer):
+    for n in range(5):
+        await create_event(client, n, f"event {n}")
+
+    titles, after_id = [], None
+    while True:
+        params = {"username": organizer, "limit": 2}
+        if after_id is not None:
+            params["after_id"] = after_id
+        response = await client.get("/events/get_event", params=params)
+        assert response.status_code == 200
+        titles += [event["title"] for event in response.json()]
+        after_id = response.headers.get("X-Next-After-Id")
+        if after_id is None:
+            break
+    assert titles == [f"event {n}" for n in range(5)]
+
+
+async def test_renamed_event_is_not_served_from_the_title_cache(client, organizer):
+    event_pk = await create_event(client, 1, "party")
+    rsvp = {"event_id": event_pk, "title": "party", "username": "bob", "status": "accepted"}
+    assert (await client.post("/rsvp/submit", json=rsvp)).status_code == 200
+
+    update = {"organizer_name": organizer, "event_id": 1, "title": "party 2", "description": "", "budget": 10, "event_date": "01/01/2030"}
+    assert (await client.post("/events/update_event", json=update)).status_code == 200
+
+    stale = await client.post("/rsvp/submit", json={**rsvp, "username": "carol"})
+    assert stale.status_code == 404
+    fresh = await client.post("/rsvp/submit", json={**rsvp, "title": "party 2", "username": "carol"})
+    assert fresh.status_code == 200
+
+
+async def test_stale_event_update_is_refused(client, organizer):
+    await create_event(client, 1, "party")
+    update = {"organizer_name": organizer, "event_id": 1, "title": "party", "description": "v2", "budget": 10, "event_date": "01/01/2030"}
+    first = await client.post("/events/update_event", json={**update, "expected_row_version": 0})
+    assert first.status_code == 200
+    assert first.json()["body"][0]["row_version"] == 1
+    # Same second as the first update, which updated_at alone could not tell apart.
+    second = await client.post("/events/update_event", json={**update, "description": "v3", "expected_row_version": 0})
+    assert second.status_code == 409
+    assert second.json()["body"]["row_version"] == 1
+    assert second.json()["body"]["updated_at"] == first.json()["body"][0]["updated_at"]
+    third = await client.post("/events/update_event", json={**update, "description": "v3", "expected_row_version": 1})
+    assert third.status_code == 200
+
+
+async def test_batch_create_update_delete(client, organizer):
+    event = lambda n, title: {"organizer_name": organizer, "event_id": n, "title": title, "description": "", "budget": 1, "event_date": "01/01/2030"}
+    response = await client.post("/events/batch", json={"create": [event(1, "a"), event(2, "b")]})
+    assert response.status_code == 200, response.text
+    created = response.json()["body"]["created"]
+    assert [row["title"] for row in created] == ["a", "b"]
+
+    response = await client.post("/events/batch", json={"update": [event(1, "a2"), event(9, "missing")], "delete": [2]})
+    body = response.json()["body"]
+    assert body["updated"] == [1]
+    assert body["missing"] == [9]
+    assert body["deleted"] == [2]
+    listed = (await client.get("/events/get_event", params={"username": organizer})).json()
+    assert [row["title"] for row in listed] == ["a2"]
+
+
+async def test_search_is_ranked_and_follows_writes(client, organizer):
+    await create_event(client, 1, "Python meetup", description="asyncio talks")
+    await create_event(client, 2, "Database night", description="python tooling")
+    await create_event(client, 3, "Bake off", description="cakes")
+
+    response = await client.get("/events/search", params={"q": "python"})
+    assert [event["title"] for event in response.json()] == ["Python meetup", "Database night"]
+
+    update = {"organizer_name": organizer, "event_id": 3, "title": "Bread festival", "description": "sourdough", "budget": 10, "event_date": "01/01/2030"}
+    await client.post("/events/update_event", json=update)
+    assert (await client.get("/events/search", params={"q": "cakes"})).json() == []
+    assert [event["title"] for event in (await client.get("/events/search", params={"q": "sourd"})).json()] == ["Bread festival"]
+
+    await client.delete("/events/delete_event", params={"organizer_name": organizer, "title": "Python meetup"})
+    assert [event["title"] for event in (await client.get("/events/search", params={"q": "python"})).json()] == ["Database night"]
+
+
+@pytest.fixture
+def single_connection(monkeypatch):
+    monkeypatch.setattr(variables, "DB_POOL_SIZE", 1)
+    monkeypatch.setattr(variables, "DB_MAX_OVERFLOW", 0)
+    monkeypatch.setattr(variables, "DB_POOL_TIMEOUT", 2)
+
+
+async def test_event_stream_works_on_a_single_connection_pool(single_connection, client, organizer):
+    for n in range(3):
+        await create_event(client, n, f"event {n}")
+    response = await client.get("/events/get_event", params={"username": organizer, "stream": "true"})
+    assert response.status_code == 200
+    assert [orjson.loads(line)["title"] for line in response.text.splitlines()] == ["event 0", "event 1", "event 2"]
+
+
+async def test_event_id_is_unique_per_organizer(client, organizer):
+    await create_event(client, 1, "party")
+    payload = {"organizer_name": organizer, "event_id": 1, "title": "party again", "description": "", "budget": 10, "event_date": "01/01/2030"}
+    assert (await client.post("/events/create_event", json=payload)).status_code == 409
+
+
+async def test_mixed_case_organizer_updates_own_event(client):
+    # Login lowercases a name, so an organizer signed up as "Bob" logs in by email.
+    organizer = "Bob"
+    account = {"organizer_name": organizer, "email": "bob@example.com", "password": "Secret-password1", "contact": "9000000001", "name": organizer}
+    assert (await client.post("/organizer/signup", json=account)).status_code == 201
+    response = await client.post("/organizer/login", json={"data": "bob@example.com", "password": "Secret-password1", "keepLogin": True})
+    client.cookies.set(variables.COOKIE_KEY, response.cookies.get(variables.COOKIE_KEY))
+    await create_event(client, 1, "party", organizer_name=organizer)
+    update = {"organizer_name": organizer, "event_id": 1, "title": "party 2", "description": "", "budget": 10, "event_date": "01/01/2030"}
+    response = await client.post("/events/update_event", json=update)
+    assert response.status_code == 200
+    assert response.json()["body"][0]["title"] == "party 2"
+
+
+async def test_search_on_an_unsupported_database_answers_501(client, organizer, monkeypatch):
+    monkeypatch.setattr(database, "search_statement", lambda dialect, terms, organizer_name: search_statement("mysql", terms, organizer_name))
+    response = await client.get("/events/search", params={"q": "party"})
+    assert response.status_code == 501
+
+
+async def test_delete_by_a_shared_title_is_refused(client, organizer):
+    await create_event(client, 1, "party")
+    await create_event(client, 2, "party")
+    params = {"organizer_name": organizer, "title": "party"}
+
+    response = await client.delete("/events/delete_event", params=params)
+    assert response.status_code == 409
+    assert response.json()["body"]["event_ids"] == [1, 2]
+
+    assert (await client.delete("/events/delete_event", params={**params, "event_id": 2})).status_code == 200
+    assert (await client.delete("/events/delete_event", params=params)).status_code == 200
+    assert (await client.get("/events/get_event", params={"username": organizer})).status_code == 404
+
+
+async def test_batch_with_a_taken_event_id_is_rolled_back(client, organizer):
+    await create_event(client, 1, "party")
+    event = lambda n, title: {"organizer_name": organizer, "event_id": n, "title": title, "description": "", "budget": 1, "event_date": "01/01/2030"}
+
+    response = await client.post("/events/batch", json={"create": [event(1, "again"), event(2, "new")]})
+    assert response.status_code == 409
+    assert response.json()["body"]["event_ids"] == [1]
+    listed = (await client.get("/events/get_event", params={"username": organizer})).json()
+    assert [row["title"] for row in listed] == ["party"]
+
+
+async def test_batch_repeating_an_event_id_is_rejected(client, organizer):
+    event = lambda n, title: {"organizer_name": organizer, "event_id": n, "title": title, "description": "", "budget": 1, "event_date": "01/01/2030"}
+    response = await client.post("/events/batch", json={"create": [event(1, "a")], "update": [event(1, "b")], "delete": [1]})
+    assert response.status_code == 400
+    errors = response.json()["body"]["errors"]
+    assert [(error["section"], error["position"]) for error in errors] == [("update", 0), ("delete", 0)]
+
+
+def in_days(days: int) -> str:
+    return (date.today() + timedelta(days=days)).strftime("%d/%m/%Y")
+
+
+async def test_upcoming_events_are_paged_by_cursor(client, organizer):
+    for n, days in enumerate((10, 1, -30, 3)):
+        await create_event(client, n, f"in {days} days", event_date=in_days(days))
+
+    titles, after = [], None
+    while True:
+        params = {"username": organizer, "limit": 2}
+        if after is not None:
+            params["after"] = after
+        response = await client.get("/events/upcoming", params=params)
+        assert response.status_code == 200
+        titles += [event["title"] for event in response.json()]
+        after = response.headers.get("X-Next-Cursor")
+        if after is None:
+            break
+    assert titles == ["in 1 days", "in 3 days", "in 10 days"]
+
+    soon = await client.get("/events/upcoming", params={"username": organizer, "days": 5})
+    assert [event["title"] for event in soon.json()] == ["in 1 days", "in 3 days"]
+    assert "X-Next-Cursor" not in soon.headers
+
+
+async def test_events_in_range_include_the_end_day(client, organizer):
+    for n, day in enumerate(("31/12/2029", "01/01/2030", "02/01/2030", "03/01/2030")):
+        await create_event(client, n, day, event_date=day)
+    response = await client.get("/events/range", params={"username": organizer, "start": "01/01/2030", "end": "02/01/2030"})
+    assert [event["title"] for event in response.json()] == ["01/01/2030", "02/01/2030"]
+    bad = await client.get("/events/range", params={"username": organizer, "start": "2030-01-01", "end": "02/01/2030"})
+    assert bad.status_code == 400
+
+
+async def test_bad_date_cursor_is_rejected(client, organizer):
+    for after in ("nope", "1:x", "1:2:3"):
+        response = await client.get("/events/upcoming", params={"username": organizer, "after": after})
+        assert response.status_code == 400
+
+
+async def test_iter_upcoming_events_reads_every_page(client, organizer):
+    for n, days in enumerate((2, 1, 40, 3)):
+        await create_event(client, n, f"in {days} days", event_date=in_days(days))
+    titles = [event.title async for event in iter_upcoming_events(5, batch_size=1)]
+    assert titles == ["in 1 days", "in 2 days", "in 3 days"]
@@ -0,0 +1,40 @@
+import re
+
+import pytest
+
+from tests.conftest import create_event
+
+pytestmark = pytest.mark.anyio
+
+SERVER_TIMING = re.compile(r'app;dur=\d+\.\d, db;dur=\d+\.\d;desc="(\d+) queries"')
+
+
+async def scrape(client) -> dict:
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    samples = {}
+    for line in response.text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+async def test_requests_are_timed_and_counted(client, organizer):
+    await create_event(client, 1, "party")
+    route = 'method="GET",route="/events/get_event"'
+    before = await scrape(client)
+
+    response = await client.get("/events/get_event", params={"username": organizer})
+    assert response.status_code == 200
+    timing = SERVER_TIMING.fullmatch(response.headers["server-timing"])
+    assert timing and int(timing.group(1)) >= 1
+
+    after = await scrape(client)
+    counted = f'http_requests_total{{{route},status="200"}}'
+    assert after[counted] == before.get(counted, 0) + 1
+    assert after[f"http_request_duration_seconds_count{{{route}}}"] == before.get(f"http_request_duration_seconds_count{{{route}}}", 0) + 1
+    queries = f"db_queries_per_request_sum{{{route}}}"
+    assert after[queries] - before.get(queries, 0) == int(timing.group(1))
+    assert 'db_pool{key="size"}' in after
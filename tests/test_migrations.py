@@ -0,0 +1,81 @@
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import IntegrityError
+
+from DB import database
+from DB.database import DataBasePool
+from DB.migrations import latest_version, migrate, v0001_baseline
+from extra import variables
+from main import app as main_app
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_fresh_database_is_stamped_with_every_migration(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    with engine.begin() as conn:
+        assert migrate(conn) == latest_version()
+        assert "event_fts" in inspect(conn).get_table_names()
+    with engine.begin() as conn:
+        assert migrate(conn) == latest_version()
+
+
+async def test_failed_migration_aborts_startup(tmp_path, monkeypatch):
+    async def broken_migrations(engine):
+        raise RuntimeError("Cannot make organizer.email unique")
+
+    monkeypatch.setattr(variables, "DATABASE_URL", f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setattr(database, "run_migrations", broken_migrations)
+    with pytest.raises(RuntimeError):
+        async with main_app.router.lifespan_context(main_app):
+            pass
+    assert DataBasePool._engine is None
+
+
+def _legacy_database(path):
+    """A database as created before migrations existed: the baseline tables and no schema_version."""
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as conn:
+        v0001_baseline.metadata.create_all(conn)
+        conn.execute(text("INSERT INTO organizer (organizer_name, email, contact, password) VALUES ('alice', 'a@example.com', '1', 'x'), ('bob', 'b@example.com', '2', 'x')"))
+    return engine
+
+
+def _indexes(conn):
+    return {table: sorted((index["name"], bool(index["unique"])) for index in inspect(conn).get_indexes(table)) for table in ("organizer", "organizer_session", "event", "rsvp")}
+
+
+async def test_legacy_database_is_migrated_to_the_fresh_schema(tmp_path):
+    fresh = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    with fresh.begin() as conn:
+        migrate(conn)
+        expected = _indexes(conn)
+
+    legacy = _legacy_database(tmp_path / "legacy.db")
+    with legacy.begin() as conn:
+        assert migrate(conn) == latest_version()
+        assert _indexes(conn) == expected
+
+
+async def test_legacy_duplicate_event_keys_are_renumbered(tmp_path):
+    engine = _legacy_database(tmp_path / "legacy.db")
+    with engine.begin() as conn:
+        for title, event_id in (("first", 1), ("second", 1), ("third", 1), ("other", 5)):
+            conn.execute(text("INSERT INTO event (organizer_name, event_id, title, event_date, budget) VALUES ('alice', :event_id, :title, 0, 1)"), {"event_id": event_id, "title": title})
+
+    with engine.begin() as conn:
+        assert migrate(conn) == latest_version()
+        rows = conn.execute(text("SELECT title, event_id FROM event ORDER BY id")).all()
+        assert rows == [("first", 1), ("second", 6), ("third", 7), ("other", 5)]
+        with pytest.raises(IntegrityError):
+            conn.execute(text("INSERT INTO event (organizer_name, event_id, title, event_date, budget) VALUES ('alice', 1, 'again', 0, 1)"))
+
+
+async def test_legacy_duplicate_emails_stop_the_migration_with_a_clear_error(tmp_path):
+    engine = _legacy_database(tmp_path / "legacy.db")
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE organizer SET email = 'shared@example.com'"))
+
+    with pytest.raises(RuntimeError, match="Cannot make organizer.email unique"):
+        with engine.begin() as conn:
+            migrate(conn)
@@ -0,0 +1,11 @@
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_optional_packages_are_pinned():
+    # Imported lazily by extra/compression.py and DB/export.py, so nothing else notices them missing.
+    lines = (ROOT / "requirements-optional.txt").read_text().splitlines()
+    pinned = {line.split("==")[0].strip().lower() for line in lines if "==" in line}
+    assert {"brotli", "pyarrow", "zstandard"} <= pinned
+    assert "-r requirements.txt" in lines
@@ -0,0 +1,193 @@
+import asyncio
+import csv
+import io
+import os
+import time
+
+import orjson
+import pytest
+
+from DB.export import RSVPExporter
+from DB.jobs import export_purger
+from extra import variables
+from tests.conftest import create_event
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def event_pk(client, organizer) -> int:
+    return await create_event(client, 1, "party")
+
+
+def rsvp(event_pk: int, username: str, rsvp_status: str = "accepted") -> dict:
+    return {"event_id": event_pk, "title": "party", "username": username, "status": rsvp_status}
+
+
+async def test_bulk_submit_reports_conflicts_and_errors(client, event_pk):
+    await client.post("/rsvp/submit", json=rsvp(event_pk, "g0"))
+    items = [rsvp(event_pk, f"g{n}") for n in range(5)] + [{"event_id": event_pk, "username": "bad"}]
+    response = await client.post("/rsvp/bulk_submit", json=items)
+    body = response.json()["body"]
+    assert body["received"] == 6
+    assert body["inserted"] == 4
+    assert [conflict["username"] for conflict in body["conflicts"]] == ["g0"]
+    assert [error["row"] for error in body["errors"]] == [5]
+
+    summary = (await client.get("/rsvp/summary", params={"event_id": event_pk})).json()["body"]
+    assert (summary["accepted"], summary["total"]) == (5, 5)
+
+
+async def test_bulk_submit_csv_and_ndjson(client, event_pk):
+    rows = "event_id,title,username,status\n" + "".join(f"{event_pk},party,c{n},declined\n" for n in range(3))
+    response = await client.post("/rsvp/bulk_submit", content=rows, headers={"content-type": "text/csv"})
+    assert response.json()["body"]["inserted"] == 3
+
+    lines = "\n".join(f'{{"event_id": {event_pk}, "title": "party", "username": "n{n}", "status": "accepted"}}' for n in range(2))
+    response = await client.post("/rsvp/bulk_submit", content=lines, headers={"content-type": "application/x-ndjson"})
+    assert response.json()["body"]["inserted"] == 2
+
+
+
+async def test_bulk_submit_streams_quoted_csv_and_chunked_json(client, event_pk):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows([["event_id", "title", "username", "status"], [event_pk, 'party\nafter "dark"', "q0", "accepted"], [event_pk, "party", "q1", "accepted"]])
+    response = await client.post("/rsvp/bulk_submit", content=buffer.getvalue(), headers={"content-type": "text/csv"})
+    assert response.json()["body"]["inserted"] == 2
+
+    body = orjson.dumps([rsvp(event_pk, f"j{n}") for n in range(3)])
+
+    async def chunks():
+        for start in range(0, len(body), 7):
+            yield body[start:start + 7]
+
+    response = await client.post("/rsvp/bulk_submit", content=chunks(), headers={"content-type": "application/json"})
+    assert response.json()["body"]["inserted"] == 3
+
+    responses = (await client.get("/rsvp/get_responses", params={"event_id": event_pk})).json()["responses"]
+    assert {row["username"]: row["title"] for row in responses}["q0"] == 'party\nafter "dark"'
+    assert (await client.post("/rsvp/bulk_submit", content=b'{"event_id": 1}', headers={"content-type": "application/json"})).status_code == 400
+
+async def test_upsert_creates_updates_and_replays(client, event_pk):
+    created = await client.post("/rsvp/upsert", json=rsvp(event_pk, "bob"))
+    assert created.json()["body"]["created"] is True
+    unchanged = await client.post("/rsvp/upsert", json=rsvp(event_pk, "bob"))
+    assert unchanged.json()["body"]["changed"] is False
+
+    headers = {"Idempotency-Key": "retry-1"}
+    first = await client.post("/rsvp/upsert", json=rsvp(event_pk, "bob", "declined"), headers=headers)
+    assert first.json()["message"] == "RSVP updated successfully"
+    replay = await client.post("/rsvp/upsert", json=rsvp(event_pk, "bob", "declined"), headers=headers)
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    assert replay.json() == first.json()
+    mismatch = await client.post("/rsvp/upsert", json=rsvp(event_pk, "bob", "accepted"), headers=headers)
+    assert mismatch.status_code == 422
+
+    summary = (await client.get("/rsvp/summary", params={"event_id": event_pk})).json()["body"]
+    assert (summary["accepted"], summary["declined"]) == (0, 1)
+
+
+async def test_responses_keyset_pagination_and_projection(client, event_pk):
+    await client.post("/rsvp/bulk_submit", json=[rsvp(event_pk, f"g{n}") for n in range(5)])
+    usernames, after_id = [], None
+    while True:
+        params = {"event_id": event_pk, "limit": 2, "fields": "username,status"}
+        if after_id is not None:
+            params["after_id"] = after_id
+        body = (await client.get("/rsvp/get_responses", params=params)).json()
+        assert all(set(row) == {"username", "status"} for row in body["responses"])
+        usernames += [row["username"] for row in body["responses"]]
+        after_id = body["next_after_id"]
+        if after_id is None:
+            break
+    assert usernames == [f"g{n}" for n in range(5)]
+
+    response = await client.get("/rsvp/get_responses", params={"event_id": event_pk, "fields": "username,nope"})
+    assert response.status_code == 400
+
+
+async def test_responses_answer_304_until_the_list_changes(client, event_pk):
+    await client.post("/rsvp/submit", json=rsvp(event_pk, "bob"))
+    get = lambda headers={}: client.get("/rsvp/get_responses", params={"event_id": event_pk}, headers=headers)
+
+    etag = (await get()).headers["ETag"]
+    not_modified = await get({"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+
+    # Same second as the insert: row_version still moves the validator.
+    await client.put("/rsvp/update", json=rsvp(event_pk, "bob", "declined"))
+    changed = await get({"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()["responses"][0]["status"] == "declined"
+
+
+
+async def test_if_modified_since_does_not_hide_a_delete(client, event_pk):
+    for username in ("bob", "carol"):
+        await client.post("/rsvp/submit", json=rsvp(event_pk, username))
+    get = lambda headers={}: client.get("/rsvp/get_responses", params={"event_id": event_pk}, headers=headers)
+    last_modified = (await get()).headers["Last-Modified"]
+
+    assert (await client.delete("/rsvp/delete", params={"event_id": event_pk, "username": "carol"})).status_code == 200
+    response = await get({"If-Modified-Since": last_modified})
+    assert response.status_code == 200
+    assert [row["username"] for row in response.json()["responses"]] == ["bob"]
+
+async def test_large_responses_are_compressed(client, event_pk):
+    await client.post("/rsvp/bulk_submit", json=[rsvp(event_pk, f"guest{n}") for n in range(100)])
+    response = await client.get("/rsvp/get_responses", params={"event_id": event_pk}, headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(response.json()["responses"]) == 100
+    identity = await client.get("/rsvp/get_responses", params={"event_id": event_pk}, headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in identity.headers
+
+
+async def test_export_writes_csv_and_serves_ranges(client, event_pk):
+    await client.post("/rsvp/bulk_submit", json=[rsvp(event_pk, f"g{n}") for n in range(25)])
+    response = await client.post("/rsvp/export", params={"event_id": event_pk})
+    assert response.status_code == 202
+    job = response.json()["body"]
+
+    for _ in range(100):
+        job = (await client.get(job["status_url"])).json()["body"]
+        if job["status"] == "done":
+            break
+        await asyncio.sleep(0.02)
+    assert (job["status"], job["rows"], job["progress"]) == ("done", 25, 1.0)
+
+    download = await client.get(job["download_url"], headers={"Accept-Encoding": "identity"})
+    rows = list(csv.reader(io.StringIO(download.text)))
+    assert rows[0][:3] == ["id", "event_id", "username"]
+    assert [row[2] for row in rows[1:]] == [f"g{n}" for n in range(25)]
+
+    partial = await client.get(job["download_url"], headers={"Range": "bytes=0-1"})
+    assert partial.status_code == 206
+    assert partial.content == b"id"
+
+
+async def test_export_is_limited_to_the_events_organizer(client, event_pk):
+    assert (await client.post("/rsvp/export", params={"event_id": event_pk + 1})).status_code == 404
+    assert (await client.get("/rsvp/export/" + "0" * 32)).status_code == 404
+
+
+async def test_export_purge_job_removes_expired_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(RSVPExporter, "_directory", str(tmp_path))
+    monkeypatch.setattr(variables, "EXPORT_TTL", 60)
+    expired, fresh = tmp_path / ("a" * 32 + ".csv"), tmp_path / ("b" * 32 + ".csv")
+    expired.write_text("id\n")
+    fresh.write_text("id\n")
+    old = time.time() - 120
+    os.utime(expired, (old, old))
+
+    assert await export_purger.run_once() == 1
+    assert [path.name for path in tmp_path.iterdir()] == [fresh.name]
+
+
+async def test_stale_rsvp_update_is_refused(client, event_pk):
+    await client.post("/rsvp/submit", json=rsvp(event_pk, "g0"))
+    first = await client.put("/rsvp/update", json={**rsvp(event_pk, "g0", "declined"), "expected_row_version": 0})
+    assert first.status_code == 200
+    second = await client.put("/rsvp/update", json={**rsvp(event_pk, "g0", "accepted"), "expected_row_version": 0})
+    assert second.status_code == 409
+    assert second.json()["body"]["row_version"] == 1
@@ -0,0 +1,36 @@
+import os
+import threading
+
+import uvicorn
+
+from DB.jobs import rsvp_summary_reconciler
+from extra import variables
+from extra.server import run_production
+
+
+def test_production_reconciles_in_the_supervisor_only(tmp_path, monkeypatch):
+    monkeypatch.setattr(variables, "DATABASE_URL", f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setattr(variables, "DB_POOL_WARMUP", variables.DB_POOL_WARMUP)
+    monkeypatch.setattr(variables, "WEB_WORKERS", 2)
+    monkeypatch.setenv("WEB_WORKERS", "2")
+    monkeypatch.setenv("RSVP_SUMMARY_RECONCILE_INTERVAL", "3600")
+
+    reconciled = threading.Event()
+
+    async def reconcile():
+        reconciled.set()
+
+    monkeypatch.setattr(rsvp_summary_reconciler, "interval", 0.01)
+    monkeypatch.setattr(rsvp_summary_reconciler, "func", reconcile)
+
+    seen = {}
+
+    def serve(app, **options):
+        # Spawned workers read their settings from this environment.
+        seen["worker_interval"] = os.environ["RSVP_SUMMARY_RECONCILE_INTERVAL"]
+        seen["reconciled"] = reconciled.wait(5)
+
+    monkeypatch.setattr(uvicorn, "run", serve)
+    run_production()
+    assert seen == {"worker_interval": "0", "reconciled": True}
+    assert rsvp_summary_reconciler._task is None